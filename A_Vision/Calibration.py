@@ -1,6 +1,7 @@
 import numpy as np  
 import cv2 as cv 
 from Vision_tools import load_image
+from Calibration_grid import dot_centers, grid_correspondences, fit_homography, print_report
 import json
 from pathlib import Path
 import sys
@@ -33,78 +34,34 @@ hsv = hsv[y1:y2, x1:x2]
 blurred_image = cv.GaussianBlur(hsv, (blur_k, blur_k), 0)
 mask = cv.inRange(blurred_image, lower, upper)
 
-contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
-
-img_points = []
-
-for cnt in contours:
-    if cv.contourArea(cnt) < min_area:
-        continue
-
-    M = cv.moments(cnt)
-    if M["m00"] != 0:
-        cx_local = int(M["m10"] / M["m00"])
-        cy_local = int(M["m01"] / M["m00"])
-
-        # Convert from ROI coords → global coords
-        cx = cx_local + x1
-        cy = cy_local + y1
-
-        img_points.append([cx, cy])
+# Sub-pixel centre: intensitets-vægtede momenter på S-kanalen inden for
+# hver prik (før: int(m10/m00) → op til 0.5 px trunkering)
+img_points = dot_centers(mask, min_area=min_area, method="weighted",
+                         weight=cv.bitwise_and(np.ascontiguousarray(blurred_image[..., 1]), mask),
+                         offset=(x1, y1))
 
 print(f"Detected {len(img_points)} points")
 
-#if len(img_points) != 20:
-    #raise ValueError("Did not detect exactly 20 calibration dots!")
-
 # --------------------------------------
 # 3. Sort points into grid order (4 rows x 5 columns)
 # --------------------------------------
+# PCA-baseret ordning – tåler rotation og manglende prikker
+pixels, robot_points, cells = grid_correspondences(img_points)
+ordered_points = pixels
 
-# Sort by Y first (top to bottom)
-img_points = sorted(img_points, key=lambda p: (p[1], p[0]))
-
-# Group into 4 rows
-rows = []
-row = [img_points[0]]
-
-for p in img_points[1:]:
-    if abs(p[1] - row[-1][1]) < 20:    # same row tolerance
-        row.append(p)
-    else:
-        rows.append(row)
-        row = [p]
-rows.append(row)
-
-# Sort each row by X coordinate
-for i in range(len(rows)):
-    rows[i] = sorted(rows[i], key=lambda p: p[0])
-
-# Flatten into final ordered list (row-major)
-ordered_points = [p for row in rows for p in row]
-
-for (x,y) in img_points:
-    cv.circle(img, (x,y), 6, (0,255,0), -1)
+for (x, y) in img_points:
+    cv.circle(img, (int(round(x)), int(round(y))), 6, (0,255,0), -1)
 
 cv.imshow("Detected Dots", img)
 cv.waitKey(0)
 cv.destroyAllWindows()
-# --------------------------------------
-# 4. Robot coordinates (20 points, row-major)
-# --------------------------------------
-robot_points = np.array([
-    [0.0,    420.0], [112.5, 420.0], [225.0, 420.0], [337.5, 420.0], [450.0, 420.0],
-    [0.0,    280.0], [112.5, 280.0], [225.0, 280.0], [337.5, 280.0], [450.0, 280.0],
-    [0.0,    140.0], [112.5, 140.0], [225.0, 140.0], [337.5, 140.0], [450.0, 140.0],
-    [0.0,      0.0], [112.5,   0.0], [225.0,   0.0], [337.5,   0.0], [450.0,   0.0]
-], dtype=np.float32)
-
 
 # --------------------------------------
-# 5. Compute Homography
+# 4. Robot coordinates: Calibration_grid.ROBOT_GRID (4 × 5, row-major)
+# 5. Compute Homography (RANSAC + refit på inliers)
 # --------------------------------------
-pixels = np.array(ordered_points, dtype=np.float32)
-H, _ = cv.findHomography(pixels, robot_points)
+H, inliers, residuals = fit_homography(pixels, robot_points, method="ransac")
+print_report(pixels, robot_points, inliers, residuals, cells)
 np.savez("calibration_h.npz", H=H)
 print("Saved calibration matrix to calibration_h.npz")
 print("Homography matrix H:\n", H)
@@ -112,7 +69,7 @@ print("Homography matrix H:\n", H)
 # --------------------------------------
 # 6. Click test: pixel → robot conversion
 # --------------------------------------
-print("\nPixel → Robot coordinates for all 20 detected points:")
+print(f"\nPixel → Robot coordinates for all {len(ordered_points)} detected points:")
 for i, (px, py) in enumerate(ordered_points):
     p = np.array([px, py, 1.0])
     mapped = H @ p
@@ -0,0 +1,300 @@
+"""
+Calibration_grid.py
+Sub-pixel detektion af kalibreringsprikker, robust grid-ordning og
+robust homografi-fit med residualer pr. punkt.
+
+Calibration.py / qc_calibration_dots.py tog før heltals-centroider
+(int(m10/m00)), sorterede efter Y med en fast rækketolerance og fittede
+homografien med almindelige mindste kvadrater. En skæv kamera-montering,
+en manglende prik eller én fejl-detektion gav derfor et forkert H uden
+advarsel.
+
+Funktionalitet:
+- dot_centers(mask, ...): centre med sub-pixel præcision
+    "moments"   kontur-momenter (float – ingen trunkering)
+    "weighted"  intensitets-vægtede momenter på en vægt-kanal (fx blurret
+                maske eller S-kanalen) inden for konturen
+    "ellipse"   fitEllipse-centrum (kræver ≥ 5 konturpunkter)
+- grid_axes(points): række- og kolonne-retning fra nabo-vektorerne
+- order_grid(points, rows, cols): (række, kolonne) for hvert punkt –
+  robust over for rotation, perspektiv og manglende prikker
+- fit_homography(pixels, robot, method): lsq / ransac / lmeds med
+  inlier-maske og residual i mm pr. punkt
+- print_report(...): residual-tabel til konsollen
+
+Modulet importerer ingen andre A_Vision-moduler, så det virker både som
+A_Vision.Calibration_grid og fladt fra A_Vision/.
+"""
+import cv2 as cv
+import numpy as np
+
+CENTER_METHODS = ("moments", "weighted", "ellipse")
+FIT_METHODS = {"lsq": 0, "ransac": cv.RANSAC, "lmeds": cv.LMEDS}
+
+NEIGHBOUR_RATIO = 1.4     # nabo = afstand ≤ 1.4 × median nærmeste-nabo (diagonal ≈ 1.6)
+AXIS_TRIM_DEG = 20.0      # nabo-vektorer længere fra aksen end dette ignoreres
+
+# 4 × 5 grid (række-major, øverste række først) – samme som kalibreringspladen
+GRID_ROWS, GRID_COLS = 4, 5
+ROBOT_GRID = np.array([
+    [0.0,    420.0], [112.5, 420.0], [225.0, 420.0], [337.5, 420.0], [450.0, 420.0],
+    [0.0,    280.0], [112.5, 280.0], [225.0, 280.0], [337.5, 280.0], [450.0, 280.0],
+    [0.0,    140.0], [112.5, 140.0], [225.0, 140.0], [337.5, 140.0], [450.0, 140.0],
+    [0.0,      0.0], [112.5,   0.0], [225.0,   0.0], [337.5,   0.0], [450.0,   0.0],
+], dtype=np.float64)
+
+
+# ======================================================
+# CENTRE
+# ======================================================
+def dot_centers(mask, min_area: float = 20, method: str = "weighted", weight=None,
+                offset=(0, 0)) -> np.ndarray:
+    """
+    Finder prik-centre i en binær maske.
+
+    Parametre:
+        mask (ndarray): 0/255 maske med prikkerne.
+        min_area (float): Mindste konturareal.
+        method (str): "moments", "weighted" eller "ellipse".
+        weight (ndarray | None): Vægt-billede til "weighted" (samme shape som
+                                 mask). None = blurret maske.
+        offset (tuple): Lægges til alle centre (fx ROI-hjørnet).
+
+    Returnerer:
+        ndarray (N, 2) float64 med (x, y).
+    """
+    if method not in CENTER_METHODS:
+        raise ValueError(f"Ukendt metode '{method}' – vælg en af {CENTER_METHODS}")
+
+    if method == "weighted" and weight is None:
+        weight = cv.GaussianBlur(mask, (5, 5), 0)
+
+    contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_NONE)
+    centers = []
+
+    for cnt in contours:
+        if cv.contourArea(cnt) < min_area:
+            continue
+
+        if method == "ellipse" and len(cnt) >= 5:
+            (cx, cy), _, _ = cv.fitEllipse(cnt)
+
+        elif method == "weighted":
+            x, y, w, h = cv.boundingRect(cnt)
+            # 2 px margen, så blurrede kanter tæller med
+            x0, y0 = max(x - 2, 0), max(y - 2, 0)
+            x1, y1 = min(x + w + 2, mask.shape[1]), min(y + h + 2, mask.shape[0])
+            inside = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+            cv.drawContours(inside, [cnt], -1, 255, -1, offset=(-x0, -y0))
+            inside = cv.dilate(inside, np.ones((5, 5), np.uint8))
+            roi = cv.bitwise_and(weight[y0:y1, x0:x1], inside)
+            M = cv.moments(roi)
+            if M["m00"] == 0:
+                continue
+            cx = x0 + M["m10"] / M["m00"]
+            cy = y0 + M["m01"] / M["m00"]
+
+        else:
+            M = cv.moments(cnt)
+            if M["m00"] == 0:
+                continue
+            cx = M["m10"] / M["m00"]
+            cy = M["m01"] / M["m00"]
+
+        centers.append((cx + offset[0], cy + offset[1]))
+
+    return np.array(centers, dtype=np.float64).reshape(-1, 2)
+
+
+# ======================================================
+# GRID-ORDNING
+# ======================================================
+def _split_groups(values: np.ndarray, n_groups: int, min_gap_ratio: float = 3.0) -> np.ndarray:
+    """
+    Deler 1D-værdier i n_groups ved de største spring. Returnerer gruppe-index.
+
+    Kaster:
+        ValueError hvis et af de valgte spring ikke er tydeligt større
+        (min_gap_ratio ×) end det største spring inden for en gruppe, eller
+        er under halvdelen af median-springet (pitch) – så mangler der en
+        hel række/kolonne, og et snit ville lande i støjen inde i en
+        rigtig gruppe.
+    """
+    order = np.argsort(values)
+    gaps = np.diff(values[order])
+    cuts = np.sort(np.argsort(gaps)[::-1][:n_groups - 1])
+
+    if n_groups > 1:
+        inner = np.delete(gaps, cuts)
+        largest_inner = inner.max() if inner.size else 0.0
+        cut_gaps = gaps[cuts]
+        if (cut_gaps.min() <= min_gap_ratio * largest_inner
+                or cut_gaps.min() < 0.5 * np.median(cut_gaps)):
+            raise ValueError(f"Kan ikke dele i {n_groups} grupper – mangler en hel række/kolonne?")
+
+    labels_sorted = np.zeros(len(values), dtype=int)
+    for c in cuts:
+        labels_sorted[c + 1:] += 1
+    labels = np.empty(len(values), dtype=int)
+    labels[order] = labels_sorted
+    return labels
+
+
+def grid_axes(points) -> np.ndarray:
+    """
+    Grid'ets to retninger fundet fra vektorerne mellem nabo-prikker.
+
+    PCA på hele punktskyen duer ikke her: pladens pitch (112.5 × 140 mm)
+    giver en næsten isotrop kovarians, så én manglende prik kan dreje
+    hovedaksen op til ~40°. Nabo-vektorerne peger derimod langs grid-
+    linjerne uanset hvilke prikker der mangler. Retningerne samles i to
+    klynger (fordoblet vinkel, så v ≡ -v) startende fra billed-x og
+    billed-y; diagonaler og andre løse naboer trimmes væk.
+
+    Returnerer:
+        ndarray (2, 2) med enhedsvektorerne (langs en række, langs en kolonne).
+
+    Kaster:
+        ValueError hvis en af retningerne ikke har nogen nabo-vektorer.
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    diff = pts[None, :, :] - pts[:, None, :]
+    dist = np.linalg.norm(diff, axis=2)
+    np.fill_diagonal(dist, np.inf)
+    pitch = np.median(dist.min(axis=1))
+
+    vec = diff[dist <= NEIGHBOUR_RATIO * pitch]
+    doubled = 2.0 * np.arctan2(vec[:, 1], vec[:, 0])
+
+    centers = np.array([0.0, np.pi])     # fordoblet: billed-x og billed-y
+    limit = np.pi                        # første runde: kun nærmeste klynge
+    for _ in range(10):
+        off = np.angle(np.exp(1j * (doubled[:, None] - centers[None, :])))
+        nearest = np.argmin(np.abs(off), axis=1)
+        for k in range(2):
+            sel = (nearest == k) & (np.abs(off[:, k]) < limit)
+            if not sel.any():
+                raise ValueError("Kan ikke finde grid-akserne – for få nabo-prikker")
+            centers[k] = np.angle(np.exp(1j * doubled[sel]).sum())
+        limit = np.radians(2.0 * AXIS_TRIM_DEG)
+
+    half = centers / 2.0
+    return np.stack([np.cos(half), np.sin(half)], axis=1)
+
+
+def order_grid(points, rows: int = GRID_ROWS, cols: int = GRID_COLS) -> np.ndarray:
+    """
+    Tildeler (række, kolonne) til hvert punkt.
+
+    Akserne findes med grid_axes, så en roteret eller perspektivisk plade
+    ordnes korrekt. Kolonnerne adskilles vinkelret på kolonne-retningen og
+    rækkerne vinkelret på række-retningen (akserne behøver ikke stå
+    vinkelret i billedet). Rækker nummereres oppefra (mindste billed-y) og
+    kolonner fra venstre (mindste billed-x) som i den oprindelige
+    sortering. Manglende prikker er tilladt, så længe hver række og
+    kolonne har mindst ét punkt.
+
+    Returnerer:
+        ndarray (N, 2) int med (række, kolonne).
+
+    Kaster:
+        ValueError hvis en hel række/kolonne mangler, eller to punkter
+        havner i samme celle.
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(pts) < max(rows, cols):
+        raise ValueError(f"For få punkter ({len(pts)}) til et {rows}×{cols} grid")
+
+    along_row, along_col = grid_axes(pts)
+    col_ids = _split_groups(pts @ np.array([-along_col[1], along_col[0]]), cols)
+    row_ids = _split_groups(pts @ np.array([-along_row[1], along_row[0]]), rows)
+
+    # nummerér grupper efter billed-koordinater (uafhængigt af aksernes fortegn)
+    col_rank = np.argsort(np.argsort([pts[col_ids == c, 0].mean() for c in range(cols)]))
+    row_rank = np.argsort(np.argsort([pts[row_ids == r, 1].mean() for r in range(rows)]))
+    rc = np.stack([row_rank[row_ids], col_rank[col_ids]], axis=1)
+
+    cells = rc[:, 0] * cols + rc[:, 1]
+    if len(np.unique(cells)) != len(cells):
+        raise ValueError("To prikker blev tildelt samme grid-celle – tjek masken")
+    return rc
+
+
+def grid_correspondences(points, robot_grid=ROBOT_GRID, rows: int = GRID_ROWS,
+                         cols: int = GRID_COLS) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parrer detekterede punkter med robot-grid'et.
+
+    Returnerer:
+        (pixels (N, 2), robot (N, 2), cell-index (N,)) sorteret række-major.
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    rc = order_grid(pts, rows, cols)
+    cells = rc[:, 0] * cols + rc[:, 1]
+    order = np.argsort(cells)
+    return pts[order], np.asarray(robot_grid, dtype=np.float64)[cells[order]], cells[order]
+
+
+# ======================================================
+# HOMOGRAFI
+# ======================================================
+def reprojection_errors(H, pixels, robot) -> np.ndarray:
+    """Afstand i mm mellem H·pixel og det kendte robot-punkt."""
+    pix = np.asarray(pixels, dtype=np.float64).reshape(-1, 2)
+    homog = np.hstack([pix, np.ones((len(pix), 1))])
+    dst = (H @ homog.T).T
+    mapped = dst[:, :2] / dst[:, 2:3]
+    return np.linalg.norm(mapped - np.asarray(robot, dtype=np.float64).reshape(-1, 2), axis=1)
+
+
+def fit_homography(pixels, robot, method: str = "ransac", reproj_thresh_mm: float = 2.0):
+    """
+    Fitter homografi pixel → robot.
+
+    Parametre:
+        method (str): "lsq", "ransac" eller "lmeds".
+        reproj_thresh_mm (float): RANSAC-tærskel (i robot-mm).
+
+    Returnerer:
+        (H, inliers (N,) bool, residualer i mm (N,))
+
+    Kaster:
+        ValueError ved < 4 punkter eller ukendt metode,
+        RuntimeError hvis OpenCV ikke finder en homografi.
+    """
+    if method not in FIT_METHODS:
+        raise ValueError(f"Ukendt fit-metode '{method}' – vælg en af {tuple(FIT_METHODS)}")
+
+    pix = np.asarray(pixels, dtype=np.float32).reshape(-1, 2)
+    rob = np.asarray(robot, dtype=np.float32).reshape(-1, 2)
+    if len(pix) != len(rob) or len(pix) < 4:
+        raise ValueError("Der kræves >= 4 parrede pixel <-> robot punkter.")
+
+    H, inlier_mask = cv.findHomography(pix, rob, method=FIT_METHODS[method],
+                                       ransacReprojThreshold=reproj_thresh_mm)
+    if H is None:
+        raise RuntimeError("Homografi-beregning fejlede")
+
+    if inlier_mask is None:
+        inliers = np.ones(len(pix), dtype=bool)
+    else:
+        inliers = inlier_mask.reshape(-1).astype(bool)
+
+    if method != "lsq" and inliers.sum() >= 4:
+        # forfin på inliers med mindste kvadrater
+        H, _ = cv.findHomography(pix[inliers], rob[inliers], method=0)
+
+    return H, inliers, reprojection_errors(H, pix, rob)
+
+
+def print_report(pixels, robot, inliers, residuals, cells=None) -> None:
+    """Residual-tabel pr. punkt + RMS for inliers."""
+    print("\n  #   cell   pixel (x, y)          robot (X, Y)        residual")
+    for i, (p, r, ok, e) in enumerate(zip(pixels, robot, inliers, residuals), start=1):
+        cell = f"{cells[i - 1] + 1:4d}" if cells is not None else "   -"
+        flag = "" if ok else "  OUTLIER"
+        print(f"{i:3d}  {cell}   ({p[0]:8.2f}, {p[1]:8.2f})   ({r[0]:7.1f}, {r[1]:7.1f})   {e:6.2f} mm{flag}")
+
+    ok = residuals[inliers]
+    rms = float(np.sqrt(np.mean(ok ** 2))) if len(ok) else float("nan")
+    print(f"\n  inliers {int(inliers.sum())}/{len(inliers)}   RMS {rms:.2f} mm   max {ok.max() if len(ok) else float('nan'):.2f} mm")
@@ -0,0 +1,104 @@
+# Calibration_grid_test.py
+# Kør fra A_Vision/: python Calibration_grid_test.py (eller pytest)
+from pathlib import Path
+
+import numpy as np
+
+from Calibration_grid import GRID_COLS, GRID_ROWS, ROBOT_GRID, grid_correspondences
+
+H_PATH = Path(__file__).resolve().parents[1] / "C_data" / "calibration_h.npz"
+
+
+def synthetic_dots(angle_deg: float = 3.0, pitch: float = 80.0, noise: float = 0.3, seed: int = 0):
+    """4 × 5 prikker i pixels (række-major, øverste række først), let roteret."""
+    rng = np.random.default_rng(seed)
+    rows, cols = np.mgrid[0:GRID_ROWS, 0:GRID_COLS]
+    pts = np.stack([cols.ravel() * pitch, rows.ravel() * pitch], axis=1)
+    t = np.radians(angle_deg)
+    R = np.array([[np.cos(t), -np.sin(t)], [np.sin(t), np.cos(t)]])
+    return pts @ R.T + (150.0, 100.0) + rng.normal(0.0, noise, pts.shape)
+
+
+def plate_dots(noise: float = 0.5, seed: int = 0):
+    """ROBOT_GRID gennem den rigtige calibration_h.npz tilbage til pixels."""
+    H_inv = np.linalg.inv(np.load(str(H_PATH))["H"])
+    homog = np.hstack([ROBOT_GRID, np.ones((len(ROBOT_GRID), 1))]) @ H_inv.T
+    pixels = homog[:, :2] / homog[:, 2:3]
+    return pixels + np.random.default_rng(seed).normal(0.0, noise, pixels.shape)
+
+
+def assert_plate_without(missing):
+    dots = plate_dots()
+    keep = np.setdiff1d(np.arange(len(dots)), missing)
+    pixels, robot, cells = grid_correspondences(dots[keep])
+    assert np.array_equal(cells, keep)
+    assert np.allclose(pixels, dots[keep])
+    assert np.allclose(robot, ROBOT_GRID[keep])
+
+
+def test_full_grid():
+    dots = synthetic_dots()
+    shuffled = dots[np.random.default_rng(1).permutation(len(dots))]
+    pixels, robot, cells = grid_correspondences(shuffled)
+    assert np.array_equal(cells, np.arange(len(dots)))
+    assert np.allclose(pixels, dots)
+    assert np.allclose(robot, ROBOT_GRID)
+
+
+def test_missing_dot_is_tolerated():
+    dots = np.delete(synthetic_dots(), 7, axis=0)
+    _, robot, cells = grid_correspondences(dots)
+    assert 7 not in cells
+    assert np.allclose(robot, ROBOT_GRID[cells])
+
+
+def test_real_plate_missing_corner_dot():
+    # 112.5 × 140 mm pitch giver en næsten isotrop punktsky – PCA-akserne
+    # drejede ~40° når hjørnet manglede
+    assert_plate_without([0])
+
+
+def test_real_plate_missing_edge_dot():
+    assert_plate_without([10])
+
+
+def test_real_plate_any_single_missing_dot():
+    for missing in range(len(ROBOT_GRID)):
+        assert_plate_without([missing])
+
+
+def test_missing_column_is_rejected():
+    dots = synthetic_dots()
+    keep = np.arange(len(dots)) % GRID_COLS != 2   # midterste kolonne dækket
+    try:
+        grid_correspondences(dots[keep])
+    except ValueError:
+        return
+    raise AssertionError("manglende kolonne blev parret med forkerte robot-punkter")
+
+
+def test_real_plate_missing_column_is_rejected():
+    dots = plate_dots()
+    keep = np.arange(len(dots)) % GRID_COLS != 0
+    try:
+        grid_correspondences(dots[keep])
+    except ValueError:
+        return
+    raise AssertionError("manglende kolonne blev parret med forkerte robot-punkter")
+
+
+def test_missing_row_is_rejected():
+    dots = synthetic_dots()
+    keep = np.arange(len(dots)) // GRID_COLS != 1
+    try:
+        grid_correspondences(dots[keep])
+    except ValueError:
+        return
+    raise AssertionError("manglende række blev parret med forkerte robot-punkter")
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"[OK] {name}")
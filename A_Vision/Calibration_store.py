@@ -0,0 +1,296 @@
+"""
+Calibration_store.py
+Versioneret kalibrerings-register med atomisk aktivering og hot-swap.
+
+Før lå kalibreringen spredt: tre calibration_h.npz (C_data, A_Vision,
+JacobV_test), tre settings-JSON'er og vinkel-offsets som konstanter i
+koden (151.55 i qc_main, 26.76/63.24 i main.py). Ingen vidste hvilken
+version der kørte. (angle_offset_deg i object_settings.json blev aldrig
+læst af nogen kode og migreres derfor ikke.)
+
+Registret samler alt i én versioneret post:
+
+    C_data/calibration/
+        v0001.json      homografi, ROI, mm_per_pixel, vinkel-offsets,
+        v0002.json      HSV-settings (snapshot), note, forælder-version
+        CURRENT         id på den aktive version
+
+En ny version skrives færdig til en temp-fil og flyttes på plads med
+os.replace; derefter flyttes CURRENT-pointeren på samme måde. En læser
+ser derfor altid enten den gamle eller den nye version – aldrig en halv.
+
+Det kørende QC-loop kalder poll() mellem to frames; er CURRENT ændret,
+returneres den nye Calibration, og loopet skifter den ud i én tildeling.
+
+Funktionalitet:
+- CalibrationStore.current(): aktiv Calibration
+- CalibrationStore.publish(calib, note): ny version + aktivering
+- CalibrationStore.activate(version): rul frem/tilbage
+- CalibrationStore.poll(): ny Calibration hvis CURRENT er ændret, ellers None
+- CalibrationStore.bootstrap_legacy(...): første version fra de gamle filer
+"""
+import json
+import os
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+import numpy as np
+
+STORE_DIR = Path(__file__).resolve().parents[1] / "C_data" / "calibration"
+SCHEMA_VERSION = 1
+
+# værdierne der før lå hårdkodet rundt i koden (Vision_pose afleder sit
+# pose_offset_deg fra pca_offset_deg, indtil et kalibreret offset gemmes)
+LEGACY_ANGLES = {
+    "pca_offset_deg": 151.55,          # qc_main: (pca_angle + 151.55) % 180
+    "rect_long_offset_deg": -26.76,    # main.py: h > w
+    "rect_short_offset_deg": 63.24,    # main.py: ellers
+    "tool_offset_deg": 90.0,           # main.py: ekstra 90° værktøjs-offset
+}
+LEGACY_ROI = (120, 60, 528, 472)       # main.py / Calibration.py (x1, y1, x2, y2)
+LEGACY_MM_PER_PIXEL = 0.5098
+
+
+@dataclass(frozen=True)
+class Calibration:
+    """
+    Én kalibrerings-version (uforanderlig – ændringer giver en ny version).
+
+    Felter:
+        version (str): Id, fx "v0003" (tom før publish).
+        H (ndarray 3x3): Homografi pixel → robot (mm).
+        roi (tuple | None): (x1, y1, x2, y2).
+        mm_per_pixel (float): Global skala (fallback når H ikke bruges).
+        angles (dict): Vinkel-offsets i grader (se LEGACY_ANGLES).
+        hsv (dict): {navn: settings-dict} snapshot af HSV-settings
+                    ("parts" → qc_preprocess, "dots" → drift-monitoren).
+        created (float): Unix-tid.
+        note (str): Fri tekst (hvordan versionen blev lavet).
+        parent (str | None): Versionen den blev afledt af.
+    """
+    H: np.ndarray
+    roi: tuple | None = None
+    mm_per_pixel: float = LEGACY_MM_PER_PIXEL
+    angles: dict = field(default_factory=lambda: dict(LEGACY_ANGLES))
+    hsv: dict = field(default_factory=dict)
+    version: str = ""
+    created: float = 0.0
+    note: str = ""
+    parent: str | None = None
+
+    def with_changes(self, **changes) -> "Calibration":
+        """Kopi med ændrede felter – klar til publish som ny version."""
+        return replace(self, version="", created=0.0, parent=self.version or None, **changes)
+
+    def to_dict(self) -> dict:
+        return {
+            "schema": SCHEMA_VERSION,
+            "version": self.version,
+            "created": self.created,
+            "note": self.note,
+            "parent": self.parent,
+            "H": np.asarray(self.H, dtype=float).tolist(),
+            "roi": list(self.roi) if self.roi is not None else None,
+            "mm_per_pixel": self.mm_per_pixel,
+            "angles": self.angles,
+            "hsv": self.hsv,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Calibration":
+        if data.get("schema", SCHEMA_VERSION) != SCHEMA_VERSION:
+            raise ValueError(f"Ukendt kalibrerings-schema {data.get('schema')}")
+        return cls(
+            H=np.asarray(data["H"], dtype=float).reshape(3, 3),
+            roi=tuple(data["roi"]) if data.get("roi") else None,
+            mm_per_pixel=float(data.get("mm_per_pixel", LEGACY_MM_PER_PIXEL)),
+            angles=dict(LEGACY_ANGLES, **data.get("angles", {})),
+            hsv=data.get("hsv", {}),
+            version=data.get("version", ""),
+            created=float(data.get("created", 0.0)),
+            note=data.get("note", ""),
+            parent=data.get("parent"),
+        )
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class CalibrationStore:
+    """
+    Register over kalibrerings-versioner i én mappe.
+
+    Parametre:
+        root (Path): Mappen med vNNNN.json + CURRENT.
+
+    Metoder:
+        - versions(): alle version-id'er (sorteret)
+        - load(version): Calibration for en bestemt version
+        - current(): den aktive Calibration (None hvis registret er tomt)
+        - publish(calib, note, activate): gemmer som ny version
+        - activate(version): flytter CURRENT atomisk
+        - poll(): ny Calibration hvis CURRENT er ændret siden sidst
+    """
+
+    POINTER = "CURRENT"
+
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+        self._seen = None   # (mtime_ns, version) for poll()
+
+    # ------------------------------------------------------------
+    # Læsning
+    # ------------------------------------------------------------
+    def versions(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.stem for p in self.root.glob("v*.json"))
+
+    def load(self, version: str) -> Calibration:
+        with open(self.root / f"{version}.json", "r", encoding="utf-8") as f:
+            return Calibration.from_dict(json.load(f))
+
+    def current_version(self) -> str | None:
+        pointer = self.root / self.POINTER
+        if not pointer.exists():
+            return None
+        return pointer.read_text(encoding="utf-8").strip() or None
+
+    def current(self) -> Calibration | None:
+        version = self.current_version()
+        return self.load(version) if version else None
+
+    # ------------------------------------------------------------
+    # Skrivning
+    # ------------------------------------------------------------
+    def publish(self, calib: Calibration, note: str = "", activate: bool = True) -> Calibration:
+        """
+    Gemmer calib som næste version (vNNNN) og aktiverer den.
+
+    Returnerer:
+        Den gemte Calibration (med version/created udfyldt).
+    """
+        self.root.mkdir(parents=True, exist_ok=True)
+        existing = self.versions()
+        number = int(existing[-1][1:]) + 1 if existing else 1
+        saved = replace(calib, version=f"v{number:04d}", created=time.time(),
+                        note=note or calib.note)
+
+        _atomic_write(self.root / f"{saved.version}.json", json.dumps(saved.to_dict(), indent=2))
+        print(f"[CALIB STORE] Gemt {saved.version}: {saved.note}")
+
+        if activate:
+            self.activate(saved.version)
+        return saved
+
+    def activate(self, version: str) -> None:
+        if not (self.root / f"{version}.json").exists():
+            raise FileNotFoundError(f"Ukendt kalibrerings-version {version}")
+        _atomic_write(self.root / self.POINTER, version + "\n")
+        print(f"[CALIB STORE] Aktiv version → {version}")
+
+    # ------------------------------------------------------------
+    # Hot-swap
+    # ------------------------------------------------------------
+    def poll(self) -> Calibration | None:
+        """
+    Billigt tjek (én stat) af CURRENT-pointeren.
+
+    Returnerer:
+        Den nye aktive Calibration hvis pointeren er ændret siden sidste
+        kald, ellers None. Første kald returnerer den aktive version.
+    """
+        pointer = self.root / self.POINTER
+        try:
+            mtime = pointer.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if self._seen is not None and self._seen[0] == mtime:
+            return None
+
+        version = self.current_version()
+        if self._seen is not None and self._seen[1] == version:
+            self._seen = (mtime, version)
+            return None
+
+        self._seen = (mtime, version)
+        return self.load(version) if version else None
+
+    # ------------------------------------------------------------
+    # Migrering
+    # ------------------------------------------------------------
+    def bootstrap_legacy(self, h_path, hsv_files: dict | None = None) -> Calibration | None:
+        """
+    Opretter v0001 fra de gamle filer, hvis registret er tomt.
+
+    Parametre:
+        h_path (Path): calibration_h.npz der er i brug i dag.
+        hsv_files (dict): {navn: sti til settings-JSON} der snapshottes.
+
+    Returnerer:
+        Den aktive Calibration (ny eller eksisterende), eller None hvis
+        hverken register eller h_path findes.
+    """
+        if self.versions():
+            return self.current()
+        if not Path(h_path).exists():
+            return None
+
+        hsv = {}
+        for name, path in (hsv_files or {}).items():
+            if Path(path).exists():
+                with open(path, "r") as f:
+                    hsv[name] = json.load(f)
+
+        calib = Calibration(H=np.load(str(h_path))["H"], roi=LEGACY_ROI, hsv=hsv)
+        return self.publish(calib, note=f"migreret fra {Path(h_path).name}")
+
+
+# ======================================================
+# CLI: list / vis / aktivér (hot-swap i et kørende qc_main)
+# ======================================================
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Versioneret kalibrerings-register")
+    parser.add_argument("--root", type=Path, default=STORE_DIR)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="vis alle versioner")
+    show = sub.add_parser("show", help="vis én version (standard: aktiv)")
+    show.add_argument("version", nargs="?")
+    act = sub.add_parser("activate", help="gør en version aktiv (fx rollback)")
+    act.add_argument("version")
+    args = parser.parse_args(argv)
+
+    store = CalibrationStore(args.root)
+
+    if args.cmd == "list":
+        active = store.current_version()
+        for version in store.versions():
+            calib = store.load(version)
+            mark = "*" if version == active else " "
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(calib.created))
+            print(f"{mark} {version}  {stamp}  {calib.note}")
+
+    elif args.cmd == "show":
+        version = args.version or store.current_version()
+        if version is None:
+            print("[CALIB STORE] Registret er tomt")
+            return 1
+        print(json.dumps(store.load(version).to_dict(), indent=2))
+
+    elif args.cmd == "activate":
+        store.activate(args.version)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
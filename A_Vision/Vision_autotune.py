@@ -0,0 +1,321 @@
+"""
+Vision_autotune.py
+Headless auto-tuner til segmenterings-settings.
+
+Vision_settings.py / qc_vision_settings.py kræver at en person skubber
+trackbars og vurderer masken med øjnene. Denne tuner søger i stedet
+parameterrummet automatisk og scorer hver kandidat mod:
+
+- labellede masker i C_data/Sample_images:
+      frame_<ts>.png  +  mask_<ts>.png    (HSV-masken)
+                      +  thresh_<ts>.png  (threshold-output, valgfri)
+                      +  edges_<ts>.png   (Canny-output, valgfri)
+  dvs. præcis de PNG-serier tunerens 'p'-tast gemmer
+- og/eller forventet antal objekter pr. frame (--count / counts-JSON)
+
+Kun parametre der påvirker en tilgængelig label søges (HSV altid;
+blur/threshold hvis der er thresh-labels; blur/Canny hvis der er
+edges-labels). scale søges ikke – frames og labels gemmes allerede efter
+ROI og skalering (frame_small), så de bruges som de er.
+
+Søgningen er en simpel (μ+λ)-evolution: start i de nuværende settings,
+mutér med faldende skridtlængde og behold de bedste. Kandidaterne
+evalueres parallelt i en ProcessPoolExecutor; hver worker indlæser
+billederne og beregner HSV/gray én gang, så en kandidat kun koster
+inRange + de trin den faktisk ændrer.
+
+Resultatet skrives i samme JSON-skema som trackbar-tunerne gemmer.
+
+Brug (fra A_Vision/):
+    python Vision_autotune.py --settings ../E_tests/qc_calibration_settings.json
+    python Vision_autotune.py --settings calibration_settings.json --count 20 --in-place
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2 as cv
+import numpy as np
+
+IMAGE_DIR = Path(__file__).resolve().parents[1] / "C_data" / "Sample_images"
+
+# nøgle → (min, max, kun ulige)
+SPACE = {
+    "H_low": (0, 179, False), "H_high": (0, 179, False),
+    "S_low": (0, 255, False), "S_high": (0, 255, False),
+    "V_low": (0, 255, False), "V_high": (0, 255, False),
+    "blur_k": (1, 31, True),
+    "thresh_mode": (0, 2, False),
+    "global_thresh": (0, 255, False),
+    "block_size": (3, 51, True),
+    "C": (0, 20, False),
+    "canny_low": (0, 255, False),
+    "canny_high": (0, 255, False),
+}
+HSV_KEYS = ("H_low", "H_high", "S_low", "S_high", "V_low", "V_high")
+THRESH_KEYS = ("blur_k", "thresh_mode", "global_thresh", "block_size", "C")
+EDGE_KEYS = ("blur_k", "canny_low", "canny_high")
+
+DEFAULTS = {
+    "H_low": 0, "H_high": 179, "S_low": 0, "S_high": 255, "V_low": 0, "V_high": 255,
+    "blur_k": 5, "min_area": 200, "scale": 1.0,
+    "thresh_mode": 0, "global_thresh": 120, "block_size": 21, "C": 2,
+    "canny_low": 50, "canny_high": 150,
+}
+
+
+# ======================================================
+# SAMPLES
+# ======================================================
+def find_samples(directory=IMAGE_DIR) -> list[dict]:
+    """Alle frame_<ts>.png med mindst én label (mask/thresh/edges) i directory."""
+    directory = Path(directory)
+    samples = []
+    for frame_path in sorted(directory.glob("frame_*.png")):
+        ts = frame_path.stem[len("frame_"):]
+        labels = {kind: str(directory / f"{kind}_{ts}.png")
+                  for kind in ("mask", "thresh", "edges")
+                  if (directory / f"{kind}_{ts}.png").exists()}
+        if labels:
+            samples.append({"name": frame_path.name, "frame": str(frame_path), "labels": labels})
+    return samples
+
+
+class _Prepared:
+    """
+    Et sample med alt der ikke afhænger af kandidaten forudberegnet.
+
+    Framen er gemt efter ROI + scale, så den skaleres ikke igen (ellers
+    tunes blur/block_size på et dobbelt nedskaleret billede). Kun labels
+    med en anden shape tilpasses framen.
+    """
+
+    def __init__(self, sample: dict, count: int | None):
+        frame = cv.imread(sample["frame"])
+        if frame is None:
+            raise FileNotFoundError(sample["frame"])
+
+        self.name = sample["name"]
+        self.count = count
+        self.hsv = cv.cvtColor(frame, cv.COLOR_BGR2HSV)
+        self.gray = cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
+
+        self.labels = {}
+        h, w = self.gray.shape
+        for kind, path in sample["labels"].items():
+            lab = cv.imread(path, cv.IMREAD_GRAYSCALE)
+            if lab is None:
+                continue
+            if lab.shape != (h, w):
+                lab = cv.resize(lab, (w, h), interpolation=cv.INTER_NEAREST)
+            self.labels[kind] = lab > 127
+
+
+def render(cfg: dict, s: _Prepared, kinds) -> dict:
+    """
+    Samme trin som QCPreprocess – kun dem der skal bruges til kinds.
+
+    thresh laves ikke-inverteret ligesom i qc_vision_settings.py, der
+    gemmer thresh_<ts>.png (QCPreprocess bruger INV – samme parametre).
+    """
+    out = {}
+    lower = np.array([cfg["H_low"], cfg["S_low"], cfg["V_low"]], dtype=np.uint8)
+    upper = np.array([cfg["H_high"], cfg["S_high"], cfg["V_high"]], dtype=np.uint8)
+    mask = out["mask"] = cv.inRange(s.hsv, lower, upper)
+
+    if "thresh" in kinds or "edges" in kinds:
+        gray = cv.bitwise_and(s.gray, mask)
+        blur = cv.GaussianBlur(gray, (cfg["blur_k"], cfg["blur_k"]), 0)
+
+        if "thresh" in kinds:
+            if cfg["thresh_mode"] == 0:
+                _, out["thresh"] = cv.threshold(blur, cfg["global_thresh"], 255, cv.THRESH_BINARY)
+            else:
+                method = cv.ADAPTIVE_THRESH_MEAN_C if cfg["thresh_mode"] == 1 else cv.ADAPTIVE_THRESH_GAUSSIAN_C
+                out["thresh"] = cv.adaptiveThreshold(blur, 255, method, cv.THRESH_BINARY,
+                                                     cfg["block_size"], cfg["C"])
+        if "edges" in kinds:
+            out["edges"] = cv.Canny(blur, cfg["canny_low"], cfg["canny_high"])
+    return out
+
+
+def count_objects(mask, min_area: float) -> int:
+    contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+    return sum(1 for c in contours if cv.contourArea(c) >= min_area)
+
+
+def iou(pred, label) -> float:
+    pred = pred > 0
+    union = np.count_nonzero(pred | label)
+    return 1.0 if union == 0 else np.count_nonzero(pred & label) / union
+
+
+# ======================================================
+# WORKER
+# ======================================================
+_WORKER = {}
+
+
+def _init_worker(samples, counts, count_weight):
+    _WORKER["samples"] = [_Prepared(s, counts.get(s["name"])) for s in samples]
+    _WORKER["count_weight"] = count_weight
+
+
+def score(cfg: dict) -> tuple[float, dict]:
+    """
+    Score for én kandidat (højere er bedre, maks 1.0).
+
+    IoU mod hver label-type vægtes ens; afvigelse i objektantal trækker
+    count_weight · |fundet − forventet| / forventet fra.
+    """
+    ious, count_err = [], []
+    for s in _WORKER["samples"]:
+        kinds = tuple(s.labels)
+        out = render(cfg, s, kinds)
+        ious.extend(iou(out[k], s.labels[k]) for k in kinds)
+        if s.count:
+            n = count_objects(out["mask"], cfg.get("min_area", 0))
+            count_err.append(abs(n - s.count) / s.count)
+
+    mean_iou = float(np.mean(ious)) if ious else 1.0
+    mean_count = float(np.mean(count_err)) if count_err else 0.0
+    total = mean_iou - _WORKER["count_weight"] * mean_count
+    return total, {"iou": mean_iou, "count_error": mean_count}
+
+
+# ======================================================
+# SØGNING
+# ======================================================
+def _fix(cfg: dict) -> dict:
+    """Håndhæver gyldige værdier (ulige kerner, low ≤ high)."""
+    for key, (lo, hi, odd) in SPACE.items():
+        v = int(np.clip(round(cfg[key]), lo, hi))
+        if odd and v % 2 == 0:
+            v = v + 1 if v < hi else v - 1
+        cfg[key] = v
+    for a, b in (("H_low", "H_high"), ("S_low", "S_high"), ("V_low", "V_high")):
+        if cfg[a] > cfg[b]:
+            cfg[a], cfg[b] = cfg[b], cfg[a]
+    if cfg["canny_high"] <= cfg["canny_low"]:
+        cfg["canny_high"] = min(255, cfg["canny_low"] + 1)
+    return cfg
+
+
+def mutate(cfg: dict, keys, step: float, rng: random.Random) -> dict:
+    new = dict(cfg)
+    # muter et par nøgler ad gangen – små, lokale skridt
+    for key in rng.sample(keys, k=max(1, min(len(keys), rng.randint(1, 3)))):
+        lo, hi, _ = SPACE[key]
+        new[key] = cfg[key] + rng.gauss(0.0, step * (hi - lo))
+    return _fix(new)
+
+
+def autotune(start: dict, samples: list[dict], counts: dict | None = None,
+             generations: int = 20, population: int = 32, keep: int = 4,
+             count_weight: float = 0.5, workers: int | None = None, seed: int = 0) -> tuple[dict, dict]:
+    """
+    Kører søgningen.
+
+    Parametre:
+        start (dict): Settings at starte fra (samme skema som JSON-filen).
+        samples (list): Fra find_samples().
+        counts (dict): {frame-filnavn: forventet antal objekter}.
+        generations, population, keep (int): Søgningens størrelse.
+        count_weight (float): Vægt på objektantal-fejl.
+        workers (int | None): Antal processer (None = alle kerner).
+
+    Returnerer:
+        (bedste settings, {"score", "iou", "count_error", "evaluated"})
+    """
+    counts = counts or {}
+    if not samples and not counts:
+        raise ValueError("Ingen labellede billeder eller forventede antal at score imod")
+
+    kinds = {k for s in samples for k in s["labels"]}
+    keys = list(HSV_KEYS)
+    if "thresh" in kinds:
+        keys += [k for k in THRESH_KEYS if k not in keys]
+    if "edges" in kinds:
+        keys += [k for k in EDGE_KEYS if k not in keys]
+
+    rng = random.Random(seed)
+    best = [_fix(dict(DEFAULTS, **start))]
+    evaluated = 0
+    t0 = time.perf_counter()
+
+    print(f"[AUTOTUNE] {len(samples)} billeder, labels: {sorted(kinds) or '-'}, søger: {keys}")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(samples, counts, count_weight)) as pool:
+        scored = list(zip(pool.map(score, best), best))
+        evaluated += len(best)
+
+        for gen in range(generations):
+            step = 0.15 * (1.0 - gen / generations) + 0.01
+            parents = [cfg for _, cfg in scored[:keep]]
+            children = [mutate(rng.choice(parents), keys, step, rng) for _ in range(population)]
+
+            results = list(pool.map(score, children))
+            evaluated += len(children)
+
+            scored = sorted(scored + list(zip(results, children)), key=lambda x: -x[0][0])[:keep]
+            (top, info), _ = scored[0]
+            print(f"[AUTOTUNE] gen {gen + 1:2d}/{generations}  score {top:.4f}  "
+                  f"IoU {info['iou']:.4f}  count-err {info['count_error']:.3f}")
+
+    (top, info), cfg = scored[0]
+    print(f"[AUTOTUNE] {evaluated} kandidater på {time.perf_counter() - t0:.1f} s")
+    return cfg, dict(info, score=top, evaluated=evaluated)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Headless tuning af segmenterings-settings")
+    parser.add_argument("--settings", type=Path, required=True, help="settings-JSON at starte fra")
+    parser.add_argument("--images", type=Path, default=IMAGE_DIR, help="mappe med frame_/mask_-PNG'er")
+    parser.add_argument("--count", type=int, help="forventet antal objekter i alle frames")
+    parser.add_argument("--counts", type=Path, help="JSON {frame-filnavn: antal}")
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--population", type=int, default=32)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help="output-JSON (standard: <settings>_autotuned.json)")
+    parser.add_argument("--in-place", action="store_true", help="overskriv --settings")
+    args = parser.parse_args(argv)
+
+    with open(args.settings, "r") as f:
+        start = json.load(f)
+
+    samples = find_samples(args.images)
+    counts = {}
+    if args.counts:
+        with open(args.counts, "r") as f:
+            counts = json.load(f)
+    if args.count:
+        # også frames uden maske-labels kan bruges til antal
+        names = {s["name"] for s in samples}
+        for frame_path in sorted(Path(args.images).glob("frame_*.png")):
+            counts.setdefault(frame_path.name, args.count)
+            if frame_path.name not in names:
+                samples.append({"name": frame_path.name, "frame": str(frame_path), "labels": {}})
+
+    best, info = autotune(start, samples, counts, args.generations, args.population,
+                          workers=args.workers, seed=args.seed)
+
+    # samme skema som trackbar-tunerne – ukendte nøgler fra input bevares
+    result = dict(start, **{k: best[k] for k in SPACE})
+
+    out = args.settings if args.in_place else (
+        args.out or args.settings.with_name(args.settings.stem + "_autotuned.json"))
+    with open(out, "w") as f:
+        json.dump(result, f, indent=4)
+    print(f"[SAVED] {out}  (score {info['score']:.4f}, IoU {info['iou']:.4f})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
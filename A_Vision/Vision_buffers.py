@@ -0,0 +1,59 @@
+"""
+Vision_buffers.py
+Genbrugelige, forhåndsallokerede billedbuffere til frame-pipelinen.
+
+Hvert frame i 1080p allokerer ellers nye HSV-, mask-, gray-, blur-,
+thresh- og edges-arrays. Allokator- og GC-arbejdet viser sig som
+latens-spikes, så pipelinen skriver i stedet sine OpenCV-output direkte
+i buffere fra en pulje (dst=...).
+
+Bufferne overskrives ved næste kald med samme navn – et resultat der skal
+gemmes ud over det aktuelle frame, skal kopieres.
+"""
+import numpy as np
+
+
+class BufferPool:
+    """
+    Pulje af arrays nøglet på (navn, shape, dtype).
+
+    Navnet adskiller buffere med samme shape i samme trin (fx "hsv" og
+    "debug" som begge er H×W×3 uint8). Skifter opløsningen, oprettes en
+    ny buffer; den gamle ryddes når puljen har mere end max_buffers.
+
+    Metoder:
+        - get(name, shape, dtype): buffer (uinitialiseret indhold)
+        - like(name, arr): buffer med samme shape/dtype som arr
+        - clear(): frigiver alle buffere
+        - nbytes: samlet størrelse
+    """
+
+    def __init__(self, max_buffers: int = 64):
+        self.max_buffers = max_buffers
+        self._buffers: dict[tuple, np.ndarray] = {}
+
+    def get(self, name: str, shape, dtype=np.uint8) -> np.ndarray:
+        key = (name, tuple(shape), np.dtype(dtype).str)
+        buf = self._buffers.get(key)
+        if buf is None:
+            if len(self._buffers) >= self.max_buffers:
+                self._buffers.clear()   # opløsningsskift – start forfra
+            buf = self._buffers[key] = np.empty(shape, dtype=dtype)
+        return buf
+
+    def like(self, name: str, arr: np.ndarray) -> np.ndarray:
+        return self.get(name, arr.shape, arr.dtype)
+
+    def clear(self) -> None:
+        self._buffers.clear()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(b.nbytes for b in self._buffers.values())
+
+
+def take(pool, name: str, shape, dtype=np.uint8) -> np.ndarray:
+    """Buffer fra pool – eller et nyt array hvis pool er None."""
+    if pool is None:
+        return np.empty(shape, dtype=dtype)
+    return pool.get(name, shape, dtype)
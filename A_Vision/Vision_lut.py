@@ -0,0 +1,170 @@
+"""
+Vision_lut.py
+BGR → klasse opslagstabel (LUT) til farvesegmentering.
+
+QCPreprocess, generate_mask_from_settings og main.py konverterer hele
+framen til HSV for at køre ét box-inRange. En HSV-boks er en fast
+funktion af BGR-farven, så resultatet kan forudberegnes for alle farver
+én gang og derefter slås op pr. pixel – uden farvekonvertering.
+
+Tabellen bygges ved at køre alle (kvantiserede) BGR-farver gennem
+cvtColor + inRange, så opslaget bruger præcis OpenCV's egen HSV-
+konvertering:
+
+    bits=8   24-bit tabel (16 MB), eksakt samme maske som cvtColor+inRange
+    bits=6   18-bit tabel (256 kB), farven i bin-centret afgør hele binnen
+             (afviger kun i kanten af boksen – cache-venlig)
+
+Flere klasser (fx emne, kalibreringsprik) kan ligge i samme tabel; hver
+pixel får label 1..n for første boks den rammer, 0 = baggrund.
+
+Brug:
+    lut = box_lut(lower, upper)             # cachet pr. grænser
+    mask = lut.mask(frame)                  # 0/255 som inRange
+
+    lut = ColorLUT({"part": (lo1, hi1), "dot": (lo2, hi2)})
+    labels = lut.labels(frame)
+    dots = lut.mask(frame, "dot")
+"""
+import cv2 as cv
+import numpy as np
+
+try:
+    from A_Vision.Vision_buffers import take
+except ImportError:
+    from Vision_buffers import take
+
+
+class ColorLUT:
+    """
+    Opslagstabel fra BGR-farve til klasse-label.
+
+    Parametre:
+        boxes (dict): {navn: (lower_hsv, upper_hsv)} – rækkefølgen er
+                      prioriteten når bokse overlapper.
+        bits (int): Bits pr. kanal (1..8). 8 = eksakt, 6 = 18-bit tabel.
+
+    Metoder:
+        - labels(bgr, pool): label-billede (0 = baggrund, 1..n = klasse)
+        - mask(bgr, name, pool, dst): 0/255-maske for én klasse
+    """
+
+    def __init__(self, boxes: dict, bits: int = 8):
+        if not 1 <= bits <= 8:
+            raise ValueError(f"bits skal være 1..8, fik {bits}")
+        if not boxes:
+            raise ValueError("Mindst én HSV-boks kræves")
+
+        self.bits = bits
+        self.names = tuple(boxes)
+        self.boxes = {name: (np.asarray(lo, dtype=np.uint8), np.asarray(hi, dtype=np.uint8))
+                      for name, (lo, hi) in boxes.items()}
+
+        # én klasse: tabellen indeholder maskeværdien direkte (0/255)
+        self.single = len(self.names) == 1
+        self.table = self._build()
+
+    # ------------------------------------------------------------
+    # Opbygning
+    # ------------------------------------------------------------
+    def _build(self) -> np.ndarray:
+        n = 1 << self.bits
+        shift = 8 - self.bits
+        # repræsentativ farve pr. bin: bin-centret (eksakt værdi når bits=8)
+        levels = ((np.arange(n, dtype=np.uint16) << shift) + ((1 << shift) >> 1)).astype(np.uint8)
+
+        # række = (b, g), kolonne = r  →  index = b·n² + g·n + r
+        img = np.empty((n * n, n, 3), dtype=np.uint8)
+        img[..., 0] = np.repeat(levels, n)[:, None]
+        img[..., 1] = np.tile(levels, n)[:, None]
+        img[..., 2] = levels[None, :]
+        hsv = cv.cvtColor(img, cv.COLOR_BGR2HSV)
+
+        table = np.zeros(n * n * n, dtype=np.uint8)
+        for label, name in enumerate(self.names, start=1):
+            lo, hi = self.boxes[name]
+            hit = cv.inRange(hsv, lo, hi).reshape(-1) > 0
+            free = table == 0
+            table[hit & free] = 255 if self.single else label
+        return table
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+    # ------------------------------------------------------------
+    # Opslag
+    # ------------------------------------------------------------
+    def _index(self, bgr, pool=None) -> np.ndarray:
+        h, w = bgr.shape[:2]
+        shift = 8 - self.bits
+        idx = take(pool, "lut_idx", (h, w), np.uint32)
+        tmp = take(pool, "lut_tmp", (h, w), np.uint32)
+
+        if shift == 0:
+            np.left_shift(bgr[..., 0], 16, out=idx, dtype=np.uint32)
+            np.left_shift(bgr[..., 1], 8, out=tmp, dtype=np.uint32)
+            np.bitwise_or(idx, tmp, out=idx)
+            np.bitwise_or(idx, bgr[..., 2], out=idx)
+        else:
+            b2 = 2 * self.bits
+            np.right_shift(bgr[..., 0], shift, out=idx, dtype=np.uint32)
+            np.left_shift(idx, b2, out=idx)
+            np.right_shift(bgr[..., 1], shift, out=tmp, dtype=np.uint32)
+            np.left_shift(tmp, self.bits, out=tmp)
+            np.bitwise_or(idx, tmp, out=idx)
+            np.right_shift(bgr[..., 2], shift, out=tmp, dtype=np.uint32)
+            np.bitwise_or(idx, tmp, out=idx)
+        return idx
+
+    def labels(self, bgr, pool=None) -> np.ndarray:
+        """Label pr. pixel (uint8). Ved én klasse er værdien 255 i stedet for 1."""
+        out = take(pool, "lut_labels", bgr.shape[:2])
+        # mode="clip": idx er altid < len(table), og "raise" ville buffre out
+        # (en ekstra frame-stor allokering pr. kald)
+        np.take(self.table, self._index(bgr, pool), out=out, mode="clip")
+        return out
+
+    def mask(self, bgr, name=None, pool=None, dst=None) -> np.ndarray:
+        """
+    0/255-maske for klassen name (standard: første klasse) – samme
+    output som cv.inRange på HSV-billedet.
+    """
+        if dst is None:
+            dst = take(pool, "lut_mask", bgr.shape[:2])
+        idx = self._index(bgr, pool)
+
+        if self.single:
+            np.take(self.table, idx, out=dst, mode="clip")
+            return dst
+
+        label = 1 if name is None else self.names.index(name) + 1
+        labels = take(pool, "lut_labels", bgr.shape[:2])
+        np.take(self.table, idx, out=labels, mode="clip")
+        cv.inRange(labels, label, label, dst=dst)
+        return dst
+
+
+# ------------------------------------------------------------
+# Cache – tabellen bygges kun når grænserne ændres
+# ------------------------------------------------------------
+_CACHE: dict[tuple, ColorLUT] = {}
+_CACHE_MAX = 4
+
+
+def box_lut(lower, upper, bits: int = 8) -> ColorLUT:
+    """En-klasse LUT for HSV-boksen – genbruges så længe grænserne er de samme."""
+    key = (tuple(int(v) for v in lower), tuple(int(v) for v in upper), bits)
+    lut = _CACHE.get(key)
+    if lut is None:
+        if len(_CACHE) >= _CACHE_MAX:
+            _CACHE.pop(next(iter(_CACHE)))   # ældste ud
+        lut = _CACHE[key] = ColorLUT({"mask": (lower, upper)}, bits)
+    return lut
+
+
+def lut_from_settings(cfg: dict, bits: int = 8) -> ColorLUT:
+    """box_lut fra en settings-JSON (H/S/V_low/high)."""
+    lower = (cfg["H_low"], cfg["S_low"], cfg["V_low"])
+    upper = (cfg["H_high"], cfg["S_high"], cfg["V_high"])
+    return box_lut(lower, upper, bits)
@@ -0,0 +1,218 @@
+"""
+Vision_pose.py
+Samlet vinkelmodel: billed-orientering → robot-værktøjsvinkel.
+
+Vinkelkorrektionen lå før spredt og uens:
+    qc_main / bench   (pca_angle + 151.55) % 180
+    main.py           minAreaRect + 26.76 / 63.24 + 90° værktøjs-offset
+Alle er en fast konstant lagt til en billedvinkel. Det passer kun hvor
+kameraet står vinkelret over emnet – homografien roterer og skævvrider
+retninger forskelligt hen over feltet.
+
+Modellen her:
+    1. billed-orientering φ af emnets lange akse (andenordens-momenter)
+    2. retningen (cos φ, sin φ) mappes gennem homografiens lokale
+       Jacobian J(p) i emnets centrum → vinkel θ i robottens XY-plan
+    3. værktøjsvinkel = sign · θ + offset   (sign = -1 for et nedadvendt
+       værktøj, hvis rz drejer modsat basens Z; offset kalibreres)
+    4. griberen er symmetrisk (0° ≡ 180°), så vinklen foldes ind i
+       [ref - 90, ref + 90) – højst 90° håndleds-rotation fra ref
+       (wrist_home_deg eller forrige pluk)
+
+Alt er vektoriseret over emnerne i et frame.
+
+Kalibrerings-nøgler (Calibration.angles i Calibration_store):
+    pose_offset_deg   værktøjs-offset (mangler den, afledes den fra
+                      kalderens gamle konstant, så et emne i kalderens
+                      anker-pixel får præcis samme vinkel som før)
+    pose_sign         +1 / -1 (standard -1)
+    wrist_home_deg    håndleddets hvilevinkel (standard 90 → [0, 180))
+
+Modulet importerer ingen andre A_Vision-moduler, så det virker både som
+A_Vision.Vision_pose og fladt fra A_Vision/.
+"""
+import cv2 as cv
+import numpy as np
+
+DEFAULT_SIGN = -1.0
+DEFAULT_HOME_DEG = 90.0
+
+
+def rect_legacy_offset(angles: dict) -> float:
+    """
+    main.py's gamle minAreaRect-regel som én konstant på den lange akse.
+
+    (θ - 26.76 når h er lang, θ + 63.24 ellers, + 90° værktøj) er i begge
+    grene lang-akse-vinkel + 63.24 + 90 = + 153.24 (mod 180).
+    """
+    return float((angles["rect_short_offset_deg"] + angles["tool_offset_deg"]) % 180.0)
+
+
+# ======================================================
+# BILLED-ORIENTERING
+# ======================================================
+def contour_angles(contours) -> np.ndarray:
+    """
+    Orientering af den lange akse for hver kontur, i grader [0, 180).
+
+    Samme konvention som Angle_utility.pca_angle (0° = billed-x, 90° =
+    billed-y nedad), men fra arealets andenordens-momenter – uafhængigt
+    af hvor tæt konturpunkterne ligger.
+
+    Returnerer:
+        ndarray (n,) float64.
+    """
+    n = len(contours)
+    mu = np.empty((n, 3), dtype=np.float64)
+    for i, cnt in enumerate(contours):
+        M = cv.moments(cnt)
+        mu[i] = M["mu20"], M["mu02"], M["mu11"]
+
+    phi = 0.5 * np.arctan2(2.0 * mu[:, 2], mu[:, 0] - mu[:, 1])
+    return np.degrees(phi) % 180.0
+
+
+def fold_angles(angles, ref) -> np.ndarray:
+    """
+    Folder vinkler med 180°-symmetri ind i [ref - 90, ref + 90).
+
+    ref kan være en skalar eller én reference pr. vinkel.
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    ref = np.asarray(ref, dtype=np.float64)
+    return ref + (angles - ref + 90.0) % 180.0 - 90.0
+
+
+# ======================================================
+# HOMOGRAFI
+# ======================================================
+def map_points(H, points) -> np.ndarray:
+    """Pixel (n, 2) → robot-mm (n, 2) i ét matrix-produkt."""
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    dst = pts @ H[:, :2].T + H[:, 2]
+    return dst[:, :2] / dst[:, 2:3]
+
+
+def local_jacobians(H, points) -> np.ndarray:
+    """
+    Homografiens Jacobian d(X, Y)/d(x, y) i hvert punkt.
+
+    Returnerer:
+        ndarray (n, 2, 2).
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    dst = pts @ H[:, :2].T + H[:, 2]
+    w = dst[:, 2]
+    XY = dst[:, :2] / w[:, None]
+
+    # d(u/w)/dx = (h_u,x - (u/w) · h_w,x) / w
+    J = (H[None, :2, :2] - XY[:, :, None] * H[None, 2:3, :2]) / w[:, None, None]
+    return J
+
+
+# ======================================================
+# MODEL
+# ======================================================
+class PoseModel:
+    """
+    Billed-orientering + position → robot-XY og værktøjsvinkel.
+
+    Parametre:
+        H (ndarray 3x3): Homografi pixel → robot (mm).
+        offset_deg (float): Kalibreret værktøjs-offset.
+        sign (float): +1 / -1 – omløbsretning for værktøjets rotation.
+        home_deg (float): Håndleddets hvilevinkel (reference for folding).
+
+    Metoder:
+        - from_calibration(calib, anchor_px, legacy_offset_deg): model fra
+          en Calibration-version
+        - robot_angles(points, image_angles): emnets akse i robot-XY
+        - tool_angles(points, image_angles, ref_deg): værktøjsvinkler
+        - poses(points, image_angles): (robot_xy, værktøjsvinkler)
+        - fit_offset(points, image_angles, tool_angles): kalibrér offset
+    """
+
+    def __init__(self, H, offset_deg: float, sign: float = DEFAULT_SIGN,
+                 home_deg: float = DEFAULT_HOME_DEG):
+        self.H = np.asarray(H, dtype=np.float64)
+        self.offset_deg = float(offset_deg)
+        self.sign = float(sign)
+        self.home_deg = float(home_deg)
+
+    @classmethod
+    def from_calibration(cls, calib, anchor_px, legacy_offset_deg=None) -> "PoseModel":
+        """
+    Model fra en Calibration (Calibration_store).
+
+    Parametre:
+        anchor_px (tuple): Pixel i KALDERENS pixelrum (samme koordinater som
+            der senere gives til poses()/tool_angles()), fx frame-centret.
+        legacy_offset_deg (float | None): Kalderens gamle konstant
+            (lang-akse-vinkel + offset). None = pca_offset_deg (qc_main).
+
+    Uden et kalibreret pose_offset_deg vælges offset, så et vandret emne
+    (billedvinkel 0°) i anchor_px får præcis den vinkel den gamle formel
+    gav. Væk fra ankeret korrigerer Jacobian'en for perspektivet.
+    """
+        angles = calib.angles
+        sign = float(angles.get("pose_sign", DEFAULT_SIGN))
+        home = float(angles.get("wrist_home_deg", DEFAULT_HOME_DEG))
+
+        if "pose_offset_deg" in angles:
+            return cls(calib.H, angles["pose_offset_deg"], sign, home)
+
+        if legacy_offset_deg is None:
+            legacy_offset_deg = angles["pca_offset_deg"]
+
+        model = cls(calib.H, 0.0, sign, home)
+        theta0 = model.robot_angles([anchor_px], [0.0])[0]
+        model.offset_deg = float((legacy_offset_deg - sign * theta0) % 180.0)
+        return model
+
+    # ------------------------------------------------------------
+    # Vinkler
+    # ------------------------------------------------------------
+    def robot_angles(self, points, image_angles) -> np.ndarray:
+        """Emnets lange akse i robottens XY-plan, grader [0, 180)."""
+        phi = np.radians(np.asarray(image_angles, dtype=np.float64))
+        d = np.stack([np.cos(phi), np.sin(phi)], axis=1)
+        r = np.einsum("nij,nj->ni", local_jacobians(self.H, points), d)
+        return np.degrees(np.arctan2(r[:, 1], r[:, 0])) % 180.0
+
+    def tool_angles(self, points, image_angles, ref_deg=None) -> np.ndarray:
+        """
+    Værktøjsvinkel pr. emne med mindst mulig håndleds-rotation.
+
+    Parametre:
+        ref_deg (float | ndarray | None): Reference at folde mod – fx
+            forrige pluks vinkel. None = home_deg (→ [0, 180) ved 90°).
+    """
+        raw = self.sign * self.robot_angles(points, image_angles) + self.offset_deg
+        return fold_angles(raw, self.home_deg if ref_deg is None else ref_deg)
+
+    def poses(self, points, image_angles, ref_deg=None):
+        """
+    Returnerer:
+        (robot_xy (n, 2) i mm, værktøjsvinkler (n,) i grader)
+    """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(points) == 0:
+            return np.empty((0, 2)), np.empty(0)
+        return map_points(self.H, points), self.tool_angles(points, image_angles, ref_deg)
+
+    # ------------------------------------------------------------
+    # Kalibrering
+    # ------------------------------------------------------------
+    def fit_offset(self, points, image_angles, tool_angles) -> float:
+        """
+    Fitter offset_deg fra emner hvor den rigtige værktøjsvinkel er kendt
+    (fx jogget ind manuelt). Cirkulært middel med 180°-periode.
+
+    Returnerer:
+        Det nye offset (sættes også på modellen).
+    """
+        raw = self.sign * self.robot_angles(points, image_angles)
+        diff = np.radians(2.0 * (np.asarray(tool_angles, dtype=np.float64) - raw))
+        mean = np.degrees(np.arctan2(np.sin(diff).mean(), np.cos(diff).mean())) / 2.0
+        self.offset_deg = float(mean % 180.0)
+        return self.offset_deg
@@ -0,0 +1,113 @@
+# Vision_pose_test.py
+# Kør fra A_Vision/: python Vision_pose_test.py (eller pytest)
+import cv2 as cv
+import numpy as np
+
+from Calibration_store import LEGACY_ANGLES, LEGACY_ROI, Calibration
+from Vision_pose import PoseModel, contour_angles, rect_legacy_offset
+
+FRAME_W, FRAME_H = 640, 400
+
+# spejlet (robot-Y op, billed-y ned), let roteret og med lidt perspektiv
+H_PROJECTIVE = np.array([
+    [0.98, 0.06, -120.0],
+    [0.05, -1.02, 470.0],
+    [2e-5, -3e-5, 1.0],
+])
+# ren spejling + rotation + skala: Jacobian'en er ens overalt
+t = np.radians(4.0)
+H_SIMILAR = np.array([
+    [1.1 * np.cos(t), 1.1 * np.sin(t), -120.0],
+    [1.1 * np.sin(t), -1.1 * np.cos(t), 470.0],
+    [0.0, 0.0, 1.0],
+])
+
+
+def old_main_angle(rect) -> float:
+    """main.py's regel før Vision_pose (minAreaRect + tærskel-swap + offsets)."""
+    (_, (w, h), angle) = rect
+    angle = angle % 180
+    if w > 40:
+        w, h = h, w
+        angle = (angle + 90) % 180
+    if h > w:
+        object_angle = (angle - 26.76) % 180
+    else:
+        object_angle = (angle + 63.24) % 180
+    return (object_angle + 90) % 180
+
+
+def main_model(H):
+    x1, y1, x2, y2 = LEGACY_ROI
+    anchor = (FRAME_W - (x1 + x2) / 2.0, FRAME_H - (y1 + y2) / 2.0)
+    calib = Calibration(H=H, roi=LEGACY_ROI)
+    model = PoseModel.from_calibration(calib, anchor_px=anchor,
+                                       legacy_offset_deg=rect_legacy_offset(calib.angles))
+    return model, anchor
+
+
+def angle_diff(a, b):
+    d = abs(a - b) % 180.0
+    return min(d, 180.0 - d)
+
+
+def test_rect_legacy_offset():
+    assert abs(rect_legacy_offset(LEGACY_ANGLES) - 153.24) < 1e-9
+
+
+def test_contour_angles_follow_long_side():
+    for theta in (0.0, 17.0, 45.0, 89.0, 133.0):
+        box = cv.boxPoints(((300.0, 200.0), (120.0, 30.0), theta)).astype(np.float32)
+        assert angle_diff(contour_angles([box])[0], theta) < 0.5
+
+
+def test_old_main_angle_reproduced_at_anchor():
+    model, anchor = main_model(H_PROJECTIVE)
+    for theta in (10.0, 30.0, 60.0, 80.0):
+        for size in ((120.0, 30.0), (30.0, 120.0)):
+            rect = (anchor, size, theta)
+            box = cv.boxPoints(rect).astype(np.float32)
+            # kun et vandret emne er låst præcist i ankeret; ellers drejer
+            # perspektivet vinklen en smule – sammenlign ved φ = 0
+            phi = contour_angles([box])[0]
+            old = old_main_angle(rect)
+            new = model.tool_angles([anchor], [phi])[0]
+            offset_old = (old - phi) % 180.0
+            offset_new = (new - phi) % 180.0
+            assert angle_diff(offset_old, 153.24) < 0.5
+            assert angle_diff(offset_new, offset_old) < 2.0
+
+    # vandret emne præcist i ankeret
+    new0 = model.tool_angles([anchor], [0.0])[0]
+    assert angle_diff(new0, 153.24) < 1e-6
+
+
+def test_old_main_angle_reproduced_everywhere_without_perspective():
+    model, _ = main_model(H_SIMILAR)
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        c = (rng.uniform(50, 590), rng.uniform(50, 350))
+        rect = (c, (120.0, 30.0), rng.uniform(1.0, 89.0))
+        box = cv.boxPoints(rect).astype(np.float32)
+        phi = contour_angles([box])[0]
+        new = model.tool_angles([c], [phi])[0]
+        assert angle_diff(new, old_main_angle(rect)) < 0.5
+
+
+def test_qc_anchor_reproduces_pca_offset():
+    anchor = (960.0, 540.0)
+    model = PoseModel.from_calibration(Calibration(H=H_PROJECTIVE), anchor_px=anchor)
+    assert angle_diff(model.tool_angles([anchor], [0.0])[0], LEGACY_ANGLES["pca_offset_deg"]) < 1e-6
+
+
+def test_tool_angles_fold_to_home_range():
+    model, anchor = main_model(H_SIMILAR)
+    out = model.tool_angles([anchor] * 180, np.arange(180.0))
+    assert np.all((out >= 0.0) & (out < 180.0))
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"[OK] {name}")
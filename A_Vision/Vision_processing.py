@@ -1,7 +1,14 @@
 import cv2 as cv
-import numpy as np
 
-def generate_mask_from_settings(frame, cfg):
+try:
+    from A_Vision.Vision_buffers import take
+    from A_Vision.Vision_lut import lut_from_settings
+except ImportError:
+    from Vision_buffers import take
+    from Vision_lut import lut_from_settings
+
+
+def generate_mask_from_settings(frame, cfg, pool=None):
     """
     Recreates the EXACT same mask pipeline as the calibration tool.
     Uses:
@@ -11,54 +18,67 @@ def generate_mask_from_settings(frame, cfg):
       - thresh_mode (global / adaptive mean / adaptive gaussian)
       - block_size
       - C
+    pool:
+      Optional BufferPool (A_Vision/Vision_buffers.py). All intermediate
+      images are written into its buffers via dst=, so a steady stream of
+      same-sized frames does no large allocations. The returned mask is
+      then a pool buffer that is overwritten by the next call.
     Returns:
         Binary mask (uint8, 0/255)
     """
 
     scale = cfg.get("scale", 1.0)
     h, w = frame.shape[:2]
-    frame_small = cv.resize(frame, (int(w * scale), int(h * scale)))
-
-    # HSV mask
-    hsv = cv.cvtColor(frame_small, cv.COLOR_BGR2HSV)
-    lower = np.array([cfg["H_low"], cfg["S_low"], cfg["V_low"]], dtype=np.uint8)
-    upper = np.array([cfg["H_high"], cfg["S_high"], cfg["V_high"]], dtype=np.uint8)
-    mask_hsv = cv.inRange(hsv, lower, upper)
+    if scale != 1.0:
+        size = (int(w * scale), int(h * scale))
+        frame_small = cv.resize(frame, size, dst=take(pool, "gm_small", (size[1], size[0], 3)))
+    else:
+        frame_small = frame   # resize til samme størrelse er bare en kopi
+    sh, sw = frame_small.shape[:2]
 
-    masked = cv.bitwise_and(frame_small, frame_small, mask=mask_hsv)
+    # HSV mask – opslag i forudberegnet BGR-tabel (Vision_lut.py), giver
+    # samme maske som cvtColor(HSV) + inRange uden farvekonvertering
+    lut = lut_from_settings(cfg)
+    mask_hsv = lut.mask(frame_small, pool=pool, dst=take(pool, "gm_mask", (sh, sw)))
 
     # Gray + Blur
-    gray = cv.cvtColor(masked, cv.COLOR_BGR2GRAY)
+    # gray(frame AND mask) == gray(frame) AND mask, da masken er 0/255 –
+    # spejler bitwise_and på 3 kanaler uden det maskerede farvebillede
+    gray = cv.cvtColor(frame_small, cv.COLOR_BGR2GRAY, dst=take(pool, "gm_gray", (sh, sw)))
+    cv.bitwise_and(gray, mask_hsv, dst=gray)
 
     blur_k = cfg["blur_k"]
     if blur_k < 1: blur_k = 1
     if blur_k % 2 == 0: blur_k += 1
-    blur = cv.GaussianBlur(gray, (blur_k, blur_k), 0)
+    blur = cv.GaussianBlur(gray, (blur_k, blur_k), 0, dst=take(pool, "gm_blur", (sh, sw)))
 
     mode = cfg["thresh_mode"]
+    thres = take(pool, "gm_thresh", (sh, sw))
 
     if mode == 0:
         # global threshold (INVERTED because calibration uses INV)
-        _, thres = cv.threshold(blur, cfg["global_thresh"], 255, cv.THRESH_BINARY_INV)
+        cv.threshold(blur, cfg["global_thresh"], 255, cv.THRESH_BINARY_INV, dst=thres)
 
     elif mode == 1:
         # adaptive mean
-        thres = cv.adaptiveThreshold(
+        cv.adaptiveThreshold(
             blur, 255,
             cv.ADAPTIVE_THRESH_MEAN_C,
             cv.THRESH_BINARY_INV,
             cfg["block_size"],
-            cfg["C"]
+            cfg["C"],
+            dst=thres
         )
 
     else:
         # adaptive gaussian
-        thres = cv.adaptiveThreshold(
+        cv.adaptiveThreshold(
             blur, 255,
             cv.ADAPTIVE_THRESH_GAUSSIAN_C,
             cv.THRESH_BINARY_INV,
             cfg["block_size"],
-            cfg["C"]
+            cfg["C"],
+            dst=thres
         )
 
     return thres
@@ -0,0 +1,230 @@
+"""
+Vision_segment.py
+Fused segmentation: HSV-threshold + morphologi i den billigste ækvivalente
+rækkefølge.
+
+Referencekæden (main.py):
+    cvtColor(HSV) → ROI → GaussianBlur → inRange → OPEN ×2 → CLOSE ×2
+    → GaussianBlur → Canny → dilate
+
+SegmentPipeline bygger et antal kandidat-kæder der giver samme maske,
+validerer dem mod referencen (bit-for-bit eller IoU ≥ min_iou) på rigtige
+frames og vælger den hurtigste der består.
+
+Ækvivalenser der bruges:
+- ROI beskæres FØR cvtColor (pixelvis operation → identisk resultat)
+- GaussianBlur med k <= 1 er identitet og springes over
+- n iterationer med et k×k rektangel = én iteration med et
+  (n·(k-1)+1)-rektangel (Minkowski-sum af rektangler, eksakt)
+- Uden blur i HSV kan HSV-boksen slås op direkte i BGR via en
+  forudberegnet 24-bit tabel (Vision_lut.py), som erstatter
+  cvtColor + inRange
+
+Brug:
+    seg = SegmentPipeline.from_settings(cfg, roi=(x1, y1, x2, y2))
+    seg.calibrate(frames)           # vælger hurtigste gyldige kandidat
+                                    # (kræver min_frames frames med objekter)
+    mask = seg(frame)
+"""
+import time
+
+import cv2 as cv
+import numpy as np
+
+try:
+    from A_Vision.Vision_lut import box_lut
+except ImportError:
+    from Vision_lut import box_lut
+
+
+def fused_rect(ksize: int, iterations: int) -> int:
+    """Størrelsen på ét rektangel der svarer til iterations × ksize-rektangel."""
+    return iterations * (ksize - 1) + 1 if iterations > 0 else 1
+
+
+def mask_iou(a: np.ndarray, b: np.ndarray) -> float:
+    """IoU mellem to binære masker (1.0 hvis begge er tomme)."""
+    a = a > 0
+    b = b > 0
+    union = np.count_nonzero(a | b)
+    if union == 0:
+        return 1.0
+    return np.count_nonzero(a & b) / union
+
+
+class SegmentPipeline:
+    """
+    Konfigurerbar segmentering med automatisk valg af hurtigste kæde.
+
+    Parametre:
+        lower, upper (array): HSV-grænser (uint8).
+        hsv_blur_k (int): GaussianBlur på HSV før inRange (1 = ingen).
+        open_k, open_iter (int): Rektangulær OPEN (0 iterationer = ingen).
+        close_k, close_iter (int): Rektangulær CLOSE.
+        post_blur_k (int): GaussianBlur på masken før Canny (1 = ingen).
+        canny (tuple | None): (low, high) – None = returnér masken uden kanter.
+        dilate_k, dilate_iter (int): Dilatering af kanterne.
+        roi (tuple | None): (x1, y1, x2, y2) – beskæring af frame.
+        min_iou (float): Mindste IoU for at en ikke-eksakt kandidat godkendes.
+
+    Metoder:
+        - reference(frame): den oprindelige kæde (sandheden)
+        - candidates(): {navn: funktion}
+        - calibrate(frames): validerer + timer kandidater, vælger den hurtigste
+        - __call__(frame): kører den valgte kandidat
+    """
+
+    def __init__(self, lower, upper, hsv_blur_k=1,
+                 open_k=5, open_iter=2, close_k=5, close_iter=2,
+                 post_blur_k=5, canny=(40, 120), dilate_k=5, dilate_iter=1,
+                 roi=None, min_iou=0.999):
+        self.lower = np.asarray(lower, dtype=np.uint8)
+        self.upper = np.asarray(upper, dtype=np.uint8)
+        self.hsv_blur_k = int(hsv_blur_k)
+        self.open_k, self.open_iter = int(open_k), int(open_iter)
+        self.close_k, self.close_iter = int(close_k), int(close_iter)
+        self.post_blur_k = int(post_blur_k)
+        self.canny = canny
+        self.dilate_k, self.dilate_iter = int(dilate_k), int(dilate_iter)
+        self.roi = roi
+        self.min_iou = min_iou
+
+        self.mode = "reference"
+        self.report = {}
+        self._lut = None
+
+    @classmethod
+    def from_settings(cls, cfg: dict, roi=None, **kwargs) -> "SegmentPipeline":
+        """Opretter pipeline fra en settings-JSON (H/S/V_low/high, blur_k)."""
+        lower = [cfg["H_low"], cfg["S_low"], cfg["V_low"]]
+        upper = [cfg["H_high"], cfg["S_high"], cfg["V_high"]]
+        return cls(lower, upper, hsv_blur_k=cfg.get("blur_k", 1), roi=roi, **kwargs)
+
+    # ------------------------------------------------------------
+    # Fælles trin
+    # ------------------------------------------------------------
+    def _crop(self, img):
+        if self.roi is None:
+            return img
+        x1, y1, x2, y2 = self.roi
+        return img[y1:y2, x1:x2]
+
+    def _post(self, mask, fused: bool):
+        """Morfologi → blur → Canny → dilate på en binær maske."""
+        if fused:
+            if self.open_iter > 0:
+                k = fused_rect(self.open_k, self.open_iter)
+                mask = cv.morphologyEx(mask, cv.MORPH_OPEN, np.ones((k, k), np.uint8))
+            if self.close_iter > 0:
+                k = fused_rect(self.close_k, self.close_iter)
+                mask = cv.morphologyEx(mask, cv.MORPH_CLOSE, np.ones((k, k), np.uint8))
+            if self.post_blur_k > 1:
+                mask = cv.GaussianBlur(mask, (self.post_blur_k, self.post_blur_k), 0)
+        else:
+            if self.open_iter > 0:
+                mask = cv.morphologyEx(mask, cv.MORPH_OPEN, np.ones((self.open_k, self.open_k), np.uint8),
+                                       iterations=self.open_iter)
+            if self.close_iter > 0:
+                mask = cv.morphologyEx(mask, cv.MORPH_CLOSE, np.ones((self.close_k, self.close_k), np.uint8),
+                                       iterations=self.close_iter)
+            mask = cv.GaussianBlur(mask, (self.post_blur_k, self.post_blur_k), 0)
+
+        if self.canny is None:
+            return mask
+
+        edges = cv.Canny(mask, *self.canny)
+        if self.dilate_iter > 0:
+            if fused:
+                k = fused_rect(self.dilate_k, self.dilate_iter)
+                edges = cv.dilate(edges, np.ones((k, k), np.uint8))
+            else:
+                edges = cv.dilate(edges, np.ones((self.dilate_k, self.dilate_k), np.uint8),
+                                  iterations=self.dilate_iter)
+        return edges
+
+    # ------------------------------------------------------------
+    # Kandidater
+    # ------------------------------------------------------------
+    def reference(self, frame):
+        """Præcis kæden fra main.py."""
+        hsv = cv.cvtColor(frame, cv.COLOR_BGR2HSV)
+        roi = self._crop(hsv)
+        roi_blur = cv.GaussianBlur(roi, (self.hsv_blur_k, self.hsv_blur_k), 0)
+        mask = cv.inRange(roi_blur, self.lower, self.upper)
+        return self._post(mask, fused=False)
+
+    def _fused_hsv(self, frame):
+        hsv = cv.cvtColor(self._crop(frame), cv.COLOR_BGR2HSV)
+        if self.hsv_blur_k > 1:
+            hsv = cv.GaussianBlur(hsv, (self.hsv_blur_k, self.hsv_blur_k), 0)
+        mask = cv.inRange(hsv, self.lower, self.upper)
+        return self._post(mask, fused=True)
+
+    def _fused_lut(self, frame):
+        if self._lut is None:
+            self._lut = box_lut(self.lower, self.upper)
+        mask = self._lut.mask(self._crop(frame))
+        return self._post(mask, fused=True)
+
+    def candidates(self) -> dict:
+        cands = {"reference": self.reference, "fused_hsv": self._fused_hsv}
+        # LUT'en kender kun pixelværdier – blur i HSV-rummet kan den ikke udtrykke
+        if self.hsv_blur_k <= 1:
+            cands["fused_lut"] = self._fused_lut
+        return cands
+
+    # ------------------------------------------------------------
+    # Valg
+    # ------------------------------------------------------------
+    def calibrate(self, frames, repeat: int = 5, min_frames: int = 3) -> dict:
+        """
+    Validerer hver kandidat mod referencen på frames og vælger den
+    hurtigste der enten er bit-identisk eller har IoU ≥ min_iou.
+
+    En frame hvor referencen er tom, beviser intet (IoU mellem to tomme
+    masker er 1.0), så der kræves mindst min_frames frames med objekter.
+    Ellers beholdes den nuværende kæde, og der returneres {}.
+
+    Returnerer:
+        {navn: {"ms", "exact", "iou", "valid"}} – gemmes også i self.report.
+    """
+        frames = list(frames)
+        refs = [self.reference(f) for f in frames]
+
+        informative = sum(1 for r in refs if np.count_nonzero(r))
+        if informative < min_frames:
+            print(f"[SEGMENT] Kun {informative}/{min_frames} frames med objekter "
+                  f"– beholder '{self.mode}'")
+            return {}
+
+        report = {}
+        for name, fn in self.candidates().items():
+            outs = [fn(f) for f in frames]   # warm-up (bygger evt. LUT)
+            exact = all(np.array_equal(o, r) for o, r in zip(outs, refs))
+            iou = min(mask_iou(o, r) for o, r in zip(outs, refs))
+
+            times = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                for f in frames:
+                    fn(f)
+                times.append((time.perf_counter() - t0) * 1000.0 / len(frames))
+
+            report[name] = {
+                "ms": float(np.median(times)),
+                "exact": bool(exact),
+                "iou": float(iou),
+                "valid": bool(exact or iou >= self.min_iou),
+            }
+
+        valid = [n for n, r in report.items() if r["valid"]]
+        self.mode = min(valid, key=lambda n: report[n]["ms"])
+        self.report = report
+
+        for name, r in report.items():
+            mark = "→" if name == self.mode else " "
+            print(f"[SEGMENT] {mark} {name:<10} {r['ms']:7.2f} ms  exact={r['exact']}  IoU={r['iou']:.4f}")
+        return report
+
+    def __call__(self, frame):
+        return self.candidates()[self.mode](frame)
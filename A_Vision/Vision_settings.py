@@ -5,7 +5,7 @@ import json
 import os
 import time
 
-from Vision_tools import load_image, downscale
+from Vision_tools import load_image, downscale, StageCache
 
 try:
     from Vision_camera import OakCamera
@@ -124,12 +124,18 @@ def vision_settings(source: str = "image",
     else:
         base_frame = None
 
+    # Trin genberegnes kun når input eller egne trackbars ændres – i
+    # image-mode står tuneren stille uden at æde en CPU-kerne
+    cache = StageCache(slots={"small": 4, "hsv": 4})
+    frame_id = 0
+
     while True:
 
         if source == "camera":
             frame = get_frame(source, filename, camera)
+            frame_id += 1
         else:
-            frame = base_frame.copy()
+            frame = base_frame
 
         scale_percent = max(10, cv.getTrackbarPos("scale %", control_window))
         scale = scale_percent / 100.0
@@ -170,38 +176,55 @@ def vision_settings(source: str = "image",
         # -----------------------------
        #
 
-        h, w = frame.shape[:2]
-        frame_small = cv.resize(frame, (int(w * scale), int(h * scale)))
-
-        # HSV mask
-        hsv = cv.cvtColor(frame_small, cv.COLOR_BGR2HSV)
-        lower = np.array([H_low, S_low, V_low], dtype=np.uint8)
-        upper = np.array([H_high, S_high, V_high], dtype=np.uint8)
-        mask = cv.inRange(hsv, lower, upper)
-        masked = cv.bitwise_and(frame_small, frame_small, mask=mask)
+        cache.changed = False
 
-        # --- DOT DETECTION FOR CALIBRATION (MATCHES Calibration.py) ---
-        # Work directly on the HSV mask – no canny, no adaptive thresh.
-        blur_mask = cv.GaussianBlur(mask, (blur_k, blur_k), 0)
+        # nøgler: hvert trin = forrige trins nøgle + egne parametre
+        k_small = (frame_id, scale)
+        k_mask = (k_small, H_low, H_high, S_low, S_high, V_low, V_high)
+        k_cnt = (k_mask, blur_k, min_area)
 
-        contours, _ = cv.findContours(blur_mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
-        big_contours = [c for c in contours if cv.contourArea(c) >= min_area]
+        def resize():
+            h, w = frame.shape[:2]
+            return cv.resize(frame, (int(w * scale), int(h * scale)))
 
+        frame_small = cache.get("small", k_small, resize)
 
-        overlay = frame_small.copy()
-        cv.drawContours(overlay, big_contours, -1, (0, 0, 255), 2)
+        # HSV mask
+        hsv = cache.get("hsv", k_small, lambda: cv.cvtColor(frame_small, cv.COLOR_BGR2HSV))
 
-        print(f"\rContours: {len(big_contours)}", end="")
+        def hsv_mask():
+            lower = np.array([H_low, S_low, V_low], dtype=np.uint8)
+            upper = np.array([H_high, S_high, V_high], dtype=np.uint8)
+            return cv.inRange(hsv, lower, upper)
 
-        # SHOW
-        cv.imshow("Frame", frame_small)
-        cv.imshow("Mask", mask)
-        #cv.imshow("Gray", gray)
-        #cv.imshow("Thresh", thres)
-        #cv.imshow("Edges", edge)
-        cv.imshow("Overlay", overlay)
+        mask = cache.get("mask", k_mask, hsv_mask)
 
-        key = cv.waitKey(1) & 0xFF
+        # --- DOT DETECTION FOR CALIBRATION (MATCHES Calibration.py) ---
+        # Work directly on the HSV mask – no canny, no adaptive thresh.
+        def find_big_contours():
+            blur_mask = cv.GaussianBlur(mask, (blur_k, blur_k), 0)
+            contours, _ = cv.findContours(blur_mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+            return [c for c in contours if cv.contourArea(c) >= min_area]
+
+        big_contours = cache.get("contours", k_cnt, find_big_contours)
+
+        def draw_overlay():
+            out = frame_small.copy()
+            cv.drawContours(out, big_contours, -1, (0, 0, 255), 2)
+            return out
+
+        overlay = cache.get("overlay", k_cnt, draw_overlay)
+
+        # SHOW (kun når noget er genberegnet – vinduerne beholder billedet)
+        if cache.changed:
+            print(f"\rContours: {len(big_contours)}", end="")
+            cv.imshow("Frame", frame_small)
+            cv.imshow("Mask", mask)
+            cv.imshow("Overlay", overlay)
+
+        # camera: hurtigst muligt; image uden ændringer: vent længere (idle)
+        idle = source != "camera" and not cache.changed
+        key = cv.waitKey(30 if idle else 1) & 0xFF
 
         # SAVE SETTINGS
         if key == ord('s'):
@@ -47,3 +47,29 @@ def rotation(img, angle, rotPoint=None):
     dimensions = (width, height)
     
     return cv.warpAffine(img, RotationMatrix, dimensions)
+
+
+# Memoisering af tuner-trin: et trin genberegnes kun når dets nøgle
+# (input-nøgle + egne parametre) ændres. slots > 1 beholder flere
+# varianter, fx resize pr. skala.
+class StageCache:
+    def __init__(self, slots=None):
+        self.slots = slots or {}
+        self._store = {}
+        self.changed = False
+
+    def get(self, name, key, fn):
+        entries = self._store.setdefault(name, {})
+        if key in entries:
+            entries[key] = entries.pop(key)   # nyligst brugt sidst
+            return entries[key]
+
+        value = fn()
+        entries[key] = value
+        if len(entries) > self.slots.get(name, 1):
+            entries.pop(next(iter(entries)))
+        self.changed = True
+        return value
+
+    def clear(self):
+        self._store.clear()
@@ -4,7 +4,7 @@ import json
 import os
 import time
 
-from Vision_tools import load_image, downscale
+from Vision_tools import load_image, downscale, StageCache
 
 try:
     from Vision_camera import OakCamera
@@ -136,12 +136,18 @@ def vision_settings(source: str = "image",
     else:
         base_frame = None
 
+    # Trin genberegnes kun når input eller egne trackbars ændres – i
+    # image-mode står tuneren stille uden at æde en CPU-kerne
+    cache = StageCache(slots={"small": 4, "hsv": 4})
+    frame_id = 0
+
     while True:
 
         if source == "camera":
             frame = get_frame(source, filename, camera)
+            frame_id += 1
         else:
-            frame = base_frame.copy()
+            frame = base_frame
 
         scale_percent = max(10, cv.getTrackbarPos("scale %", control_window))
         scale = scale_percent / 100.0
@@ -178,68 +184,71 @@ def vision_settings(source: str = "image",
         V_low = cv.getTrackbarPos("V low", control_window)
         V_high = cv.getTrackbarPos("V high", control_window)
 
+        cache.changed = False
 
-        h, w = frame.shape[:2]
-        frame_small = cv.resize(frame, (int(w * scale), int(h * scale)))
-
-        # HSV mask
-        hsv = cv.cvtColor(frame_small, cv.COLOR_BGR2HSV)
-        lower = np.array([H_low, S_low, V_low], dtype=np.uint8)
-        upper = np.array([H_high, S_high, V_high], dtype=np.uint8)
-        mask = cv.inRange(hsv, lower, upper)
-        masked = cv.bitwise_and(frame_small, frame_small, mask=mask)
-
-
-        gray = cv.cvtColor(masked, cv.COLOR_BGR2GRAY)
-        blur = cv.GaussianBlur(gray, (blur_k, blur_k), 0)
-
-        if thresh_mode == 0:
-            _, thres = cv.threshold(blur, global_thresh_val, 255, cv.THRESH_BINARY)
-
-        elif thresh_mode == 1:
-            thres = cv.adaptiveThreshold(
-                blur, 255,
-                cv.ADAPTIVE_THRESH_MEAN_C,
-                cv.THRESH_BINARY,
-                block_size, C_val)
-
-        else:
-            thres = cv.adaptiveThreshold(
-                blur, 255,
-                cv.ADAPTIVE_THRESH_GAUSSIAN_C,
-                cv.THRESH_BINARY,
-                block_size, C_val)
-
-        edge = cv.Canny(blur, canny_low, canny_high)
+        # nøgler: hvert trin = forrige trins nøgle + egne parametre
+        k_small = (frame_id, scale)
+        k_mask = (k_small, H_low, H_high, S_low, S_high, V_low, V_high)
+        k_blur = (k_mask, blur_k)
+        k_thres = (k_blur, thresh_mode, global_thresh_val, block_size, C_val)
+        k_edge = (k_blur, canny_low, canny_high)
+        k_cnt = (k_edge, min_area)
 
+        def resize():
+            h, w = frame.shape[:2]
+            return cv.resize(frame, (int(w * scale), int(h * scale)))
 
-        contours, _ = cv.findContours(edge, cv.RETR_LIST, cv.CHAIN_APPROX_SIMPLE)
-        big_contours = [c for c in contours if cv.contourArea(c) >= min_area]
+        frame_small = cache.get("small", k_small, resize)
 
-
-
-
-
-
-        overlay = frame_small.copy()
-        preview_overlay = cv.resize(overlay, (DISPLAY_W,DISPLAY_H))
-        preview_mask = cv.resize(mask, (DISPLAY_W,DISPLAY_H))
-        preview_gray = cv.resize(gray, (DISPLAY_W,DISPLAY_H))
-        preview_thres = cv.resize(thres, (DISPLAY_W,DISPLAY_H))
-        preview_edge= cv.resize(edge, (DISPLAY_W,DISPLAY_H))
-        cv.drawContours(overlay, big_contours, -1, (0, 0, 255), 2)
-
-        print(f"\rContours: {len(big_contours)}", end="")
-
-        # SHOW
-        cv.imshow("Frame", frame_small)
-        cv.imshow("Mask", preview_mask)
-        cv.imshow("Gray", preview_gray)
-        cv.imshow("Thresh", preview_thres)
-        cv.imshow("Edges", preview_edge)
-        cv.imshow("Overlay", preview_overlay)
-
-        key = cv.waitKey(1) & 0xFF
+        # HSV mask
+        hsv = cache.get("hsv", k_small, lambda: cv.cvtColor(frame_small, cv.COLOR_BGR2HSV))
+
+        def hsv_mask():
+            lower = np.array([H_low, S_low, V_low], dtype=np.uint8)
+            upper = np.array([H_high, S_high, V_high], dtype=np.uint8)
+            return cv.inRange(hsv, lower, upper)
+
+        mask = cache.get("mask", k_mask, hsv_mask)
+        gray = cache.get("gray", k_mask, lambda: cv.cvtColor(
+            cv.bitwise_and(frame_small, frame_small, mask=mask), cv.COLOR_BGR2GRAY))
+        blur = cache.get("blur", k_blur, lambda: cv.GaussianBlur(gray, (blur_k, blur_k), 0))
+
+        def threshold():
+            if thresh_mode == 0:
+                _, t = cv.threshold(blur, global_thresh_val, 255, cv.THRESH_BINARY)
+                return t
+            method = cv.ADAPTIVE_THRESH_MEAN_C if thresh_mode == 1 else cv.ADAPTIVE_THRESH_GAUSSIAN_C
+            return cv.adaptiveThreshold(blur, 255, method, cv.THRESH_BINARY, block_size, C_val)
+
+        thres = cache.get("thresh", k_thres, threshold)
+        edge = cache.get("edge", k_edge, lambda: cv.Canny(blur, canny_low, canny_high))
+
+        def find_big_contours():
+            contours, _ = cv.findContours(edge, cv.RETR_LIST, cv.CHAIN_APPROX_SIMPLE)
+            return [c for c in contours if cv.contourArea(c) >= min_area]
+
+        big_contours = cache.get("contours", k_cnt, find_big_contours)
+
+        def draw_overlay():
+            out = frame_small.copy()
+            cv.drawContours(out, big_contours, -1, (0, 0, 255), 2)
+            return out
+
+        overlay = cache.get("overlay", k_cnt, draw_overlay)
+
+        # SHOW (kun når noget er genberegnet – vinduerne beholder billedet)
+        if cache.changed:
+            print(f"\rContours: {len(big_contours)}", end="")
+            cv.imshow("Frame", frame_small)
+            cv.imshow("Mask", cv.resize(mask, (DISPLAY_W, DISPLAY_H)))
+            cv.imshow("Gray", cv.resize(gray, (DISPLAY_W, DISPLAY_H)))
+            cv.imshow("Thresh", cv.resize(thres, (DISPLAY_W, DISPLAY_H)))
+            cv.imshow("Edges", cv.resize(edge, (DISPLAY_W, DISPLAY_H)))
+            cv.imshow("Overlay", cv.resize(overlay, (DISPLAY_W, DISPLAY_H)))
+
+        # camera: hurtigst muligt; image uden ændringer: vent længere (idle)
+        idle = source != "camera" and not cache.changed
+        key = cv.waitKey(30 if idle else 1) & 0xFF
 
         # SAVE SETTINGS
         if key == ord('s'):
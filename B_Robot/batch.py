@@ -0,0 +1,234 @@
+"""
+batch.py
+Eksplicit tilstandsmaskine for en batch af robotkommandoer.
+
+Funktionalitet:
+- Batch / BatchCommand: hver kommando har en tilstand
+  (pending → sent → acked → done, eller failed / uncertain) og tidsstempler
+- BatchJournal: kompakt append-only journal (JSON lines) på disk, så en
+  batch kan genoptages præcis hvor robotten slap efter crash eller
+  netværksudfald – uden at allerede flyttede emner plukkes igen
+
+Tilstande:
+    pending: ikke sendt endnu
+    sent:    skrevet til socket'en
+    acked:   modtaget af robottens TCP-stak (drain lykkedes)
+    done:    robotten har svaret DONE
+    failed:  robotten meldte fejl på kommandoen (eller blev opgivet)
+    uncertain: sendt, men forbindelsen faldt (eller programmet crashede)
+             før DONE – robotten kan have udført den. Sendes først igen
+             når en operatør har bekræftet at emnet stadig ligger der
+
+Journal-format (én linje pr. hændelse):
+    {"b": "<batch_id>", "c": [[x, y, z, a, ok], ...], "t": 1700000000.0}   ← ny batch
+    {"b": "<batch_id>", "i": 3, "s": "d", "t": 1700000012.3}          ← tilstandsskift
+"""
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+
+from pick_command import PickCommand
+
+
+class CmdState(str, Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    ACKED = "acked"
+    DONE = "done"
+    FAILED = "failed"
+    UNCERTAIN = "uncertain"
+
+
+# Ét-bogstavs koder i journalen
+_STATE_CODE = {CmdState.SENT: "s", CmdState.ACKED: "a", CmdState.DONE: "d",
+               CmdState.FAILED: "f", CmdState.UNCERTAIN: "u"}
+_CODE_STATE = {v: k for k, v in _STATE_CODE.items()}
+_TIME_ATTR = {CmdState.SENT: "t_sent", CmdState.ACKED: "t_acked", CmdState.DONE: "t_done",
+              CmdState.FAILED: "t_done", CmdState.UNCERTAIN: "t_done"}
+
+
+@dataclass(slots=True)
+class BatchCommand:
+    """Én kommando i en batch med tilstand og tidsstempler (time.time())."""
+    cmd: PickCommand
+    state: CmdState = CmdState.PENDING
+    t_sent: float | None = None
+    t_acked: float | None = None
+    t_done: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (CmdState.DONE, CmdState.FAILED)
+
+
+@dataclass
+class Batch:
+    """
+    En batch af robotkommandoer.
+
+    Parametre:
+        commands (list[BatchCommand]): Kommandoerne i rækkefølge.
+        batch_id (str): Unikt id (default: tidsstempel i ms).
+        journal (BatchJournal | None): Hvis sat, logges alle tilstandsskift.
+
+    Metoder:
+        - from_commands(cmds, journal): opretter en ny batch og journaliserer den
+        - mark(idx, state): tilstandsskift for én kommando
+        - next_index(): første kommando der ikke er færdig (None = batch færdig)
+        - remaining(): antal kommandoer der mangler
+        - mark_in_flight_uncertain(): sent/acked → uncertain efter et udfald
+    """
+    commands: list[BatchCommand]
+    batch_id: str = field(default_factory=lambda: str(int(time.time() * 1000)))
+    created: float = field(default_factory=time.time)
+    journal: "BatchJournal | None" = None
+    exported_at: float | None = None   # hvornår vision skrev JSON-filen (latens-måling)
+
+    @classmethod
+    def from_commands(cls, cmds: list[PickCommand],
+                      journal: "BatchJournal | None" = None) -> "Batch":
+        batch = cls(commands=[BatchCommand(c) for c in cmds], journal=journal)
+        if journal is not None:
+            journal.open_batch(batch)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    @property
+    def picks(self) -> list[PickCommand]:
+        return [c.cmd for c in self.commands]
+
+    @property
+    def finished(self) -> bool:
+        return all(c.finished for c in self.commands)
+
+    @property
+    def state(self) -> CmdState:
+        """Samlet tilstand: pending, sent (i gang), done eller failed."""
+        if self.finished:
+            if any(c.state == CmdState.FAILED for c in self.commands):
+                return CmdState.FAILED
+            return CmdState.DONE
+        if all(c.state == CmdState.PENDING for c in self.commands):
+            return CmdState.PENDING
+        return CmdState.SENT
+
+    def next_index(self) -> int | None:
+        for idx, cmd in enumerate(self.commands):
+            if not cmd.finished:
+                return idx
+        return None
+
+    def remaining(self) -> int:
+        return sum(1 for c in self.commands if not c.finished)
+
+    def mark_in_flight_uncertain(self) -> list[int]:
+        """
+    Kommandoer der er sendt men ikke kvitteret, markeres uncertain –
+    DONE kan være gået tabt, så de må ikke bare sendes igen.
+
+    Returnerer:
+        Index på de kommandoer der blev markeret.
+    """
+        in_flight = [i for i, c in enumerate(self.commands)
+                     if c.state in (CmdState.SENT, CmdState.ACKED)]
+        for idx in in_flight:
+            self.mark(idx, CmdState.UNCERTAIN)
+        return in_flight
+
+    def mark(self, idx: int, state: CmdState, t: float | None = None) -> None:
+        """Sætter tilstand + tidsstempel for kommando idx og journaliserer skiftet."""
+        t = time.time() if t is None else t
+        cmd = self.commands[idx]
+        cmd.state = state
+        setattr(cmd, _TIME_ATTR[state], t)
+
+        if self.journal is not None:
+            self.journal.record(self.batch_id, idx, state, t)
+            if self.finished:
+                self.journal.clear()
+
+
+class BatchJournal:
+    """
+    Append-only journal for den aktive batch.
+
+    Kun én batch er aktiv ad gangen, så journalen ryddes når batchen er
+    færdig og holdes dermed lille.
+
+    Parametre:
+        path (str): Sti til journal-filen.
+
+    Metoder:
+        - open_batch(batch): skriver batch-header (id + kommandoer)
+        - record(batch_id, idx, state, t): skriver ét tilstandsskift
+        - load_unfinished(): genopbygger en ufærdig batch fra disk, ellers None
+        - clear(): tømmer journalen
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _append(self, entry: dict) -> None:
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def open_batch(self, batch: Batch) -> None:
+        self.clear()
+        rows = [p.to_row() for p in batch.picks]
+        self._append({"b": batch.batch_id, "c": rows, "t": round(batch.created, 3)})
+
+    def record(self, batch_id: str, idx: int, state: CmdState, t: float) -> None:
+        self._append({"b": batch_id, "i": idx, "s": _STATE_CODE[state], "t": round(t, 3)})
+
+    def clear(self) -> None:
+        with open(self.path, "w", encoding="utf-8"):
+            pass
+
+    def load_unfinished(self) -> Batch | None:
+        """
+    Læser journalen og genskaber den seneste batch.
+
+    En afbrudt sidste linje (crash midt i skrivning) ignoreres.
+    Kommandoer der var sendt men ikke kvitteret ved crashet, markeres
+    uncertain (se Batch.mark_in_flight_uncertain).
+
+    Returnerer:
+        Batch med journal sat, hvis den ikke er færdig – ellers None.
+    """
+        if not os.path.exists(self.path):
+            return None
+
+        batch = None
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                if "c" in entry:
+                    picks = [PickCommand.from_row(r) for r in entry["c"]]
+                    batch = Batch(commands=[BatchCommand(p) for p in picks],
+                                  batch_id=entry["b"], created=entry["t"])
+                elif batch is not None and entry.get("b") == batch.batch_id:
+                    state = _CODE_STATE.get(entry.get("s"))
+                    idx = entry.get("i", -1)
+                    if state is None or not 0 <= idx < len(batch):
+                        continue
+                    cmd = batch.commands[idx]
+                    cmd.state = state
+                    setattr(cmd, _TIME_ATTR[state], entry["t"])
+
+        if batch is None or batch.finished:
+            return None
+
+        batch.journal = self
+        batch.mark_in_flight_uncertain()
+        return batch
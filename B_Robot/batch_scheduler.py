@@ -0,0 +1,163 @@
+"""
+batch_scheduler.py
+Dobbelt-bufferet afvikling af batches.
+
+Mens robotten kører batch N, kan vision eksportere batch N+1. Den
+lægges i en "staged" buffer og sendes i samme øjeblik som batch N's
+sidste DONE modtages – uden at vente på fil-polling.
+
+Funktionalitet:
+- stage(cmds): lægger næste batch klar (erstatter en tidligere staged batch)
+- run(client): afvikler active → staged i en uendelig løkke
+- Validering af N+1: kommandoer tæt på et pluk i batch N fjernes, da
+  emnet allerede er (eller bliver) flyttet af batch N
+- Statusfil (robot_status.json) med de pluk der stadig mangler, så
+  vision kan maskere de områder ud når N+1 forberedes
+"""
+import asyncio
+import json
+import math
+import os
+import time
+
+from batch import Batch, BatchJournal, CmdState
+from latency import LatencyStats
+from pick_command import PickCommand
+from robot_client import RobotClient, RobotLinkError
+
+
+class BatchScheduler:
+    """
+    Planlægger der holder én aktiv og én ventende batch.
+
+    Parametre:
+        journal (BatchJournal): Journal for den aktive batch.
+        status_path (str): Sti til statusfilen som vision læser.
+        overlap_radius_mm (float): Kommandoer i N+1 der ligger tættere end
+                                   dette på et pluk i batch N, fjernes.
+        latency (LatencyStats | None): Hvis sat, måles latens for hver batch.
+        confirm (callable | None): Gives videre til RobotClient.run_batch –
+                                   afgør om en uncertain kommando sendes igen.
+
+    Metoder:
+        - resume(batch): gør en ufærdig batch fra journalen aktiv
+        - stage(cmds): validerer og lægger næste batch klar
+        - run(client): afvikler batches så snart de er klar
+        - busy: True hvis en batch er aktiv eller staged
+    """
+
+    def __init__(self, journal: BatchJournal, status_path: str,
+                 overlap_radius_mm: float = 30.0,
+                 latency: LatencyStats | None = None, confirm=None):
+        self.journal = journal
+        self.latency = latency
+        self.confirm = confirm
+        self.status_path = status_path
+        self.overlap_radius_mm = overlap_radius_mm
+
+        self.active: Batch | None = None
+        self.staged: Batch | None = None
+        self._ready = asyncio.Event()
+
+    @property
+    def busy(self) -> bool:
+        return self.active is not None or self.staged is not None
+
+    # ------------------------------------------------------------
+    # Buffere
+    # ------------------------------------------------------------
+    def resume(self, batch: Batch) -> None:
+        self.active = batch
+        self._ready.set()
+        self.write_status()
+
+    def stage(self, cmds: list[PickCommand], exported_at: float | None = None) -> Batch | None:
+        """
+    Validerer kommandoerne mod den aktive batch og lægger dem klar
+    som næste batch. En tidligere staged batch erstattes, da den nye
+    eksport er nyere.
+
+    Returnerer:
+        Den staged Batch, eller None hvis intet var tilbage efter validering.
+    """
+        cmds = self._drop_overlaps(cmds)
+        if not cmds:
+            print("[Scheduler] Ingen nye pluk efter validering – intet staged.")
+            return None
+
+        if self.staged is not None:
+            print(f"[Scheduler] Erstatter staged batch {self.staged.batch_id}")
+
+        self.staged = Batch.from_commands(cmds)   # journaliseres først når den aktiveres
+        self.staged.exported_at = exported_at
+        self._ready.set()
+        self.write_status()
+        print(f"[Scheduler] Batch {self.staged.batch_id} staged ({len(cmds)} kommandoer)")
+        return self.staged
+
+    def _drop_overlaps(self, cmds: list[PickCommand]) -> list[PickCommand]:
+        if self.active is None:
+            return cmds
+
+        taken = [p.xy for p in self.active.picks]
+        kept = []
+        for cmd in cmds:
+            if any(math.dist(cmd.xy, t) < self.overlap_radius_mm for t in taken):
+                print(f"[Scheduler] Springer over '{cmd}' – pluk findes allerede i aktiv batch")
+                continue
+            kept.append(cmd)
+        return kept
+
+    # ------------------------------------------------------------
+    # Statusfil til vision
+    # ------------------------------------------------------------
+    def pending_picks(self) -> list[list[float]]:
+        """(X, Y) for alle pluk i den aktive batch som endnu ikke er DONE."""
+        if self.active is None:
+            return []
+        return [list(c.cmd.xy) for c in self.active.commands
+                if c.state not in (CmdState.DONE, CmdState.FAILED)]
+
+    def write_status(self) -> None:
+        status = {
+            "active": self.active.batch_id if self.active else None,
+            "staged": self.staged.batch_id if self.staged else None,
+            "pending": self.pending_picks(),
+            "t": round(time.time(), 3),
+        }
+        tmp = self.status_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(status, f)
+        os.replace(tmp, self.status_path)   # atomisk – vision ser aldrig en halv fil
+
+    # ------------------------------------------------------------
+    # Afvikling
+    # ------------------------------------------------------------
+    async def run(self, client: RobotClient) -> None:
+        while True:
+            if self.active is None:
+                await self._ready.wait()
+                self._ready.clear()
+                if self.staged is None:
+                    continue
+                self.active, self.staged = self.staged, None
+                self.active.journal = self.journal
+                self.journal.open_batch(self.active)
+
+            self.write_status()
+            try:
+                await client.run_batch(self.active, on_progress=self.write_status,
+                                       confirm=self.confirm)
+            except RobotLinkError as e:
+                print(f"[Scheduler] {e} – venter på reconnect og genoptager batch {self.active.batch_id}")
+                await client.wait_connected()
+                continue
+
+            # batch N færdig → N+1 (hvis staged) sendes i næste iteration uden ventetid
+            finished, self.active = self.active, None
+            self.write_status()
+
+            if self.latency is not None:
+                self.latency.record_batch(finished)
+                self.latency.save()
+                self.latency.print_summary()
@@ -0,0 +1,76 @@
+"""
+latency.py
+Rullende latens-statistik for robot-siden af pipelinen.
+
+Funktionalitet:
+- export→send: fra vision skrev robot_commands.json til første kommando sendes
+- send→done:   fra en kommando sendes til robotten svarer DONE
+- batch:       fra første send til sidste DONE i en batch
+- p50/p95/p99 over de seneste N målinger, gemt som JSON så vision-sidens
+  tracer (qc_trace.py) kan flette dem ind i sit dump
+"""
+import json
+import os
+from collections import deque
+
+from batch import Batch
+
+
+def _percentile(sorted_vals: list[float], q: float) -> float:
+    # nearest-rank percentil – ingen numpy på robot-siden
+    idx = min(len(sorted_vals) - 1, max(0, round(q / 100.0 * (len(sorted_vals) - 1))))
+    return sorted_vals[idx]
+
+
+class LatencyStats:
+    """
+    Parametre:
+        path (str): JSON-fil som statistikken skrives til.
+        window (int): Antal målinger pr. trin i de rullende percentiler.
+
+    Metoder:
+        - record(name, ms): registrerer én måling
+        - record_batch(batch): registrerer alle tider fra en færdig batch
+        - summary(): {trin: {n, p50, p95, p99}}
+        - save(): skriver summary til path
+    """
+
+    def __init__(self, path: str, window: int = 500):
+        self.path = path
+        self.samples: dict[str, deque] = {}
+        self.window = window
+
+    def record(self, name: str, ms: float) -> None:
+        self.samples.setdefault(name, deque(maxlen=self.window)).append(ms)
+
+    def record_batch(self, batch: Batch) -> None:
+        sent = [c.t_sent for c in batch.commands if c.t_sent is not None]
+        done = [c.t_done for c in batch.commands if c.t_done is not None]
+
+        if batch.exported_at is not None and sent:
+            self.record("export_to_send", (min(sent) - batch.exported_at) * 1000.0)
+        for c in batch.commands:
+            if c.t_sent is not None and c.t_done is not None:
+                self.record("send_to_done", (c.t_done - c.t_sent) * 1000.0)
+        if sent and done:
+            self.record("batch", (max(done) - min(sent)) * 1000.0)
+
+    def summary(self) -> dict:
+        out = {}
+        for name, vals in self.samples.items():
+            s = sorted(vals)
+            if s:
+                out[name] = {"n": len(s), "p50": _percentile(s, 50),
+                             "p95": _percentile(s, 95), "p99": _percentile(s, 99)}
+        return out
+
+    def save(self) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        os.replace(tmp, self.path)
+
+    def print_summary(self) -> None:
+        for name, st in self.summary().items():
+            print(f"[Latency] {name:<15} p50={st['p50']:8.1f}  p95={st['p95']:8.1f}  "
+                  f"p99={st['p99']:8.1f} ms  (n={st['n']})")
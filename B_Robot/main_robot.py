@@ -1,17 +1,20 @@
 # Test.py
-import threading
-import time
-from queue import Queue
+import asyncio
 import json
 import os
 
-from socket_com import socketCom
-from send_worker import SendWorker
-from receive_data import Data
+from batch import BatchJournal
+from batch_scheduler import BatchScheduler
+from latency import LatencyStats
+from pick_command import PickCommand, get_codec
+from robot_client import RobotClient
 
 HOST = "169.254.1.51"
 PORT = 20002
 
+# wire-format mod robotten: "text" (DRL-kompatibel) eller "struct" (binær, 19 B)
+WIRE_CODEC = "text"
+
 # filen fra vision-kameraet (som du allerede havde)
 VISION_JSON_PATH = os.path.abspath(
     os.path.join(
@@ -22,150 +25,158 @@ VISION_JSON_PATH = os.path.abspath(
     )
 )
 
+# journal over den aktive batch (genoptages efter crash/udfald)
+JOURNAL_PATH = os.path.join(os.path.dirname(VISION_JSON_PATH), "robot_batch_journal.jsonl")
+
+# status til vision: hvilke pluk mangler stadig i den aktive batch
+STATUS_PATH = os.path.join(os.path.dirname(VISION_JSON_PATH), "robot_status.json")
+
+# rullende latens (export → send → DONE), flettes ind i vision-tracerens dump
+LATENCY_PATH = os.path.join(os.path.dirname(VISION_JSON_PATH), "robot_latency.json")
 
-def load_vision_commands(cmd_queue: Queue) -> int:
+
+def load_vision_commands() -> list[PickCommand]:
     """
-    Læser JSON-filen fra vision-kameraet og fylder cmd_queue med kommandoer.
-    Forventer format:
+    Læser JSON-filen fra vision-kameraet og returnerer kommandoerne.
+    Forventer format (skrevet af QCExport):
     {
         "objects": [
-            "add movel 97.55 233.55 55 26.49 NOK",
-            "add movel 203.69 349.56 55 138.39 NOK"
+            {"x": 97.55, "y": 233.55, "z": 55, "a": 26.49, "ok": false},
+            {"x": 203.69, "y": 349.56, "z": 55, "a": 138.39, "ok": false}
         ]
     }
+    Gamle filer med strenge ("add movel X Y Z A OK") accepteres stadig.
     """
-    # tøm eksisterende queue først
-    while not cmd_queue.empty():
-        try:
-            cmd_queue.get_nowait()
-        except Exception:
-            break
-
     with open(VISION_JSON_PATH, "r", encoding="utf-8") as f:
         data = json.load(f)
 
     objects = data.get("objects", [])
-    count = 0
+    commands = []
 
     for raw in objects:
-        if not isinstance(raw, str):
-            continue
+        try:
+            if isinstance(raw, dict):
+                commands.append(PickCommand.from_dict(raw))
+            elif isinstance(raw, str):
+                commands.append(PickCommand.parse(raw))
+        except (KeyError, ValueError) as e:
+            print(f"[MAIN] Springer ugyldig kommando over: {raw!r} ({e})")
 
-        line = raw.strip()
-        # fjern evt. "add " foran
-        if line.lower().startswith("add "):
-            line = line[4:]
+    print(f"[MAIN] Indlæste {len(commands)} kommandoer fra JSON.")
+    return commands
 
-        # læg kommandoen i køen (du kan vælge at upper-case hvis du vil)
-        cmd_queue.put(line)
-        count += 1
 
-    print(f"[MAIN] Indlæste {count} kommandoer fra JSON.")
-    return count
+def json_objects(data):
+    """
+    Kommando-delen af vision-JSON'en. "exported_at" er nyt ved hver eksport
+    og må ikke tælle med, når der tjekkes om filen reelt er ændret.
+    """
+    return data.get("objects") if isinstance(data, dict) else None
+
 
+async def confirm_uncertain(idx: int, cmd: PickCommand) -> bool:
+    """
+    Spørger operatøren om en kommando hvis DONE gik tabt (forbindelsesfejl
+    eller crash) skal sendes igen. Batchen venter imens.
 
-def main():
-    cmd_queue = Queue()
+    Returnerer:
+        True hvis emnet stadig ligger der (send igen), False hvis robotten
+        allerede har flyttet det.
+    """
+    prompt = (f"\n[MAIN] Kommando {idx + 1} ({cmd}) blev sendt, men DONE gik tabt.\n"
+              f"       Ligger emnet der stadig? [j = send igen / n = allerede flyttet]: ")
+    answer = await asyncio.to_thread(input, prompt)
+    return answer.strip().lower() in ("j", "ja", "y", "yes")
 
-    com = socketCom()
-    disconnect_event = threading.Event()
-    stop_event = threading.Event()
 
-    robot_ready = threading.Event()   # robot klar/busy
-    batch_active = threading.Event()  # om vi er midt i en batch
+def load_json_safe(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
 
-    # 1) Start socket-forbindelse
-    t_conn = threading.Thread(
-        target=com.connected,
-        args=(HOST, PORT, disconnect_event),
-        daemon=True,
-    )
-    t_conn.start()
-
-    # 2) Start data-modtager
-    data_receiver = Data()
-    t_recv = threading.Thread(
-        target=data_receiver.receive_data,
-        args=(lambda: com.s, disconnect_event, robot_ready, batch_active, cmd_queue),
-        daemon=True,
-    )
-    t_recv.start()
 
-    # 3) Start send-worker
-    t_send = threading.Thread(
-        target=SendWorker.send_worker,
-        args=(cmd_queue, lambda: com.s, disconnect_event, stop_event, robot_ready, batch_active),
-        daemon=True,
-    )
-    t_send.start()
+async def main():
+    client = RobotClient(HOST, PORT, codec=get_codec(WIRE_CODEC))
+    client.start()
+    scheduler = BatchScheduler(BatchJournal(JOURNAL_PATH), STATUS_PATH,
+                               latency=LatencyStats(LATENCY_PATH),
+                               confirm=confirm_uncertain)
 
     print("=== Automatisk JSON-mode ===")
     print(f"Overvåger fil: {VISION_JSON_PATH}")
     print("Når filen ændres, indlæses kommandoer og en batch køres automatisk.")
+    print("Ændres filen mens en batch kører, lægges den klar som næste batch.")
 
     last_processed_mtime = None   # sidste mtime vi HAR kørt
-    pending_mtime = None          # mtime som venter på at nuværende batch bliver færdig
 
     # ------------------------------------------
-    #  BASELINE JSON – så robotten ikke kører ved startup
+    #  UFÆRDIG BATCH FRA JOURNAL – genoptag hvor robotten slap
     # ------------------------------------------
-    def load_json_safe(path):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return None
+    batch = scheduler.journal.load_unfinished()
+    if batch is not None:
+        print(f"[MAIN] Genoptager batch {batch.batch_id} fra journal "
+              f"({batch.remaining()}/{len(batch)} kommandoer mangler)")
+        scheduler.resume(batch)
+    else:
+        scheduler.write_status()
 
-    last_json_content = load_json_safe(VISION_JSON_PATH)
+    run_task = asyncio.create_task(scheduler.run(client))
+
+    # ------------------------------------------
+    #  BASELINE JSON – så robotten ikke kører ved startup
+    # ------------------------------------------
+    last_objects = json_objects(load_json_safe(VISION_JSON_PATH))
 
     try:
-        while not disconnect_event.is_set():
+        while True:
+            await asyncio.sleep(0.1)  # filtjek – robot-I/O venter ikke på denne løkke
+
+            if run_task.done():
+                run_task.result()   # løft evt. uventet fejl
+
             # tjek om filen findes / har ændret sig
             try:
                 mtime = os.path.getmtime(VISION_JSON_PATH)
             except FileNotFoundError:
-                mtime = None
-
-            if mtime is not None and mtime != last_processed_mtime:
-                current_json = load_json_safe(VISION_JSON_PATH)
-
-                # Hvis JSON ikke er ændret -> gør ingenting
-                if current_json == last_json_content:
-                    last_processed_mtime = mtime
-                    # (ingen batch)
-                    time.sleep(0.1)
-                    continue
-
-                # Ellers -> JSON ER ændret for real
-                if not batch_active.is_set():
-                    print(f"[MAIN] Ændring registreret i JSON (mtime={mtime}) → loader og starter batch")
-                    try:
-                        count = load_vision_commands(cmd_queue)
-                        if count > 0:
-                            batch_active.set()
-                            robot_ready.set()
-                            last_processed_mtime = mtime
-                            last_json_content = current_json   # ← OPDATER BASELINE
-                        else:
-                            print("[MAIN] JSON indeholdt ingen kommandoer – ingen batch startet.")
-                            last_processed_mtime = mtime
-                    except Exception as e:
-                        print(f"[MAIN] Fejl ved læsning af JSON: {e}")
-
-                    finally:
-                        pending_mtime = None
-
-            time.sleep(0.1)  # undgå at spinne CPU'en
+                continue
 
-    except KeyboardInterrupt:
-        print("\n[MAIN] Ctrl+C – stopper…")
-        stop_event.set()
-        disconnect_event.set()
-        robot_ready.set()
-        batch_active.clear()
+            if mtime == last_processed_mtime:
+                continue
 
-    time.sleep(0.5)
+            current_json = load_json_safe(VISION_JSON_PATH)
+            current_objects = json_objects(current_json)
+
+            # Hvis kommandoerne ikke er ændret -> gør ingenting (kun ny exported_at)
+            if current_objects == last_objects:
+                last_processed_mtime = mtime
+                continue
+
+            # Ellers -> JSON ER ændret for real → stage som næste batch.
+            # Den aktive batch afbrydes ikke.
+            print(f"[MAIN] Ændring registreret i JSON (mtime={mtime}) → loader og stager batch")
+            try:
+                commands = load_vision_commands()
+            except Exception as e:
+                print(f"[MAIN] Fejl ved læsning af JSON: {e}")
+                continue
+
+            last_processed_mtime = mtime
+            last_objects = current_objects   # ← OPDATER BASELINE
+            if not commands:
+                print("[MAIN] JSON indeholdt ingen kommandoer – ingen batch startet.")
+                continue
+
+            scheduler.stage(commands, exported_at=(current_json or {}).get("exported_at"))
+
+    finally:
+        run_task.cancel()
+        await client.stop()
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n[MAIN] Ctrl+C – stopper…")
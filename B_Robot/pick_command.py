@@ -0,0 +1,148 @@
+"""
+pick_command.py
+Typet robotkommando (PickCommand) og wire-codecs til robot-linket.
+
+Samme objekt bruges hele vejen: QCExport skriver det som struktureret
+JSON, main_robot læser det tilbage uden streng-parsing, og først når
+kommandoen skrives til socket'en vælges repræsentationen via en codec.
+
+Funktionalitet:
+- PickCommand: X, Y, Z (mm), vinkel (grader) og OK/NOK
+- TextCodec: "movel X Y Z A OK\\n" – kompatibel med det eksisterende DRL-program
+- StructCodec: fast 19-byte binært format (struct) til et DRL-program der
+  læser binært
+- get_codec(name): vælger codec ud fra navn ("text" / "struct")
+
+Modulet har ingen afhængigheder til resten af B_Robot, så vision-siden
+kan importere det som B_Robot.pick_command.
+"""
+import struct
+from dataclasses import dataclass
+
+
+def _fmt(value: float) -> str:
+    # 2 decimaler uden efterstillede nuller: 55.0 → "55", 119.030 → "119.03"
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+@dataclass(frozen=True, slots=True)
+class PickCommand:
+    """
+    Én pluk-kommando til robotten.
+
+    Attributter:
+        x, y (float): Robotposition i mm.
+        z (float): Pick-højde i mm.
+        angle (float): Værktøjsvinkel i grader.
+        ok (bool): QC-resultat – bestemmer hvor emnet lægges.
+    """
+    x: float
+    y: float
+    z: float
+    angle: float
+    ok: bool
+
+    @property
+    def xy(self) -> tuple[float, float]:
+        return self.x, self.y
+
+    @property
+    def status(self) -> str:
+        return "OK" if self.ok else "NOK"
+
+    # ------------------------------------------------------------
+    # JSON (robot_commands.json og batch-journal)
+    # ------------------------------------------------------------
+    def to_dict(self) -> dict:
+        return {"x": self.x, "y": self.y, "z": self.z, "a": self.angle, "ok": self.ok}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "PickCommand":
+        return cls(float(d["x"]), float(d["y"]), float(d["z"]), float(d["a"]), bool(d["ok"]))
+
+    def to_row(self) -> list:
+        """Kompakt liste-form til journalen: [x, y, z, a, ok]."""
+        return [self.x, self.y, self.z, self.angle, self.ok]
+
+    @classmethod
+    def from_row(cls, row: list) -> "PickCommand":
+        x, y, z, a, ok = row
+        return cls(float(x), float(y), float(z), float(a), bool(ok))
+
+    @classmethod
+    def parse(cls, text: str) -> "PickCommand":
+        """
+    Læser det gamle tekstformat "add movel X Y Z A OK" (eller uden "add ").
+    Bruges kun til JSON-filer skrevet før PickCommand blev indført.
+
+    Kaster:
+        ValueError hvis teksten ikke er en movel-kommando.
+    """
+        parts = text.split()
+        if parts and parts[0].lower() == "add":
+            parts = parts[1:]
+        if len(parts) != 6 or parts[0].lower() != "movel":
+            raise ValueError(f"Ikke en movel-kommando: {text!r}")
+        x, y, z, a = (float(p) for p in parts[1:5])
+        return cls(x, y, z, a, parts[5].upper() == "OK")
+
+    def __str__(self) -> str:
+        return TextCodec.format(self)
+
+
+class TextCodec:
+    """Linjebaseret tekst: "movel X Y Z A OK\\n" (UTF-8)."""
+    name = "text"
+
+    @staticmethod
+    def format(cmd: PickCommand) -> str:
+        return (f"movel {_fmt(cmd.x)} {_fmt(cmd.y)} {_fmt(cmd.z)} "
+                f"{_fmt(cmd.angle)} {cmd.status}")
+
+    def encode(self, cmd: PickCommand) -> bytes:
+        return self.encode_line(self.format(cmd))
+
+    @staticmethod
+    def encode_line(text: str) -> bytes:
+        """Vilkårlig linje (fx heartbeat) i samme framing som kommandoerne."""
+        return (text + "\n").encode("utf-8")
+
+    def decode(self, data: bytes) -> PickCommand:
+        return PickCommand.parse(data.decode("utf-8"))
+
+
+class StructCodec:
+    """
+    Fast-størrelse binært format (little-endian, 19 bytes):
+
+        2s  magic  b"PK"  (gør det muligt at resynkronisere)
+        4f  x, y, z, angle  (float32)
+        B   ok  (1 = OK, 0 = NOK)
+    """
+    name = "struct"
+    MAGIC = b"PK"
+    _STRUCT = struct.Struct("<2s4fB")
+    size = _STRUCT.size
+
+    def encode(self, cmd: PickCommand) -> bytes:
+        return self._STRUCT.pack(self.MAGIC, cmd.x, cmd.y, cmd.z, cmd.angle, int(cmd.ok))
+
+    def decode(self, data: bytes) -> PickCommand:
+        magic, x, y, z, a, ok = self._STRUCT.unpack(data)
+        if magic != self.MAGIC:
+            raise ValueError(f"Ugyldig magic: {magic!r}")
+        return PickCommand(x, y, z, a, bool(ok))
+
+
+CODECS = {
+    TextCodec.name: TextCodec(),
+    StructCodec.name: StructCodec(),
+}
+
+
+def get_codec(name: str):
+    """Returnerer codec-instansen for "text" eller "struct"."""
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Ukendt codec: {name!r} (vælg {', '.join(CODECS)})") from None
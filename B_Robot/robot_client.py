@@ -0,0 +1,469 @@
+"""
+robot_client.py
+Asyncio-baseret forbindelse til Doosan-robotten.
+
+Erstatter de tre samarbejdende tråde (socket_com, receive_data og
+send_worker – nu fjernet) med én event-loop og én ejer af socket'en.
+
+Funktionalitet:
+- Holder TCP-forbindelsen åben via asyncio StreamReader/StreamWriter
+- TCP keepalive + heartbeat-watchdog, så en robot der forsvinder uden
+  at lukke forbindelsen opdages inden for få sekunder
+- Hurtig reconnect med jittered backoff, nulstillet ved succes (ReconnectPolicy)
+- send_and_wait_done(cmd): sender én PickCommand og venter på robottens "DONE"
+- Wire-format vælges med en codec (tekst til DRL, eller fast binært struct)
+- run_batch(batch, confirm): afvikler en Batch sekventielt, opdaterer dens
+  tilstandsmaskine og genoptager efter et netværksudfald. En kommando der
+  var i gang da forbindelsen faldt, sendes kun igen efter bekræftelse
+
+Der er ingen polling: afsenderen venter direkte på et Future, som
+læse-løkken afslutter i samme øjeblik "DONE" modtages.
+"""
+import asyncio
+import inspect
+import random
+import socket
+import time
+from dataclasses import dataclass
+
+from batch import Batch, CmdState
+from pick_command import PickCommand, TextCodec
+
+
+def enable_tcp_keepalive(sock: socket.socket, idle: float = 2.0,
+                         interval: float = 1.0, count: int = 3) -> None:
+    """
+    Slår TCP keepalive til på en socket, så en død forbindelse opdages
+    efter ca. idle + interval * count sekunder – også når der ikke sendes data.
+
+    Parametre:
+        sock (socket): Den forbundne socket.
+        idle (float): Sekunder uden trafik før første keepalive-probe.
+        interval (float): Sekunder mellem probes.
+        count (int): Antal ubesvarede probes før forbindelsen lukkes.
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        # Linux og Windows 10+
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, max(1, int(idle)))
+    elif hasattr(socket, "TCP_KEEPALIVE"):
+        # macOS
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, max(1, int(idle)))
+    elif hasattr(socket, "SIO_KEEPALIVE_VALS"):
+        # Ældre Windows: (on, idle_ms, interval_ms)
+        sock.ioctl(socket.SIO_KEEPALIVE_VALS, (1, int(idle * 1000), int(interval * 1000)))
+        return
+
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, int(interval)))
+    if hasattr(socket, "TCP_KEEPCNT"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, max(1, int(count)))
+
+
+def jittered_backoff(delay: float | None, initial: float = 0.2,
+                     maximum: float = 2.0, factor: float = 2.0,
+                     jitter: float = 0.5) -> float:
+    """
+    Beregner næste reconnect-ventetid med "full jitter" omkring den
+    eksponentielle værdi. delay=None betyder første forsøg efter en succes.
+
+    Returnerer:
+        float - ventetid i sekunder, altid <= maximum.
+    """
+    base = initial if delay is None else min(delay * factor, maximum)
+    spread = base * jitter
+    return min(maximum, max(0.0, base + random.uniform(-spread, spread)))
+
+
+@dataclass
+class ReconnectPolicy:
+    """
+    Styrer hvor hurtigt der forsøges at genoprette forbindelsen.
+
+    Parametre:
+        initial_delay (float): Første ventetid i sekunder efter en fejl.
+        max_delay (float): Øvre grænse for ventetiden.
+        factor (float): Faktor som ventetiden ganges med pr. fejlet forsøg.
+        jitter (float): Relativ spredning på ventetiden (0.5 = ±50 %).
+        connect_timeout (float): Timeout for selve connect-kaldet.
+        resume_timeout (float): Hvor længe run_batch venter på reconnect,
+                                før den giver op med RobotLinkError.
+    """
+    initial_delay: float = 0.2
+    max_delay: float = 2.0
+    factor: float = 2.0
+    jitter: float = 0.5
+    connect_timeout: float = 2.0
+    resume_timeout: float = 30.0
+
+    def next_delay(self, delay: float | None) -> float:
+        """Returnerer næste ventetid ud fra den forrige (None = første forsøg)."""
+        return jittered_backoff(delay, self.initial_delay, self.max_delay,
+                                self.factor, self.jitter)
+
+
+@dataclass
+class HeartbeatConfig:
+    """
+    Indstillinger for at opdage en død forbindelse.
+
+    Parametre:
+        message (str | None): Linje der sendes som heartbeat mens robotten er
+            ledig. DRL-programmet skal svare med en vilkårlig linje.
+            None = passiv mode (kun keepalive + done_timeout).
+        interval (float): Sekunder mellem heartbeats.
+        timeout (float): Sekunder uden svar på heartbeat før linket anses for dødt.
+        done_timeout (float | None): Maks. tid en enkelt kommando må være om at
+            blive kvitteret med DONE. None = ingen grænse.
+        keepalive_idle / keepalive_interval / keepalive_count:
+            TCP keepalive-indstillinger (se enable_tcp_keepalive).
+    """
+    message: str | None = None
+    interval: float = 1.0
+    timeout: float = 3.0
+    done_timeout: float | None = 60.0
+    keepalive_idle: float = 2.0
+    keepalive_interval: float = 1.0
+    keepalive_count: int = 3
+
+
+class RobotLinkError(ConnectionError):
+    """
+    Forbindelsen kunne ikke genoprettes inden for resume_timeout.
+
+    Attributter:
+        completed (int): Index på første kommando der IKKE er kvitteret med
+                         DONE – batchen kan genoptages herfra.
+    """
+
+    def __init__(self, message: str, completed: int):
+        super().__init__(message)
+        self.completed = completed
+
+
+class RobotCommandError(RuntimeError):
+    """Robotten svarede med en fejl (ERROR/FAIL) på den aktive kommando."""
+
+
+class RobotClient:
+    """
+    Asynkron klient til robotten.
+
+    Parametre:
+        host (str): Robottens IP-adresse.
+        port (int): Robottens TCP-port.
+        policy (ReconnectPolicy | None): Reconnect-indstillinger.
+        heartbeat (HeartbeatConfig | None): Heartbeat/keepalive-indstillinger.
+        codec (TextCodec | StructCodec | None): Wire-format for kommandoer
+                                                (default: TextCodec).
+
+    Kaster:
+        ValueError hvis heartbeat.message er sat sammen med et binært codec –
+        en tekstlinje midt i struct-framingen ville ødelægge den.
+
+    Metoder:
+        - start(): starter forbindelses-tasken
+        - stop(): lukker forbindelsen og stopper tasken
+        - send_and_wait_done(cmd): sender én kommando og venter på DONE
+        - run_batch(batch, on_progress, confirm): sender alle kommandoer én ad gangen
+    """
+
+    def __init__(self, host: str, port: int,
+                 policy: ReconnectPolicy | None = None,
+                 heartbeat: HeartbeatConfig | None = None,
+                 codec=None):
+        self.host = host
+        self.port = port
+        self.policy = policy or ReconnectPolicy()
+        self.heartbeat = heartbeat or HeartbeatConfig()
+        self.codec = codec or TextCodec()
+        if self.heartbeat.message is not None and not hasattr(self.codec, "encode_line"):
+            raise ValueError(f"Heartbeat-linjen kræver et tekst-codec, ikke {self.codec.name!r} "
+                             f"– brug HeartbeatConfig(message=None) med binært wire-format")
+
+        self._writer: asyncio.StreamWriter | None = None
+        self._connected = asyncio.Event()
+        self._done: asyncio.Future | None = None
+        self._send_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+        self._last_rx = 0.0
+        self._last_hb_tx = 0.0
+        self._cmd_sent_at: float | None = None
+
+    # ------------------------------------------------------------
+    # Livscyklus
+    # ------------------------------------------------------------
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._connection_loop())
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._fail_pending(ConnectionError("Klienten stoppes"))
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close_writer()
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    async def wait_connected(self) -> None:
+        await self._connected.wait()
+
+    # ------------------------------------------------------------
+    # Forbindelse + læsning
+    # ------------------------------------------------------------
+    async def _connection_loop(self) -> None:
+        delay = None
+
+        while not self._stopping:
+            try:
+                print(f"[RobotClient] Forsøger at connecte til {self.host}:{self.port}...")
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port),
+                    timeout=self.policy.connect_timeout,
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                delay = self.policy.next_delay(delay)
+                print(f"[RobotClient] Forbindelsesfejl: {e!r} – prøver igen om {delay:.2f} sek...")
+                await asyncio.sleep(delay)
+                continue
+
+            sock = writer.get_extra_info("socket")
+            if sock is not None:
+                hb = self.heartbeat
+                try:
+                    enable_tcp_keepalive(sock, hb.keepalive_idle,
+                                         hb.keepalive_interval, hb.keepalive_count)
+                except OSError as e:
+                    print(f"[RobotClient] Kunne ikke sætte TCP keepalive: {e!r}")
+
+            print(f"[RobotClient] ✓ Connected til {self.host}:{self.port}")
+            self._writer = writer
+            self._last_rx = time.monotonic()
+            self._last_hb_tx = 0.0
+            self._connected.set()
+            delay = None  # backoff nulstilles ved succes
+
+            watchdog = asyncio.create_task(self._watchdog(writer))
+            try:
+                await self._read_loop(reader)
+            except (OSError, asyncio.IncompleteReadError) as e:
+                print(f"[RobotClient] recv-fejl: {e!r}")
+            finally:
+                watchdog.cancel()
+                self._connected.clear()
+                self._fail_pending(ConnectionError("Forbindelsen til robotten blev afbrudt"))
+                await self._close_writer()
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        while True:
+            data = await reader.read(1024)
+            if not data:
+                print("[RobotClient] Robot lukkede forbindelsen")
+                return
+
+            self._last_rx = time.monotonic()
+
+            text = data.decode("utf-8", errors="replace").strip()
+            if not text:
+                continue
+
+            print(f"[RobotClient] Robot: {text!r}")
+            msg = text.upper()
+
+            if "DONE" in msg:
+                # DONE uden en ventende kommando ignoreres (samme som før)
+                if self._done is not None and not self._done.done():
+                    self._done.set_result(text)
+                continue
+
+            if "ERROR" in msg or "FAIL" in msg:
+                if self._done is not None and not self._done.done():
+                    self._done.set_exception(RobotCommandError(text))
+                continue
+
+            # IDLE, heartbeat-svar m.m. er kun generel status
+
+    async def _watchdog(self, writer: asyncio.StreamWriter) -> None:
+        """
+        Afbryder forbindelsen hvis robotten ikke svarer på heartbeat, eller
+        hvis en kommando ikke kvitteres inden for done_timeout. Læse-løkken
+        opdager afbrydelsen, og reconnect starter med det samme.
+        """
+        hb = self.heartbeat
+        tick = min(hb.interval, 0.5)
+
+        while True:
+            await asyncio.sleep(tick)
+            now = time.monotonic()
+
+            busy = self._cmd_sent_at is not None
+            if busy and hb.done_timeout is not None and now - self._cmd_sent_at > hb.done_timeout:
+                print(f"[RobotClient] Ingen DONE efter {hb.done_timeout:.0f} sek – afbryder forbindelsen")
+                writer.transport.abort()
+                return
+
+            if hb.message is None or busy:
+                continue
+
+            if self._last_hb_tx > self._last_rx and now - self._last_hb_tx > hb.timeout:
+                print(f"[RobotClient] Intet heartbeat-svar i {hb.timeout:.1f} sek – afbryder forbindelsen")
+                writer.transport.abort()
+                return
+
+            if now - max(self._last_rx, self._last_hb_tx) >= hb.interval and not self._send_lock.locked():
+                writer.write(self.codec.encode_line(hb.message))
+                self._last_hb_tx = now
+
+    async def _close_writer(self) -> None:
+        writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    def _fail_pending(self, exc: Exception) -> None:
+        if self._done is not None and not self._done.done():
+            self._done.set_exception(exc)
+
+    # ------------------------------------------------------------
+    # Afsendelse
+    # ------------------------------------------------------------
+    async def send_and_wait_done(self, cmd: PickCommand, on_sent=None, on_acked=None) -> None:
+        """
+    Sender én kommando og venter til robotten svarer "DONE".
+
+    Parametre:
+        cmd (PickCommand): Kommandoen – kodes først her, med self.codec.
+        on_sent (callable | None): Kaldes lige før kommandoen skrives.
+        on_acked (callable | None): Kaldes når robottens TCP-stak har modtaget den.
+
+    Kaster:
+        ConnectionError hvis forbindelsen falder mens kommandoen er i gang.
+        RobotCommandError hvis robotten melder fejl på kommandoen.
+    """
+        payload = self.codec.encode(cmd)
+
+        async with self._send_lock:
+            await self._connected.wait()
+
+            loop = asyncio.get_running_loop()
+            self._done = loop.create_future()
+
+            print(f"[RobotClient] Sender: {cmd} ({self.codec.name}, {len(payload)} B)")
+            if on_sent is not None:
+                on_sent()
+            try:
+                self._writer.write(payload)
+                await self._writer.drain()
+            except (OSError, AttributeError) as e:
+                self._done = None
+                raise ConnectionError(f"Send fejlede: {e!r}") from e
+
+            if on_acked is not None:
+                on_acked()
+            self._cmd_sent_at = time.monotonic()
+            try:
+                await self._done
+            finally:
+                self._done = None
+                self._cmd_sent_at = None
+
+    async def run_batch(self, batch: Batch, on_progress=None, confirm=None) -> Batch:
+        """
+    Afvikler en batch sekventielt: næste kommando sendes først når
+    robotten har svaret DONE på den forrige. Hver kommandos tilstand
+    (sent/acked/done/failed/uncertain) opdateres og journaliseres undervejs.
+
+    Batchen startes altid ved første ikke-færdige kommando, så den samme
+    Batch kan gives igen efter et udfald eller en genstart fra journalen.
+    Falder forbindelsen, genoptages der efter reconnect; lykkes reconnect
+    ikke inden for policy.resume_timeout, kastes RobotLinkError.
+
+    En kommando der var sendt men ikke kvitteret, da forbindelsen faldt,
+    markeres uncertain: robotten kan have flyttet emnet og kun DONE er
+    gået tabt. Den sendes først igen når confirm(idx, cmd) svarer True
+    (emnet ligger der stadig); False markerer den done. Uden confirm
+    sendes den aldrig igen, men markeres failed.
+
+    Parametre:
+        batch (Batch): Batchen der skal afvikles.
+        on_progress (callable | None): Kaldes når en kommando er done/failed.
+        confirm (callable | None): confirm(idx, PickCommand) → bool (må være
+                                   async), fx en operatør-prompt.
+
+    Returnerer:
+        Batch - den færdige batch.
+    """
+        while (idx := batch.next_index()) is not None:
+            cmd = batch.commands[idx]
+            if cmd.state == CmdState.UNCERTAIN and not await self._resolve_uncertain(batch, idx, confirm):
+                if on_progress is not None:
+                    on_progress()
+                continue
+
+            try:
+                await self.send_and_wait_done(
+                    cmd.cmd,
+                    on_sent=lambda i=idx: batch.mark(i, CmdState.SENT),
+                    on_acked=lambda i=idx: batch.mark(i, CmdState.ACKED),
+                )
+            except RobotCommandError as e:
+                print(f"[RobotClient] Robot fejl på kommando {idx + 1}: {e}")
+                batch.mark(idx, CmdState.FAILED)
+            except ConnectionError as e:
+                if batch.mark_in_flight_uncertain():
+                    print(f"[RobotClient] Kommando {idx + 1} blev sendt, men DONE mangler "
+                          f"– markeret uncertain")
+                if self._stopping:
+                    raise
+                print(f"[RobotClient] {e} – genoptager fra kommando {idx + 1}/{len(batch)}")
+                try:
+                    await asyncio.wait_for(self._connected.wait(),
+                                           timeout=self.policy.resume_timeout)
+                except asyncio.TimeoutError:
+                    raise RobotLinkError(
+                        f"Ingen forbindelse efter {self.policy.resume_timeout:.0f} sek", idx
+                    ) from e
+                continue
+            else:
+                batch.mark(idx, CmdState.DONE)
+
+            if on_progress is not None:
+                on_progress()
+
+        print(f"[RobotClient] Batch {batch.batch_id} færdig ({batch.state.value}, {len(batch)} kommandoer)")
+        return batch
+
+    @staticmethod
+    async def _resolve_uncertain(batch: Batch, idx: int, confirm) -> bool:
+        """Afgør en uncertain kommando. Returnerer True hvis den skal sendes igen."""
+        cmd = batch.commands[idx].cmd
+        if confirm is None:
+            print(f"[RobotClient] Kommando {idx + 1} ({cmd}) er uafklaret – sendes ikke igen (failed)")
+            batch.mark(idx, CmdState.FAILED)
+            return False
+
+        answer = confirm(idx, cmd)
+        if inspect.isawaitable(answer):
+            answer = await answer
+        if answer:
+            print(f"[RobotClient] Kommando {idx + 1} bekræftet ikke udført – sender igen")
+            return True
+
+        print(f"[RobotClient] Kommando {idx + 1} bekræftet udført – markeret done")
+        batch.mark(idx, CmdState.DONE)
+        return False
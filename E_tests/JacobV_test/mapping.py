@@ -9,11 +9,13 @@ i 'C_data/calibration_h.npz'.
 Funktionalitet:
 - Indlæsning af homografi-matrix fra fil
 - Konvertering fra (x, y) pixel → (X, Y) robotkoordinater
+- Omvendt konvertering robot → pixel (til overlays)
+- Robust fit (RANSAC/LMEDS) og reprojektionsfejl pr. punkt
 - Intern normalisering og sikkerhedstjek på input
 """
 
+import sys
 import numpy as np
-import cv2 as cv
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, Tuple, List
@@ -21,6 +23,10 @@ from typing import Iterable, Tuple, List
 ROOT = Path(__file__).resolve().parent
 CALIB_PATH = ROOT / "calibration_h.npz"
 
+# A_Vision ligger i projektroden – ét fælles fit (RANSAC + forfining)
+sys.path.append(str(ROOT.parents[1]))
+from A_Vision.Calibration_grid import fit_homography
+
 
 @dataclass
 class HomographyMapper:
@@ -46,21 +52,26 @@ class HomographyMapper:
         cls,
         pixel_points: Iterable[Tuple[float, float]],
         robot_points: Iterable[Tuple[float, float]],
+        method: str = "ransac",
+        reproj_thresh_mm: float = 2.0,
     ) -> "HomographyMapper":
         """
         pixel_points : centroids fundet af vision (x_pix, y_pix)
         robot_points : kendte robot-punkter (X_mm, Y_mm)
+        method       : "ransac" (standard, som fit_homography), "lmeds"
+                       eller "lsq" (alle punkter) – robuste metoder
+                       ignorerer fejl-detekterede prikker og forfiner
+                       derefter på inliers
         """
         pix = np.asarray(list(pixel_points), dtype=np.float32)
         rob = np.asarray(list(robot_points), dtype=np.float32)
 
-        if pix.shape != rob.shape or len(pix) < 4:
-            raise ValueError("We need >= 4 matching pixel <-> robot points.")
-
-        H, _ = cv.findHomography(pix, rob, method=0)
-        if H is None:
-            raise RuntimeError("Homography calculation failed")
+        if pix.shape != rob.shape:
+            raise ValueError(f"pixel_points og robot_points skal have samme form "
+                             f"({pix.shape} ≠ {rob.shape}).")
 
+        # samme fit som Calibration.py / kalibrerings-monitoren
+        H, _, _ = fit_homography(pix, rob, method=method, reproj_thresh_mm=reproj_thresh_mm)
         return cls(H=H)
 
     @classmethod
@@ -114,10 +125,40 @@ class HomographyMapper:
     def pixels_to_robot(
         self, points: Iterable[Tuple[float, float]]
     ) -> np.ndarray:
-        pts = np.asarray(list(points), dtype=float)
+        # ndarray (N, 2) bruges direkte – list() ville lave N små arrays
+        pts = np.asarray(points if isinstance(points, np.ndarray) else list(points),
+                         dtype=float).reshape(-1, 2)
         if len(pts) == 0:
             return np.empty((0, 2))
         homog = np.hstack([pts, np.ones((len(pts), 1))])
         dst = (self.H @ homog.T).T
         XY = dst[:, :2] / dst[:, 2:3]
         return XY
+
+    def residuals(
+        self,
+        pixel_points: Iterable[Tuple[float, float]],
+        robot_points: Iterable[Tuple[float, float]],
+    ) -> np.ndarray:
+        """
+    Afstand i mm mellem mappede pixelpunkter og kendte robotpunkter
+    (reprojektionsfejl pr. punkt).
+    """
+        mapped = self.pixels_to_robot(pixel_points)
+        rob = np.asarray(list(robot_points), dtype=float).reshape(-1, 2)
+        return np.linalg.norm(mapped - rob, axis=1)
+
+    def robot_to_pixels(
+        self, points: Iterable[Tuple[float, float]]
+    ) -> np.ndarray:
+        """
+    Omvendt mapping: robotkoordinater (mm) → pixelkoordinater.
+    Bruges fx til at tegne robottens ventende pluk i overlayet.
+    """
+        pts = np.asarray(list(points), dtype=float)
+        if len(pts) == 0:
+            return np.empty((0, 2))
+        H_inv = np.linalg.inv(self.H)
+        homog = np.hstack([pts, np.ones((len(pts), 1))])
+        dst = (H_inv @ homog.T).T
+        return dst[:, :2] / dst[:, 2:3]
@@ -0,0 +1,192 @@
+"""
+qc_budget.py
+Tidsbudget pr. frame med gradvis nedgradering.
+
+Når bakken er fyldt, bliver run_qc_loop bare langsommere. Linjen har mere
+brug for en forudsigelig cyklustid end for alle debug-vinduer, så
+QCBudget holder øje med frame-tiden og træder ned i denne rækkefølge:
+
+    0 FULL          alt kører
+    1 NO_DEBUG      debug-vinduer (FORM/Size/color/special) springes over
+    2 LOW_DISPLAY   QC-overlay vises kun hver N'te frame
+    3 DOWNSCALED    preprocess kører på nedskaleret frame (masken skaleres op)
+    4 CHANGED_ONLY  size/color/special evalueres kun for nye/ændrede emner
+
+og træder op igen når der er luft.
+
+Funktionalitet:
+- QCBudget.update(frame_ms): vælger niveau ud fra p90 af de seneste frames
+- Egenskaber der styrer loopet: show_debug, display_every, detect_scale,
+  changed_only
+- TrackCache: genbruger resultater for emner der ikke har flyttet sig
+"""
+from collections import deque
+
+import numpy as np
+
+LEVELS = ("FULL", "NO_DEBUG", "LOW_DISPLAY", "DOWNSCALED", "CHANGED_ONLY")
+
+
+class QCBudget:
+    """
+    Frame-budget controller.
+
+    Parametre:
+        budget_ms (float): Mål for samlet frame-tid.
+        window (int): Antal frames der vurderes før et niveauskift.
+        headroom (float): Træd op når p90 < budget_ms * headroom.
+        display_every (int): Vis overlay hver N'te frame fra LOW_DISPLAY.
+        detect_scale (float): Skala for preprocess fra DOWNSCALED.
+        max_level (int): Højeste niveau controlleren må bruge.
+
+    Metoder:
+        - update(frame_ms): registrerer frame-tid, skifter evt. niveau
+        - status(): kort tekst til overlay/print
+    """
+
+    def __init__(self, budget_ms: float = 100.0, window: int = 15, headroom: float = 0.7,
+                 display_every: int = 3, detect_scale: float = 0.5,
+                 max_level: int = len(LEVELS) - 1):
+        self.budget_ms = budget_ms
+        self.window = window
+        self.headroom = headroom
+        self._display_every = display_every
+        self._detect_scale = detect_scale
+        self.max_level = max_level
+
+        self.level = 0
+        self.frame_idx = 0
+        self._times = deque(maxlen=window)
+
+    # ------------------------------------------------------------
+    # Styring af loopet
+    # ------------------------------------------------------------
+    @property
+    def name(self) -> str:
+        return LEVELS[self.level]
+
+    @property
+    def show_debug(self) -> bool:
+        return self.level < 1
+
+    @property
+    def display_every(self) -> int:
+        return self._display_every if self.level >= 2 else 1
+
+    @property
+    def show_display(self) -> bool:
+        """True hvis QC-overlay skal opdateres i denne frame."""
+        return self.frame_idx % self.display_every == 0
+
+    @property
+    def detect_scale(self) -> float:
+        return self._detect_scale if self.level >= 3 else 1.0
+
+    @property
+    def changed_only(self) -> bool:
+        return self.level >= 4
+
+    # ------------------------------------------------------------
+    # Niveau
+    # ------------------------------------------------------------
+    def update(self, frame_ms: float) -> int:
+        """
+    Registrerer frame-tiden og træder ned/op når et helt vindue er
+    over budget / under budget * headroom.
+
+    Returnerer:
+        Det aktive niveau.
+    """
+        self.frame_idx += 1
+        self._times.append(frame_ms)
+        if len(self._times) < self.window:
+            return self.level
+
+        p90 = float(np.percentile(np.fromiter(self._times, dtype=np.float64), 90))
+
+        if p90 > self.budget_ms and self.level < self.max_level:
+            self._set_level(self.level + 1, p90)
+        elif p90 < self.budget_ms * self.headroom and self.level > 0:
+            self._set_level(self.level - 1, p90)
+
+        return self.level
+
+    def _set_level(self, level: int, p90: float) -> None:
+        direction = "ned" if level > self.level else "op"
+        self.level = level
+        self._times.clear()   # nyt niveau skal måles fra bunden
+        print(f"[BUDGET] Træder {direction} → {level} {self.name} "
+              f"(p90 {p90:.1f} ms, budget {self.budget_ms:.0f} ms)")
+
+    def status(self) -> str:
+        return f"budget L{self.level} {self.name} ({self.budget_ms:.0f} ms)"
+
+
+class TrackCache:
+    """
+    Genbruger size/color/special-resultater for emner der ikke har ændret sig.
+
+    Et emne er "uændret" hvis centret har flyttet sig mindre end
+    max_shift_px og arealet mindre end max_area_change siden sidste frame.
+
+    Parametre:
+        max_shift_px (float): Maks. flytning af centret.
+        max_area_change (float): Maks. relativ arealændring.
+
+    Metoder:
+        - evaluate(form_results, evaluate_fn, enabled): kører evaluate_fn
+          på nye/ændrede emner og fletter med cachede resultater
+    """
+
+    def __init__(self, max_shift_px: float = 3.0, max_area_change: float = 0.03):
+        self.max_shift_px = max_shift_px
+        self.max_area_change = max_area_change
+
+        self._centers = np.empty((0, 2))
+        self._areas = np.empty(0)
+        self._results = []   # (size, color, special) pr. cachet emne
+
+    def _match(self, form_results) -> list:
+        """Index i cachen for hvert emne, eller None hvis nyt/ændret."""
+        if not form_results or len(self._centers) == 0:
+            return [None] * len(form_results)
+
+        centers = np.array([fr["center"] for fr in form_results], dtype=float)
+        areas = np.array([fr["area"] for fr in form_results], dtype=float)
+
+        d = np.linalg.norm(centers[:, None, :] - self._centers[None, :, :], axis=2)
+        nearest = d.argmin(axis=1)
+        dist = d[np.arange(len(centers)), nearest]
+        area_change = np.abs(areas - self._areas[nearest]) / np.maximum(areas, 1.0)
+
+        hit = (dist <= self.max_shift_px) & (area_change <= self.max_area_change)
+        return [int(n) if h else None for n, h in zip(nearest, hit)]
+
+    def evaluate(self, form_results, evaluate_fn, enabled: bool = True):
+        """
+    Parametre:
+        form_results (list): Fra QCForm.
+        evaluate_fn (callable): evaluate_fn(forms) → (size, color, special)
+        enabled (bool): False = evaluér alle emner (cachen holdes stadig varm).
+
+    Returnerer:
+        (size_results, color_results, special_results) for alle emner.
+    """
+        matches = self._match(form_results) if enabled else [None] * len(form_results)
+        fresh = [i for i, m in enumerate(matches) if m is None]
+
+        size_new, color_new, special_new = evaluate_fn([form_results[i] for i in fresh])
+        fresh_results = dict(zip(fresh, zip(size_new, color_new, special_new)))
+
+        merged = [fresh_results[i] if m is None else self._results[m]
+                  for i, m in enumerate(matches)]
+
+        # cachen afspejler altid seneste frame
+        self._centers = np.array([fr["center"] for fr in form_results], dtype=float).reshape(-1, 2)
+        self._areas = np.array([fr["area"] for fr in form_results], dtype=float)
+        self._results = merged
+
+        if not merged:
+            return [], [], []
+        size_results, color_results, special_results = (list(x) for x in zip(*merged))
+        return size_results, color_results, special_results
@@ -11,6 +11,10 @@ ROOT = Path(__file__).resolve().parents[2]  # Doosan-Vision-QC/
 sys.path.append(str(ROOT))
 
 from A_Vision.Vision_tools import load_image  # adjust if needed
+from A_Vision.Calibration_grid import (
+    dot_centers, fit_homography, grid_correspondences, print_report,
+)
+from A_Vision.Calibration_store import Calibration, CalibrationStore
 
 SETTINGS_FILE = "calibration_settings_dots.json"
 IMG_NAME = "frame_1764685940878.png"   # your saved calibration frame
@@ -40,52 +44,25 @@ print(f"[CONFIG] HSV lower={lower}, upper={upper}, blur_k={blur_k}, min_area={mi
 blurred = cv.GaussianBlur(hsv, (blur_k, blur_k), 0)
 mask = cv.inRange(blurred, lower, upper)
 
-contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
-
-img_points = []
-for cnt in contours:
-    if cv.contourArea(cnt) < min_area:
-        continue
-
-    M = cv.moments(cnt)
-    if M["m00"] == 0:
-        continue
-
-    cx = M["m10"] / M["m00"]
-    cy = M["m01"] / M["m00"]
-    img_points.append([cx, cy])
+# sub-pixel: intensitets-vægtede momenter på S-kanalen inden for hver prik
+img_points = dot_centers(mask, min_area=min_area, method="weighted",
+                         weight=cv.bitwise_and(np.ascontiguousarray(blurred[..., 1]), mask))
 
 print(f"[DETECTED] {len(img_points)} points")
 
+if len(img_points) < 4:
+    raise ValueError(f"Need at least 4 calibration dots, got {len(img_points)}.")
 if len(img_points) != 20:
-    raise ValueError(f"Expected 20 calibration dots, got {len(img_points)}.")
+    print(f"[WARN] Expected 20 calibration dots, got {len(img_points)} – fitting on the ones found.")
 
 # -------------------------------------------------
 # SORT INTO 4 ROWS × 5 COLS (ROW-MAJOR)
 # -------------------------------------------------
-# sort by Y (top→bottom), then X (left→right)
-img_points = sorted(img_points, key=lambda p: (p[1], p[0]))
-
-rows = []
-row = [img_points[0]]
-for p in img_points[1:]:
-    if abs(p[1] - row[-1][1]) < 25:   # row tolerance in pixels
-        row.append(p)
-    else:
-        rows.append(row)
-        row = [p]
-rows.append(row)
-
-if len(rows) != 4:
-    raise ValueError(f"Expected 4 rows, got {len(rows)}")
-
-for i in range(4):
-    if len(rows[i]) != 5:
-        raise ValueError(f"Row {i} has {len(rows[i])} points (expected 5)")
-    rows[i] = sorted(rows[i], key=lambda p: p[0])
-
-ordered_points = [p for row in rows for p in row]
-pixels = np.array(ordered_points, dtype=np.float32)
+# PCA-akser i stedet for sort-by-Y med fast rækketolerance – tåler
+# en roteret plade og manglende prikker
+pixels, robot_points, cells = grid_correspondences(img_points)
+ordered_points = [tuple(p) for p in pixels]
+
 debug = img.copy()
 for i, (x, y) in enumerate(ordered_points, start=1):
     cv.circle(debug, (int(x), int(y)), 12, (0, 0, 255), -1)
@@ -104,29 +81,26 @@ cv.imshow("Detected Dots (sorted 4x5)", preview)
 cv.waitKey(500)
 
 # -------------------------------------------------
-# ROBOT COORDINATES (4 rows × 5 cols)
-# -------------------------------------------------
-robot_points = np.array([
-    [0.0,    420.0], [112.5, 420.0], [225.0, 420.0], [337.5, 420.0], [450.0, 420.0],
-    [0.0,    280.0], [112.5, 280.0], [225.0, 280.0], [337.5, 280.0], [450.0, 280.0],
-    [0.0,    140.0], [112.5, 140.0], [225.0, 140.0], [337.5, 140.0], [450.0, 140.0],
-    [0.0,      0.0], [112.5,   0.0], [225.0,   0.0], [337.5,   0.0], [450.0,   0.0],
-], dtype=np.float32)
-
-
-
-# -------------------------------------------------
-# COMPUTE HOMOGRAPHY
+# ROBOT COORDINATES: Calibration_grid.ROBOT_GRID (4 rows × 5 cols)
+# COMPUTE HOMOGRAPHY (RANSAC + refit på inliers, residual pr. punkt)
 # -------------------------------------------------
-H, _ = cv.findHomography(pixels, robot_points)
+H, inliers, residuals = fit_homography(pixels, robot_points, method="ransac")
+print_report(pixels, robot_points, inliers, residuals, cells)
 out_path = ROOT / "C_data" / "calibration_h.npz"
 np.savez(out_path, H=H)
 
 print(f"[SAVED] Homography matrix → {out_path}")
+
+# ny version i registret – et kørende qc_main skifter den ind uden genstart
+store = CalibrationStore()
+current = store.current()
+rms = float(np.sqrt(np.mean(residuals[inliers] ** 2)))
+calib = current.with_changes(H=H) if current is not None else Calibration(H=H)
+store.publish(calib, note=f"qc_calibration_dots {IMG_NAME} ({rms:.2f} mm RMS)")
 print("H =\n", H)
 
 # -------------------------------------------------
-# TEST: PRINT PIXEL → ROBOT FOR ALL 20 DOTS
+# TEST: PRINT PIXEL → ROBOT FOR ALL DETECTED DOTS
 # -------------------------------------------------
 print("\n[Test] Pixel → Robot mapping:")
 for i, (px, py) in enumerate(ordered_points):
@@ -0,0 +1,197 @@
+"""
+qc_calibration_monitor.py
+Kalibrerings-kvalitet og drift-overvågning under produktion.
+
+Når calibration_h.npz er skrevet, bliver den aldrig tjekket igen – et
+kamera der får et skub giver bare en stille strøm af forbiplukkede emner.
+CalibrationMonitor finder med lav rate kalibreringsprikkerne i live-
+frames, mapper dem gennem den aktive homografi og sammenligner med de
+kendte robotkoordinater (ROBOT_GRID):
+
+- reprojektionsfejl (RMS / max i mm) pr. tjek, rullende historik
+- advarsel når RMS overstiger warn_mm
+- hurtig inkrementel re-fit (tast 'k' i qc_main): RANSAC på prikkerne
+  fra de seneste tjek – uden at stoppe loopet
+
+Prikker der er dækket af emner springes bare over; et tjek kræver
+mindst min_dots prikker med mindst én i hver række og kolonne. Tjek der
+ikke kan gennemføres tælles (skipped) og logges, så en monitor der i
+praksis er blind kan ses i konsollen og på overlayet.
+
+Funktionalitet:
+- CalibrationMonitor.maybe_check(frame, mapper): tjek hver every_n frame
+- CalibrationMonitor.check(frame, mapper): tjek nu → dict eller None
+- CalibrationMonitor.refit(): ny HomographyMapper fra seneste tjek
+- CalibrationMonitor.status(): kort tekst til overlay
+- CalibrationMonitor.use_settings(cfg): prik-HSV fra kalibrerings-versionen
+"""
+import json
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent
+DOT_SETTINGS_FILE = ROOT / "calibration_settings_dots.json"
+
+# A_Vision ligger i projektroden
+sys.path.append(str(ROOT.parents[1]))
+from A_Vision.Calibration_grid import ROBOT_GRID, dot_centers, fit_homography, grid_correspondences
+from A_Vision.Vision_buffers import BufferPool
+from A_Vision.Vision_lut import lut_from_settings
+
+from mapping import HomographyMapper
+
+
+class CalibrationMonitor:
+    """
+    Overvåger homografiens nøjagtighed mod kalibreringsprikkerne.
+
+    Parametre:
+        settings_path (Path): HSV-settings for prikkerne.
+        every_n (int): Frames mellem tjek.
+        warn_mm (float): RMS-grænse for advarsel.
+        min_dots (int): Mindste antal prikker for et gyldigt tjek.
+        history (int): Antal tjek der huskes (til trend og re-fit).
+        refit_checks (int): Antal seneste tjek hvis prikker bruges i re-fit.
+
+    Metoder:
+        - maybe_check(frame, mapper): kører check() hver every_n kald
+        - check(frame, mapper): detekterer prikker og måler fejlen
+        - refit(): HomographyMapper fittet på de seneste tjeks prikker
+        - status(): tekst til overlay
+        - use_settings(cfg): skifter prik-HSV (None = settings_path igen)
+
+    Attributter:
+        skipped (dict): Antal oversprungne tjek pr. årsag
+                        ("few_dots", "no_grid").
+    """
+
+    def __init__(self, settings_path=DOT_SETTINGS_FILE, every_n: int = 150,
+                 warn_mm: float = 2.0, min_dots: int = 8, history: int = 100,
+                 refit_checks: int = 5):
+        self.settings_path = settings_path
+        self.use_settings(None)
+
+        self.every_n = every_n
+        self.warn_mm = warn_mm
+        self.min_dots = min_dots
+        self.refit_checks = refit_checks
+
+        self.history = deque(maxlen=history)   # dicts fra check()
+        self.drifted = False
+        self._calls = 0
+        self._points = deque(maxlen=refit_checks)   # (pixels, robot) pr. tjek
+
+        self.skipped = {"few_dots": 0, "no_grid": 0}
+        self._skip_streak = 0
+        self._pool = BufferPool(max_buffers=8)       # maske + LUT-index pr. tjek
+
+    def use_settings(self, cfg):
+        """Prik-HSV fra cfg (fx Calibration.hsv["dots"]) – None = læs settings_path."""
+        if cfg is None:
+            with open(self.settings_path, "r") as f:
+                cfg = json.load(f)
+
+        # samme grænser som qc_calibration_dots.py
+        self.lut = lut_from_settings(cfg)
+        self.min_area = max(23, int(cfg.get("min_area", 20)))
+
+    # ------------------------------------------------------------
+    # Tjek
+    # ------------------------------------------------------------
+    def maybe_check(self, frame, mapper):
+        """Kører check() hver every_n kald. Returnerer resultatet eller None."""
+        self._calls += 1
+        if mapper is None or (self._calls - 1) % self.every_n:
+            return None
+        return self.check(frame, mapper)
+
+    def check(self, frame, mapper):
+        """
+    Detekterer prikkerne og måler reprojektionsfejlen.
+
+    Returnerer:
+        {"t", "n", "rms_mm", "max_mm"} eller None hvis tjekket blev
+        sprunget over (for få prikker / ingen grid-ordning).
+    """
+        mask = self.lut.mask(frame, pool=self._pool)
+        centers = dot_centers(mask, min_area=self.min_area, method="moments")
+        if len(centers) < self.min_dots:
+            return self._skip("few_dots", f"{len(centers)} prikker < {self.min_dots}")
+
+        try:
+            pixels, robot, _ = grid_correspondences(centers, ROBOT_GRID)
+        except ValueError as exc:
+            # emner dækker en hel række/kolonne – prøv igen senere
+            return self._skip("no_grid", str(exc))
+
+        if self._skip_streak:
+            print(f"[CALIB] Tjek kører igen efter {self._skip_streak} oversprungne")
+            self._skip_streak = 0
+
+        err = mapper.residuals(pixels, robot)
+        result = {
+            "t": time.time(),
+            "n": int(len(err)),
+            "rms_mm": float(np.sqrt(np.mean(err ** 2))),
+            "max_mm": float(err.max()),
+        }
+        self.history.append(result)
+        self._points.append((pixels, robot))
+
+        drifted = result["rms_mm"] > self.warn_mm
+        if drifted and not self.drifted:
+            print(f"[CALIB WARN] Reprojektionsfejl {result['rms_mm']:.2f} mm RMS "
+                  f"(max {result['max_mm']:.2f} mm, {result['n']} prikker) > {self.warn_mm} mm "
+                  f"– kameraet kan have flyttet sig. Tryk 'k' for re-fit.")
+        elif not drifted and self.drifted:
+            print(f"[CALIB] Fejlen er tilbage under grænsen ({result['rms_mm']:.2f} mm RMS)")
+        self.drifted = drifted
+        return result
+
+    def _skip(self, reason: str, detail: str):
+        """Tæller et oversprunget tjek og logger første, 10. og hvert 100. i træk."""
+        self.skipped[reason] += 1
+        self._skip_streak += 1
+        if self._skip_streak in (1, 10) or self._skip_streak % 100 == 0:
+            total = sum(self.skipped.values())
+            print(f"[CALIB] Tjek sprunget over: {detail} "
+                  f"({self._skip_streak} i træk, {total} i alt)")
+        return None
+
+    # ------------------------------------------------------------
+    # Re-fit
+    # ------------------------------------------------------------
+    def refit(self, method: str = "ransac"):
+        """
+    Fitter en ny homografi på prikkerne fra de seneste refit_checks tjek.
+
+    Returnerer:
+        (HomographyMapper, RMS i mm) – eller (None, None) uden data.
+    """
+        if not self._points:
+            print("[CALIB] Ingen prik-observationer endnu – kan ikke re-fitte")
+            return None, None
+
+        pixels = np.concatenate([p for p, _ in self._points])
+        robot = np.concatenate([r for _, r in self._points])
+        H, inliers, err = fit_homography(pixels, robot, method=method)
+
+        rms = float(np.sqrt(np.mean(err[inliers] ** 2)))
+        print(f"[CALIB] Re-fit på {int(inliers.sum())}/{len(inliers)} observationer: {rms:.2f} mm RMS")
+
+        # nye tjek skal måles mod den nye homografi
+        self._points.clear()
+        self.drifted = False
+        return HomographyMapper(H=H), rms
+
+    def status(self) -> str:
+        skip = f" skip {self._skip_streak}" if self._skip_streak else ""
+        if not self.history:
+            return f"cal –{skip}"
+        last = self.history[-1]
+        flag = " DRIFT" if self.drifted else ""
+        return f"cal {last['rms_mm']:.2f} mm ({last['n']} dots){flag}{skip}"
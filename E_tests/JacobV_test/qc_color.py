@@ -2,6 +2,9 @@
 import numpy as np
 import cv2 as cv
 
+from qc_results import ColorResult
+from qc_color_model import part_pixels
+
 
 class QCColor:
     """
@@ -11,11 +14,16 @@ class QCColor:
         - Brug fast reference LAB
         - Brug fast tolerance
         - Ingen autotune / ingen automatiske ændringer
+
+    Med en lært ColorModel (qc_color_model.py) scores emnerne i stedet
+    mod farvefordelingen (Mahalanobis eller CIEDE2000), og andelen af
+    outlier-pixels pr. emne fanger delvis misfarvning.
     """
 
     def __init__(self,
                  reference_lab=np.array([107.30393, 187.07338, 160.88551]),
-                 tolerance_dE=25.0):
+                 tolerance_dE=25.0,
+                 model=None):
         """
         reference_lab:
             Den forventede LAB-farve for et korrekt, rødt emne.
@@ -23,9 +31,14 @@ class QCColor:
 
         tolerance_dE:
             Max tilladt ΔE for at emnet godkendes.
+
+        model:
+            Valgfri ColorModel. Når den er sat, ignoreres reference_lab og
+            tolerance_dE, og modellens metric/tolerance bruges.
         """
         self.reference_lab = np.array(reference_lab, dtype=np.float32)
         self.tolerance_dE = tolerance_dE
+        self.model = model
 
     # ------------------------------------------------------------
     # ΔE funktion (CIE76)
@@ -38,33 +51,40 @@ class QCColor:
     # Evaluer farve for alle objekter
     # ------------------------------------------------------------
     def evaluate_all(self, frame_bgr, form_results):
-
-        lab_frame = cv.cvtColor(frame_bgr, cv.COLOR_BGR2LAB)
-        color_results = []
-
-        for fr in form_results:
-
-            box = fr["bbox_points"]
-            mask = np.zeros(frame_bgr.shape[:2], dtype=np.uint8)
-            cv.drawContours(mask, [box], -1, 255, -1)
-
-            # LAB ROI
-            lab_pixels = lab_frame[mask == 255]
-            mean_lab = np.mean(lab_pixels, axis=0)
-
-            # ΔE
-            dE = self.deltaE(mean_lab, self.reference_lab)
-            valid_color = dE <= self.tolerance_dE
-            reason = "OK" if valid_color else f"ΔE={dE:.1f} > {self.tolerance_dE}"
-
-            color_results.append({
-                "mean_lab": mean_lab,
-                "deltaE": dE,
-                "valid_color": valid_color,
-                "reason": reason
-            })
-
-        return color_results
+        # LAB kun inden for hvert emnes ROI – ingen fuld-frame konvertering
+        # eller fuld-frame maske pr. emne
+        samples = part_pixels(frame_bgr, form_results)
+        means = np.array([px.mean(axis=0) if len(px) else np.full(3, np.nan) for px in samples],
+                         dtype=np.float64).reshape(-1, 3)
+
+        if self.model is None:
+            scores = np.linalg.norm(means - self.reference_lab, axis=1)
+            tolerance = self.tolerance_dE
+            outliers = np.zeros(len(samples))
+            max_outliers = 1.0
+            metric = "ΔE"
+        else:
+            # én vektoriseret scoring for alle emner i framen
+            scores = self.model.score(means)
+            tolerance = self.model.tolerance
+            outliers = np.array([self.model.outlier_fraction(px) for px in samples])
+            max_outliers = self.model.max_outlier_frac
+            metric = self.model.label
+
+        valid = (scores <= tolerance) & (outliers <= max_outliers)
+
+        return [
+            ColorResult(
+                mean_lab=mean_lab,
+                deltaE=float(dE),
+                valid_color=bool(ok),
+                tolerance_dE=tolerance,
+                outlier_frac=float(frac),
+                max_outlier_frac=max_outliers,
+                metric=metric,
+            )
+            for mean_lab, dE, ok, frac in zip(means, scores, valid, outliers)
+        ]
 
     # ------------------------------------------------------------
     # Overlay
@@ -0,0 +1,308 @@
+"""
+qc_color_model.py
+Lært farvemodel pr. emnetype til QCColor.
+
+QCColor sammenligner som standard middel-LAB med én fast reference
+(euklidisk afstand på OpenCV's 8-bit LAB-skala). Det fanger hverken at
+farven naturligt varierer mere i nogle retninger end andre, eller at kun
+en del af emnet er misfarvet (middelværdien flytter sig næsten ikke).
+
+ColorModel lærer i stedet fordelingen fra et sæt kendte, gode emner:
+
+- mean + kovarians MELLEM emner (af emnernes middel-LAB) – det er den
+  spredning et emnes middel faktisk har. Pixel-kovariansen er ~N gange
+  større (σ_middel ≈ σ_pixel/√N), så scores middelværdien mod den, bliver
+  "3σ" langt løsere end det ser ud til
+- pixel-kovarians (alle emne-pixels) til outlier-tjekket; begge inverse
+  beregnes én gang ved fit/load
+- score pr. emne (vektoriseret over alle emner i framen):
+      "mahalanobis"  afstand af emnets middel-LAB i σ-enheder (mellem-emne)
+      "ciede2000"    ΔE00 mellem emnets og modellens middel (CIE L*a*b*)
+- outlier-andel pr. emne: andel af pixels med Mahalanobis² (pixel-
+  kovarians) over pixel_chi2 – fanger delvis misfarvning
+
+Omkostningen pr. emne er den samme størrelsesorden som middelværdien:
+én 3×3-kvadratisk form pr. pixel på emnets ROI.
+
+Brug:
+    model = ColorModel.fit([pixels_emne1, pixels_emne2, ...])
+    model.save(COLOR_MODEL_PATH)
+    qc_color = QCColor(model=ColorModel.load(COLOR_MODEL_PATH))
+
+Lær fra sample-billeder (frame + maske pr. par):
+    python qc_color_model.py frame1.png mask1.png frame2.png mask2.png
+"""
+import json
+import sys
+from pathlib import Path
+
+import cv2 as cv
+import numpy as np
+
+METRICS = ("mahalanobis", "ciede2000")
+
+# χ²(3) – 99.9 % af en normalfordelt farve ligger indenfor
+CHI2_3DOF_999 = 16.27
+
+COLOR_MODEL_PATH = Path(__file__).resolve().parents[2] / "C_data" / "color_model.json"
+
+
+# ======================================================
+# FARVEMATEMATIK
+# ======================================================
+def lab8_to_cie(lab) -> np.ndarray:
+    """OpenCV 8-bit LAB (L·255/100, a+128, b+128) → CIE L*a*b*."""
+    lab = np.asarray(lab, dtype=np.float64)
+    out = np.empty_like(lab)
+    out[..., 0] = lab[..., 0] * (100.0 / 255.0)
+    out[..., 1:] = lab[..., 1:] - 128.0
+    return out
+
+
+def ciede2000(lab1, lab2) -> np.ndarray:
+    """
+    CIEDE2000 farveforskel, vektoriseret.
+
+    Parametre:
+        lab1, lab2: CIE L*a*b* med shape (..., 3) – broadcastes mod hinanden.
+
+    Returnerer:
+        ΔE00 med shape (...).
+    """
+    lab1 = np.asarray(lab1, dtype=np.float64)
+    lab2 = np.asarray(lab2, dtype=np.float64)
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    c_bar = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2.0
+    c7 = c_bar ** 7
+    g = 0.5 * (1.0 - np.sqrt(c7 / (c7 + 25.0 ** 7)))
+    a1p = (1.0 + g) * a1
+    a2p = (1.0 + g) * a2
+
+    c1p = np.hypot(a1p, b1)
+    c2p = np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360.0
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360.0
+    chroma_zero = (c1p * c2p) == 0
+
+    dLp = L2 - L1
+    dCp = c2p - c1p
+    dhp = h2p - h1p
+    dhp = np.where(dhp > 180.0, dhp - 360.0, dhp)
+    dhp = np.where(dhp < -180.0, dhp + 360.0, dhp)
+    dhp = np.where(chroma_zero, 0.0, dhp)
+    dHp = 2.0 * np.sqrt(c1p * c2p) * np.sin(np.radians(dhp / 2.0))
+
+    L_bar = (L1 + L2) / 2.0
+    c_barp = (c1p + c2p) / 2.0
+    h_sum = h1p + h2p
+    h_barp = np.where(np.abs(h1p - h2p) > 180.0,
+                      np.where(h_sum < 360.0, h_sum + 360.0, h_sum - 360.0) / 2.0,
+                      h_sum / 2.0)
+    h_barp = np.where(chroma_zero, h_sum, h_barp)
+
+    t = (1.0
+         - 0.17 * np.cos(np.radians(h_barp - 30.0))
+         + 0.24 * np.cos(np.radians(2.0 * h_barp))
+         + 0.32 * np.cos(np.radians(3.0 * h_barp + 6.0))
+         - 0.20 * np.cos(np.radians(4.0 * h_barp - 63.0)))
+    d_theta = 30.0 * np.exp(-(((h_barp - 275.0) / 25.0) ** 2))
+    c7p = c_barp ** 7
+    r_c = 2.0 * np.sqrt(c7p / (c7p + 25.0 ** 7))
+    s_l = 1.0 + (0.015 * (L_bar - 50.0) ** 2) / np.sqrt(20.0 + (L_bar - 50.0) ** 2)
+    s_c = 1.0 + 0.045 * c_barp
+    s_h = 1.0 + 0.015 * c_barp * t
+    r_t = -np.sin(np.radians(2.0 * d_theta)) * r_c
+
+    tl, tc, th = dLp / s_l, dCp / s_c, dHp / s_h
+    return np.sqrt(tl ** 2 + tc ** 2 + th ** 2 + r_t * tc * th)
+
+
+# ======================================================
+# MODEL
+# ======================================================
+class ColorModel:
+    """
+    Farvefordeling for én emnetype (8-bit LAB som cv.COLOR_BGR2LAB).
+
+    Parametre:
+        mean (array): Middel-LAB (3,).
+        cov (array): Kovarians af emnernes middel-LAB (3, 3) – til score().
+        pixel_cov (array | None): Pixel-kovarians (3, 3) – til outliers.
+                                  None = cov (gamle modelfiler).
+        metric (str): "mahalanobis" (σ-enheder) eller "ciede2000" (ΔE00).
+        tolerance (float): Maks. score for et godkendt emne.
+        pixel_chi2 (float): Mahalanobis²-grænse for en outlier-pixel.
+        max_outlier_frac (float): Maks. andel outlier-pixels pr. emne.
+        n_parts (int): Antal emner modellen er lært fra (info).
+
+    Metoder:
+        - fit(samples): lærer model fra pixel-arrays af gode emner
+        - score(means): score for alle emner på én gang
+        - outlier_fraction(lab_pixels): andel outlier-pixels for ét emne
+        - save(path) / load(path)
+    """
+
+    def __init__(self, mean, cov, metric: str = "mahalanobis", tolerance: float = 3.0,
+                 pixel_chi2: float = CHI2_3DOF_999, max_outlier_frac: float = 0.15,
+                 n_parts: int = 0, pixel_cov=None):
+        if metric not in METRICS:
+            raise ValueError(f"Ukendt metric '{metric}' – vælg en af {METRICS}")
+
+        self.mean = np.asarray(mean, dtype=np.float64).reshape(3)
+        self.cov = np.asarray(cov, dtype=np.float64).reshape(3, 3)
+        self.metric = metric
+        self.tolerance = float(tolerance)
+        self.pixel_chi2 = float(pixel_chi2)
+        self.max_outlier_frac = float(max_outlier_frac)
+        self.n_parts = int(n_parts)
+
+        if pixel_cov is None:
+            # modelfil fra før mellem-emne-kovariansen – score er for løs
+            print("[COLOR MODEL] Ingen pixel_cov i modellen – lær den igen (qc_color_model.py)")
+            pixel_cov = self.cov
+        self.pixel_cov = np.asarray(pixel_cov, dtype=np.float64).reshape(3, 3)
+
+        # forudberegnet én gang – scoring er så kun matrix-produkter
+        self.inv_cov = np.linalg.inv(self.cov)
+        self.inv_pixel_cov = np.linalg.inv(self.pixel_cov)
+        self.mean_cie = lab8_to_cie(self.mean)
+
+    @property
+    def label(self) -> str:
+        return "σ" if self.metric == "mahalanobis" else "ΔE00"
+
+    # ------------------------------------------------------------
+    # Læring
+    # ------------------------------------------------------------
+    @classmethod
+    def fit(cls, samples, reg: float = 1.0, **kwargs) -> "ColorModel":
+        """
+    Parametre:
+        samples (list): LAB-pixels (N_i, 3) pr. kendt godt emne.
+        reg (float): Lægges til begge kovariansers diagonal, så en meget
+                     ensartet farve (eller få emner) ikke giver en
+                     singulær matrix – og sætter et gulv på σ i LAB-enheder.
+        **kwargs: metric, tolerance, ... til ColorModel.
+
+    Returnerer:
+        ColorModel.
+    """
+        samples = [np.asarray(s, dtype=np.float64).reshape(-1, 3) for s in samples if len(s)]
+        if not samples:
+            raise ValueError("Ingen pixels at lære farvemodel fra")
+
+        pixels = np.concatenate(samples)
+        pixel_cov = np.cov(pixels, rowvar=False) + np.eye(3) * reg
+
+        part_means = np.array([s.mean(axis=0) for s in samples])
+        mean = part_means.mean(axis=0)
+        if len(samples) >= 2:
+            cov = np.cov(part_means, rowvar=False) + np.eye(3) * reg
+        else:
+            # ét emne: kun middelværdiens standardfejl (σ_pixel/√N) at gå efter
+            cov = (pixel_cov - np.eye(3) * reg) / len(pixels) + np.eye(3) * reg
+        return cls(mean, cov, n_parts=len(samples), pixel_cov=pixel_cov, **kwargs)
+
+    # ------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------
+    def mahalanobis(self, lab) -> np.ndarray:
+        """Mahalanobis-afstand for LAB-værdier med shape (N, 3)."""
+        d = np.asarray(lab, dtype=np.float64).reshape(-1, 3) - self.mean
+        return np.sqrt(np.einsum("ni,ij,nj->n", d, self.inv_cov, d))
+
+    def score(self, means) -> np.ndarray:
+        """Score for alle emners middel-LAB (N, 3) i én operation."""
+        means = np.asarray(means, dtype=np.float64).reshape(-1, 3)
+        if self.metric == "mahalanobis":
+            return self.mahalanobis(means)
+        return ciede2000(lab8_to_cie(means), self.mean_cie)
+
+    def outlier_fraction(self, lab_pixels) -> float:
+        """Andel af emnets pixels der ligger uden for pixel_chi2."""
+        d = np.asarray(lab_pixels, dtype=np.float32).reshape(-1, 3) - self.mean.astype(np.float32)
+        if len(d) == 0:
+            return 0.0
+        d2 = np.einsum("ni,ij,nj->n", d, self.inv_pixel_cov.astype(np.float32), d)
+        return float(np.count_nonzero(d2 > self.pixel_chi2)) / len(d)
+
+    # ------------------------------------------------------------
+    # Persistens
+    # ------------------------------------------------------------
+    def to_dict(self) -> dict:
+        return {
+            "mean": self.mean.tolist(),
+            "cov": self.cov.tolist(),
+            "pixel_cov": self.pixel_cov.tolist(),
+            "metric": self.metric,
+            "tolerance": self.tolerance,
+            "pixel_chi2": self.pixel_chi2,
+            "max_outlier_frac": self.max_outlier_frac,
+            "n_parts": self.n_parts,
+        }
+
+    def save(self, path=COLOR_MODEL_PATH) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        print(f"[COLOR MODEL] Gemt → {path}")
+
+    @classmethod
+    def load(cls, path=COLOR_MODEL_PATH) -> "ColorModel":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+def part_pixels(frame_bgr, form_results) -> list[np.ndarray]:
+    """LAB-pixels (N_i, 3) inden for hvert emnes minAreaRect (ROI-begrænset)."""
+    samples = []
+    for fr in form_results:
+        box = fr["bbox_points"]
+        x, y, w, h = cv.boundingRect(box)
+        x2, y2 = x + w, y + h
+        x, y = max(x, 0), max(y, 0)
+        roi = frame_bgr[y:y2, x:x2]
+        if roi.size == 0:
+            samples.append(np.empty((0, 3), dtype=np.uint8))
+            continue
+
+        mask = np.zeros(roi.shape[:2], dtype=np.uint8)
+        cv.drawContours(mask, [box - (x, y)], -1, 255, -1)
+        lab = cv.cvtColor(roi, cv.COLOR_BGR2LAB)
+        samples.append(lab[mask > 0])
+    return samples
+
+
+# ======================================================
+# CLI – lær model fra kendte gode emner
+# ======================================================
+if __name__ == "__main__":
+    from qc_form import QCForm
+
+    args = sys.argv[1:]
+    if not args or len(args) % 2:
+        print("Brug: python qc_color_model.py frame1.png mask1.png [frame2.png mask2.png ...]")
+        sys.exit(1)
+
+    qc_form = QCForm(min_area=1500, min_aspect=2.0, max_aspect=7.0,
+                     min_solidity=0.88, min_extent=0.90)
+
+    samples = []
+    for frame_path, mask_path in zip(args[0::2], args[1::2]):
+        frame = cv.imread(frame_path)
+        mask = cv.imread(mask_path, cv.IMREAD_GRAYSCALE)
+        if frame is None or mask is None:
+            print(f"[COLOR MODEL] Kunne ikke læse {frame_path} / {mask_path} – springer over")
+            continue
+
+        # kun emner der består form-QC bruges som "kendt gode"
+        good = [fr for fr in qc_form.evaluate_all(mask) if fr["valid"]]
+        samples.extend(part_pixels(frame, good))
+        print(f"[COLOR MODEL] {frame_path}: {len(good)} emner")
+
+    model = ColorModel.fit(samples)
+    print(f"[COLOR MODEL] mean LAB = {np.round(model.mean, 2)} fra {model.n_parts} emner")
+    model.save()
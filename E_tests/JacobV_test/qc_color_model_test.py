@@ -0,0 +1,51 @@
+# qc_color_model_test.py
+# Kør fra E_tests/JacobV_test: python qc_color_model_test.py (eller pytest)
+import numpy as np
+
+from qc_color_model import ColorModel
+
+REF = np.array([107.30, 187.07, 160.88])
+PIXEL_SIGMA = 5.0    # støj pr. pixel
+PART_SIGMA = 1.0     # naturlig variation mellem gode emner
+
+
+def good_parts(n_parts=30, n_pixels=800, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.normal(REF + rng.normal(0.0, PART_SIGMA, 3), PIXEL_SIGMA, (n_pixels, 3))
+            for _ in range(n_parts)]
+
+
+def test_good_part_is_accepted():
+    model = ColorModel.fit(good_parts())
+    part = np.random.default_rng(1).normal(REF, PIXEL_SIGMA, (800, 3))
+    assert model.score([part.mean(axis=0)])[0] <= model.tolerance
+
+
+def test_shifted_mean_is_rejected():
+    """Hele emnet 6 LAB-enheder væk – kun ~1.2 pixel-σ, men langt uden for gode emners spredning."""
+    model = ColorModel.fit(good_parts())
+    part = np.random.default_rng(2).normal(REF + (0.0, 6.0, 0.0), PIXEL_SIGMA, (800, 3))
+    assert model.score([part.mean(axis=0)])[0] > model.tolerance
+
+    # ingen enkelt-pixel er ekstrem, så outlier-tjekket alene fanger den ikke
+    assert model.outlier_fraction(part) <= model.max_outlier_frac
+
+
+def test_roundtrip_keeps_both_covariances():
+    import tempfile
+    from pathlib import Path
+
+    model = ColorModel.fit(good_parts())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "color_model.json"
+        model.save(path)
+        loaded = ColorModel.load(path)
+    assert np.allclose(loaded.cov, model.cov)
+    assert np.allclose(loaded.pixel_cov, model.pixel_cov)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"[OK] {name}")
@@ -1,6 +1,8 @@
 # qc_evaluate.py
 import numpy as np
 
+from qc_results import EvalTable, column
+
 
 class QCEvaluate:
     """
@@ -14,7 +16,8 @@ class QCEvaluate:
 
     Et objekt er kun "overall = True" hvis ALLE fire QC-moduler er OK.
 
-    Returnerer ét samlet resultat pr. objekt.
+    Returnerer ét samlet resultat pr. objekt (EvalTable – tabel[i] kan
+    bruges som den gamle dict: r["overall"], r["reasons"], r["center"] ...).
     """
 
     def combine(self, form_results, size_results, color_results, special_results):
@@ -23,72 +26,24 @@ class QCEvaluate:
 
         Input:
             form_results:    liste fra QCForm
-            size_results:    liste fra QCSize
+            size_results:    SizeTable fra QCSize (eller liste af rækker)
             color_results:   liste fra QCColor
             special_results: liste fra QCSpecial
 
         Output:
-            liste af dicts med samlet QC-status
+            EvalTable – det samlede AND beregnes vektoriseret, og
+            fejlforklaringerne ("reasons") bygges først når en række læses.
         """
-
-        final_results = []
-
-        for i in range(len(form_results)):
-            form   = form_results[i]
-            size   = size_results[i]
-            color  = color_results[i]
-            spec   = special_results[i]
-
-            # Individuelle OK/NOTOK værdier
-            form_ok   = form["valid"]
-            size_ok   = size["valid_size"]
-            color_ok  = color["valid_color"]
-            spec_ok   = spec["valid_special"]
-
-            # Samlet OK
-            overall_ok = form_ok and size_ok and color_ok and spec_ok
-
-            # Samlede fejlforklaringer
-            reasons = []
-            if not form_ok:
-                reasons.append(f"FORM: {form['reason']}")
-            if not size_ok:
-                reasons.append(f"SIZE: {size['reason']}")
-            if not color_ok:
-                reasons.append(f"COLOR: {color['reason']}")
-            if not spec_ok:
-                reasons.append(f"SPECIAL: {spec['reason']}")
-
-            # Udvidet info til logging/robotik
-            result = {
-                "overall": overall_ok,
-
-                # Individuelle del-resultater
-                "form": form_ok,
-                "size": size_ok,
-                "color": color_ok,
-                "special": spec_ok,
-
-                # Tekster
-                "reasons": reasons,
-
-                # Geometri
-                "center": form["center"],
-                "angle": form["angle"],
-                "bbox": form["bbox_points"],
-                "width_mm": size["width_mm"],
-                "height_mm": size["height_mm"],
-
-                # Avancerede QC-datapunkter
-                "deltaE": color["deltaE"],
-                "mean_lab": color["mean_lab"],
-                "hole_count": spec["hole_count"],
-                "hole_areas": spec["hole_areas"],
-            }
-
-            final_results.append(result)
-
-        return final_results
+        return EvalTable(
+            form=column(form_results, "valid"),
+            size=column(size_results, "valid_size"),
+            color=column(color_results, "valid_color"),
+            special=column(special_results, "valid_special"),
+            forms=form_results,
+            sizes=size_results,
+            colors=color_results,
+            specials=special_results,
+        )
 
     # ------------------------------------------------------------
     # Overlay til samlet QC (grøn = OK, rød = NOT OK)
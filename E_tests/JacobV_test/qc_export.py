@@ -1,28 +1,46 @@
 """
 qc_export.py
 Håndterer genereringen af JSON-filen som Doosan-robotten læser.
-Filen indeholder en liste af kommando-strenge der sendes til robotten,
-typisk i formatet:
+Filen indeholder en liste af strukturerede pluk-kommandoer
+(B_Robot.pick_command.PickCommand), typisk:
 
-"add movel X Y Z Angle OK/NOK"
+{"x": X, "y": Y, "z": Z, "a": Angle, "ok": true/false}
+
+Robot-lytteren læser dem direkte som PickCommand; først ved afsendelse
+til robotten vælges wire-formatet (tekst eller binært).
 
 Dette modul har ansvaret for:
 - Konvertering af QC-resultater til robotkommandoer
 - Skrive en fuld JSON-struktur til disk
 - Håndtere fast Z-højde (pick height)
+- Udelade emner som robottens aktive batch stadig mangler at plukke
+  (læses fra 'C_data/robot_status.json', skrevet af B_Robot)
 """
 import json
+import math
+import os
+import sys
+import time
 from pathlib import Path
 
+# B_Robot ligger i projektroden
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from B_Robot.pick_command import PickCommand
+
 class QCExport:
     """
     Klasse der genererer robot-kommando JSON-filen.
 
     Parametre:
         z_height_mm (float): Fast Z-værdi som robotten skal bruge ved pick.
+        pending_radius_mm (float): Emner tættere end dette på et ventende
+                                   pluk i robottens aktive batch eksporteres ikke.
 
     Metoder:
+        - to_commands(payload): konverterer payload til PickCommand-objekter.
         - payload_to_json(payload): skriver listen af kommandoer til disk.
+        - load_pending_picks(): robot-XY for pluk der endnu ikke er udført.
+        - filter_pending(payload): fjerner emner der allerede er i en aktiv batch.
 
     Anvendelse:
         payload forventes at være en liste med dicts:
@@ -34,11 +52,12 @@ class QCExport:
                 "angle_deg": float
             }
     """
-    def __init__(self, z_height_mm=55):
+    def __init__(self, z_height_mm=55, pending_radius_mm=30.0):
         """
         Export QC results to JSON robot command format.
         """
         self.z_height = z_height_mm
+        self.pending_radius_mm = pending_radius_mm
 
         # ROOT = project root (Doosan-Vision-QC folder)
         self.ROOT = Path(__file__).resolve().parents[2]
@@ -46,6 +65,75 @@ class QCExport:
         # C_data ALWAYS exists in project root
         self.CDATA = self.ROOT / "C_data"
 
+        # Status fra robot-lytteren (B_Robot/batch_scheduler.py)
+        self.STATUS_PATH = self.CDATA / "robot_status.json"
+        self._status_mtime = None
+        self._pending = []
+
+    def load_pending_picks(self):
+        """
+    Returnerer robot-koordinater (X, Y) for pluk i robottens aktive batch,
+    som endnu ikke er udført. Filen genindlæses kun når den ændres.
+
+    Returnerer:
+        list[tuple(float, float)] - tom liste hvis ingen batch er aktiv.
+    """
+        try:
+            mtime = self.STATUS_PATH.stat().st_mtime
+        except FileNotFoundError:
+            self._status_mtime, self._pending = None, []
+            return self._pending
+
+        if mtime != self._status_mtime:
+            try:
+                with open(self.STATUS_PATH, "r", encoding="utf-8") as f:
+                    status = json.load(f)
+                self._pending = [tuple(p) for p in status.get("pending", [])]
+                self._status_mtime = mtime
+            except (OSError, json.JSONDecodeError):
+                pass   # robotten skriver atomisk – prøv igen næste gang
+
+        return self._pending
+
+    def filter_pending(self, robot_payload):
+        """
+    Deler payload i emner der skal med i næste batch, og emner der
+    ligger i et område robotten stadig er i gang med at plukke.
+
+    Returnerer:
+        (kept, skipped) - to lister af payload-dicts.
+    """
+        pending = self.load_pending_picks()
+        if not pending:
+            return list(robot_payload), []
+
+        kept, skipped = [], []
+        for item in robot_payload:
+            xy = (item["x_mm"], item["y_mm"])
+            if any(math.dist(xy, p) < self.pending_radius_mm for p in pending):
+                skipped.append(item)
+            else:
+                kept.append(item)
+        return kept, skipped
+
+    def to_commands(self, robot_payload):
+        """
+    Konverterer payload-dicts til PickCommand med fast Z-højde.
+
+    Returnerer:
+        list[PickCommand]
+    """
+        return [
+            PickCommand(
+                x=round(item["x_mm"], 2),
+                y=round(item["y_mm"], 2),
+                z=float(self.z_height),
+                angle=round(item["angle_deg"], 2),
+                ok=bool(item["ok"]),
+            )
+            for item in robot_payload
+        ]
+
     def payload_to_json(self, robot_payload, filename="robot_commands.json"):
         """
     Konverterer en liste af QC-payloads til robot-kommandoer
@@ -55,37 +143,42 @@ class QCExport:
         payload (list[dict]): Liste af objekter med robotposition, vinkel
                               og OK/NOK vurdering.
 
+    Emner som robotten stadig mangler at plukke i sin aktive batch
+    udelades (se filter_pending), så batch N+1 kan eksporteres mens
+    batch N kører.
+
     Returnerer:
-        None - skriver JSON til filsystemet.
+        Path - stien til den skrevne JSON-fil.
 
     JSON-format:
         {
+            "exported_at": 1700000000.0,
             "objects": [
-                "add movel X Y Z Angle OK",
-                "add movel X Y Z Angle NOK",
+                {"x": X, "y": Y, "z": Z, "a": Angle, "ok": true},
+                {"x": X, "y": Y, "z": Z, "a": Angle, "ok": false},
                 ...
             ]
         }
     """
 
-        commands = []
-
-        for item in robot_payload:
-            X = round(item["x_mm"], 2)
-            Y = round(item["y_mm"], 2)
-            A = round(item["angle_deg"], 2)
-            status = "OK" if item["ok"] else "NOK"
+        robot_payload, skipped = self.filter_pending(robot_payload)
+        if skipped:
+            print(f"[EXPORT] {len(skipped)} emne(r) udeladt – ligger i robottens aktive batch")
 
-            cmd = f"add movel {X} {Y} {self.z_height} {A} {status}"
-            commands.append(cmd)
-
-        data = {"objects": commands}
+        commands = self.to_commands(robot_payload)
+        data = {
+            "exported_at": time.time(),   # til latens-måling i robot-lytteren
+            "objects": [c.to_dict() for c in commands],
+        }
 
         # Save inside project-level C_data
         out_path = self.CDATA / filename
 
-        with open(out_path, "w") as f:
+        # skriv atomisk – robot-lytteren kan læse filen mens en batch kører
+        tmp_path = out_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
             json.dump(data, f, indent=4)
+        os.replace(tmp_path, out_path)
 
         print(f"[EXPORT] Saved robot commands → {out_path}")
 
@@ -2,31 +2,53 @@
 import cv2 as cv
 import numpy as np
 
+from qc_results import FormResult
+
 class QCForm:
     """
     QCForm analyserer formen på objekter i et binært mask-billede.
     Returnerer både OK og NOT OK objekter (store objekter),
     men ignorerer små konturer (fx skruehuller og støj).
+
+    Backends:
+        "contours"   : findContours på hele masken, areal pr. kontur i Python
+        "components" : connectedComponentsWithStats giver areal/bbox for alle
+                       blobs i ét C-kald; blobs hvis bbox er mindre end
+                       min_area frasorteres vektoriseret, og kun de
+                       overlevende får konturanalyse. Hurtigst på støjende
+                       masker med hundredvis af små pletter.
     """
 
+    BACKENDS = ("contours", "components")
+
     def __init__(self, min_area=1000, min_aspect=2.0, max_aspect=7.0,
-                 min_solidity=0.88, min_extent=0.90):
+                 min_solidity=0.88, min_extent=0.90, backend="contours"):
         """
         min_area:
             Minimumsareal for et objekt. Alt under dette ignoreres totalt.
             (bruges til at fjerne skruehuller og støj)
+
+        backend:
+            "contours" (standard) eller "components".
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Ukendt backend: {backend!r} (vælg {', '.join(self.BACKENDS)})")
+
         self.min_area = min_area
         self.min_aspect = min_aspect
         self.max_aspect = max_aspect
         self.min_solidity = min_solidity
         self.min_extent = min_extent
+        self.backend = backend
 
     # ------------------------------------------------------------
     # Evaluer ALLE store objekter (små ignoreres)
     # ------------------------------------------------------------
     def evaluate_all(self, mask):
-        contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+        if self.backend == "components":
+            contours = self._component_contours(mask)
+        else:
+            contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
         results = []
 
         for cnt in contours:
@@ -41,6 +63,37 @@ class QCForm:
 
         return results
 
+    # ------------------------------------------------------------
+    # Connected components: vektoriseret forfiltrering
+    # ------------------------------------------------------------
+    def _component_contours(self, mask):
+        """
+        Finder én ydre kontur pr. blob der kan nå min_area.
+
+        Konturarealet kan aldrig være større end blob'ens bbox, så
+        bbox-arealet er en sikker øvre grænse: alt under min_area
+        frasorteres uden at røre en kontur. Den endelige areal-check
+        sker stadig på konturen i evaluate_all, så resultatet svarer
+        til "contours"-backenden (rækkefølgen er dog top → bund).
+        """
+        n, labels, stats, _ = cv.connectedComponentsWithStats(mask, connectivity=8)
+
+        x, y, w, h = (stats[1:, i] for i in (cv.CC_STAT_LEFT, cv.CC_STAT_TOP,
+                                              cv.CC_STAT_WIDTH, cv.CC_STAT_HEIGHT))
+        keep = np.flatnonzero(w.astype(np.int64) * h >= self.min_area) + 1
+
+        contours = []
+        for lbl in keep:
+            bx, by, bw, bh = stats[lbl, :4]
+            roi = (labels[by:by + bh, bx:bx + bw] == lbl).astype(np.uint8)
+            # 1 px kant, så blobs der rører bbox-kanten får en lukket kontur
+            roi = cv.copyMakeBorder(roi, 1, 1, 1, 1, cv.BORDER_CONSTANT, value=0)
+            cnts, _ = cv.findContours(roi, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE,
+                                      offset=(int(bx) - 1, int(by) - 1))
+            contours.extend(cnts)
+
+        return contours
+
     # ------------------------------------------------------------
     # Evaluér én kontur
     # ------------------------------------------------------------
@@ -81,24 +134,21 @@ class QCForm:
             valid = False
             reason = "Extent too low"
 
-        # boks til overlay
-        box = cv.boxPoints(rect)
-        box = np.int32(box)
-
-        return {
-            "valid": valid,
-            "area": area,
-            "center": (cx, cy),
-            "width": w_norm,
-            "height": h_norm,
-            "angle": angle,
-            "aspect_ratio": aspect_ratio,
-            "solidity": solidity,
-            "extent": extent,
-            "bbox_points": box,
-            "reason": reason,
-            "contour": cnt,
-        }
+        # boks til overlay beregnes først når den bruges (FormResult.bbox_points)
+        return FormResult(
+            valid=valid,
+            area=area,
+            center=(cx, cy),
+            width=w_norm,
+            height=h_norm,
+            angle=angle,
+            aspect_ratio=aspect_ratio,
+            solidity=solidity,
+            extent=extent,
+            reason=reason,
+            contour=cnt,
+            rect=rect,
+        )
 
     # ------------------------------------------------------------
     # Overlay
@@ -1,4 +1,6 @@
 # test_qc_form.py
+import time
+
 import cv2 as cv
 import numpy as np
 from qc_form import QCForm
@@ -24,5 +26,23 @@ print(results)
 color = cv.cvtColor(mask, cv.COLOR_GRAY2BGR)
 overlay = qc.draw_overlay(color, results)
 
+# Backend-sammenligning: "components" skal finde de samme objekter
+# (samme areal og samme gyldighed) som "contours" på begge sample-masker
+for mask_path in ("C_data/Sample_images/mask_1764760632.png",
+                  "C_data/Sample_images/mask_1764853751.png"):
+    sample = cv.imread(mask_path, cv.IMREAD_GRAYSCALE)
+    found = {}
+    for backend in QCForm.BACKENDS:
+        qc_b = QCForm(min_area=1500, backend=backend)
+        t0 = time.perf_counter()
+        for _ in range(20):
+            res_b = qc_b.evaluate_all(sample)
+        ms = (time.perf_counter() - t0) * 1000.0 / 20
+        found[backend] = sorted((round(r["area"], 1), bool(r["valid"])) for r in res_b)
+        print(f"{backend:<11}: {len(res_b)} objekter, {ms:.2f} ms, (area, valid)={found[backend]}")
+
+    assert found["components"] == found["contours"], \
+        f"{mask_path}: backends er uenige – {found}"
+
 cv.imshow("QC Form", overlay)
 cv.waitKey(0)
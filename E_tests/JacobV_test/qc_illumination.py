@@ -0,0 +1,173 @@
+"""
+qc_illumination.py
+Belysnings-normalisering (hvidbalance) før segmentering.
+
+Når fabrikslyset driver, flytter både HSV-masken og QCColor's ΔE sig,
+og qc_calibration_settings.json skal tunes om i hånden. QCIllumination
+holder i stedet billedet på samme "lys" som da tærsklerne blev tunet:
+
+- Reference: middel-BGR af bakkens baggrund (eller et fast reference-
+  felt) gemmes når lyset er godt (tast 'w' i qc_main)
+- Gains pr. kanal = reference / aktuel, estimeret med lav rate (hver
+  update_every frame), udglattet og begrænset til [min_gain, max_gain]
+- Anvendelse: én forudberegnet 256-entry LUT pr. kanal via cv.LUT –
+  det eneste der koster noget i hot path
+
+Uden gemt reference er gains 1 (tærsklerne er tunet på rå frames).
+Med gray_world=True normaliseres i stedet til grå-verden (alle kanaler
+til samme middel), så et farvestik fjernes men lysstyrken bevares.
+
+Funktionalitet:
+- QCIllumination.update(frame, mask): estimerer gains (kun hver N'te kald)
+- QCIllumination.apply(frame, pool): normaliseret frame via LUT
+- QCIllumination.calibrate(frame, mask): gemmer referencen
+"""
+import json
+from pathlib import Path
+
+import cv2 as cv
+import numpy as np
+
+ILLUMINATION_PATH = Path(__file__).resolve().parents[2] / "C_data" / "illumination.json"
+
+
+class QCIllumination:
+    """
+    Hvidbalance med cachede gains.
+
+    Parametre:
+        path (Path): JSON med reference-BGR (indlæses hvis den findes).
+        patch (tuple | None): (x, y, w, h) fast reference-felt i framen.
+                              None = bakkens baggrund (alt uden for masken).
+        update_every (int): Frames mellem gain-estimater.
+        alpha (float): Udglatning af nye gains (0..1, 1 = ingen udglatning).
+        min_gain, max_gain (float): Grænser pr. kanal.
+        step (int): Sub-sampling af pixels ved estimering.
+        gray_world (bool): Normalisér til grå-verden når der ingen reference er.
+        enabled (bool): False = apply() returnerer framen uændret.
+
+    Metoder:
+        - update(frame, mask): estimerer gains med lav rate
+        - apply(frame, pool): anvender gains via LUT
+        - calibrate(frame, mask): gemmer aktuel baggrund som reference
+        - status(): kort tekst til overlay/print
+    """
+
+    def __init__(self, path=ILLUMINATION_PATH, patch=None, update_every: int = 30,
+                 alpha: float = 0.3, min_gain: float = 0.5, max_gain: float = 2.0,
+                 step: int = 4, gray_world: bool = False, enabled: bool = True):
+        self.path = Path(path)
+        self.patch = patch
+        self.update_every = update_every
+        self.alpha = alpha
+        self.min_gain = min_gain
+        self.max_gain = max_gain
+        self.step = step
+        self.gray_world = gray_world
+        self.enabled = enabled
+
+        self.reference = None
+        self.gains = np.ones(3)
+        self._lut = None
+        self._calls = 0
+        self._build_lut()
+
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.reference = np.asarray(data["reference_bgr"], dtype=np.float64)
+            self.patch = tuple(data["patch"]) if data.get("patch") else self.patch
+            print(f"[ILLUM] Reference indlæst: BGR={np.round(self.reference, 1)}")
+
+    # ------------------------------------------------------------
+    # Estimering
+    # ------------------------------------------------------------
+    def _sample(self, frame, mask=None) -> np.ndarray | None:
+        """Middel-BGR af reference-feltet / baggrunden (sub-samplet)."""
+        s = self.step
+        if self.patch is not None:
+            x, y, w, h = self.patch
+            px = frame[y:y + h:s, x:x + w:s].reshape(-1, 3)
+        else:
+            px = frame[::s, ::s].reshape(-1, 3)
+            if mask is not None and mask.shape[:2] == frame.shape[:2]:
+                px = px[mask[::s, ::s].reshape(-1) == 0]
+
+        # mættede pixels siger intet om lyset
+        px = px[(px < 250).all(axis=1)]
+        if len(px) < 100:
+            return None
+        return px.mean(axis=0)
+
+    def update(self, frame, mask=None) -> bool:
+        """
+    Estimerer nye gains hver update_every kald (ellers ingenting).
+
+    Returnerer:
+        True hvis gains/LUT blev opdateret.
+    """
+        self._calls += 1
+        if not self.enabled or (self._calls - 1) % self.update_every:
+            return False
+        if self.reference is None and not self.gray_world:
+            return False
+
+        mean = self._sample(frame, mask)
+        if mean is None:
+            return False
+
+        # frame er den RÅ frame, så gains regnes altid fra bunden
+        target = self.reference if self.reference is not None else np.full(3, mean.mean())
+        new = np.clip(target / np.maximum(mean, 1.0), self.min_gain, self.max_gain)
+        gains = (1.0 - self.alpha) * self.gains + self.alpha * new
+
+        if np.allclose(gains, self.gains, atol=0.005):
+            return False
+        self.gains = gains
+        self._build_lut()
+        return True
+
+    def _build_lut(self) -> None:
+        levels = np.arange(256, dtype=np.float64)
+        table = np.clip(levels[:, None] * self.gains[None, :] + 0.5, 0, 255).astype(np.uint8)
+        self._lut = table.reshape(256, 1, 3)
+        self._identity = bool(np.all(table == levels[:, None]))
+
+    # ------------------------------------------------------------
+    # Hot path
+    # ------------------------------------------------------------
+    def apply(self, frame, pool=None):
+        """Normaliseret frame (pool-buffer hvis pool er givet)."""
+        if not self.enabled or self._identity:
+            return frame   # gains = 1 → intet at lave
+        dst = pool.like("illum", frame) if pool is not None else None
+        return cv.LUT(frame, self._lut, dst=dst)
+
+    # ------------------------------------------------------------
+    # Reference
+    # ------------------------------------------------------------
+    def calibrate(self, frame, mask=None) -> bool:
+        """Gemmer baggrunden i den RÅ frame som reference (godt lys nu)."""
+        mean = self._sample(frame, mask)
+        if mean is None:
+            print("[ILLUM] For få umættede baggrunds-pixels – reference ikke gemt")
+            return False
+
+        self.reference = mean
+        self.gains = np.ones(3)
+        self._build_lut()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"reference_bgr": mean.tolist(),
+                       "patch": list(self.patch) if self.patch else None}, f, indent=2)
+        print(f"[ILLUM] Reference gemt: BGR={np.round(mean, 1)} → {self.path}")
+        return True
+
+    def status(self) -> str:
+        b, g, r = self.gains
+        if self.reference is not None:
+            src = "ref"
+        else:
+            src = "gray" if self.gray_world else "off"
+        return f"WB {src} B{b:.2f} G{g:.2f} R{r:.2f}"
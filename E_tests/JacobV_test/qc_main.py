@@ -27,17 +27,27 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[0]
 sys.path.append(str(ROOT))
 # QC modules
-from qc_preprocess import QCPreprocess
+from qc_preprocess import SETTINGS_FILE, QCPreprocess, use_settings
 from qc_form import QCForm
 from qc_size import QCSize
 from qc_color import QCColor
+from qc_color_model import COLOR_MODEL_PATH, ColorModel
 from qc_special import QCSpecial
 from qc_evaluate import QCEvaluate
 from qc_export import QCExport
+from qc_trace import QCTracer
+from qc_budget import QCBudget, TrackCache
+from qc_illumination import QCIllumination
+from qc_calibration_monitor import DOT_SETTINGS_FILE, CalibrationMonitor
+
+# A_Vision ligger i projektroden
+sys.path.append(str(ROOT.parents[1]))
+from A_Vision.Vision_buffers import BufferPool
+from A_Vision.Calibration_store import CalibrationStore
 
 # Pose utilities
-from Angle_utility import pca_angle
-from mapping import HomographyMapper
+from A_Vision.Vision_pose import PoseModel, contour_angles
+from mapping import CALIB_PATH, HomographyMapper
 
 # Camera
 from qc_vision_camera import OakCamera
@@ -62,15 +72,42 @@ qc_size = QCSize(
     tolerance_height_mm=3.0,
 )
 
+# Lært farvemodel (python qc_color_model.py ...) hvis den findes –
+# ellers fast reference-LAB + ΔE-tolerance
 qc_color = QCColor(
     reference_lab=np.array([107.30, 187.07, 160.88]),
     tolerance_dE=25.0,
+    model=ColorModel.load(COLOR_MODEL_PATH) if COLOR_MODEL_PATH.exists() else None,
 )
 
 qc_special = QCSpecial(expected_hole_count=2, min_hole_area=50)
 
 qc_eval = QCEvaluate()
 qc_export = QCExport(z_height_mm=55)
+qc_trace = QCTracer(window=300)
+
+# Deterministisk cyklustid: træd ned (debug-vinduer → visning → nedskaleret
+# preprocess → kun ændrede emner) når frame-tiden går over budget
+FRAME_BUDGET_MS = 100.0
+qc_budget = QCBudget(budget_ms=FRAME_BUDGET_MS)
+track_cache = TrackCache()
+DEBUG_WINDOWS = ("QC-FORM", "QC-Size", "QC-color", "QC-special")
+
+# Hvidbalance mod gemt baggrunds-reference ('w') – gains estimeres hver
+# 30. frame, hot path er kun et LUT-opslag
+qc_illum = QCIllumination(update_every=30)
+
+# Drift-overvågning af homografien mod kalibreringsprikkerne (hver 150.
+# frame) – 'k' re-fitter på de seneste observationer
+calib_monitor = CalibrationMonitor(every_n=150, warn_mm=2.0)
+
+# Genbrugte frame-buffere (preprocess, overlays, display) – ingen store
+# allokeringer pr. frame i steady state
+frame_pool = BufferPool()
+
+# Trace-dump ('t') – robot-lytterens latens flettes med ind
+TRACE_PATH = ROOT.parents[1] / "C_data" / "qc_trace.json"
+ROBOT_LATENCY_PATH = ROOT.parents[1] / "C_data" / "robot_latency.json"
 
 
 # ======================================================
@@ -96,12 +133,40 @@ def start_robot_listener():
     )
 
 
+# ======================================================
+# QC MODULES (size/color/special for et udsnit af emnerne)
+# ======================================================
+def evaluate_modules(frame, mask, forms):
+    """Kører size/color/special på forms (bruges af TrackCache)."""
+    with qc_trace.span("size"):
+        size_results = qc_size.evaluate_all(forms)
+    with qc_trace.span("color"):
+        color_results = qc_color.evaluate_all(frame, forms)
+    with qc_trace.span("special"):
+        special_results = qc_special.evaluate_all(mask, forms)
+    return size_results, color_results, special_results
+
+
 # ======================================================
 # DRAW HELPERS
 # ======================================================
+def copy_to_pool(name, img):
+    """Kopi af img i en genbrugt buffer (erstatter img.copy() pr. frame)."""
+    vis = frame_pool.like(name, img)
+    np.copyto(vis, img)
+    return vis
+
+
+def show(window, img):
+    """Skalerer img til display-størrelse i en genbrugt buffer og viser det."""
+    small = frame_pool.get("show_" + window, (DISPLAY_H, DISPLAY_W, 3))
+    cv.resize(img, (DISPLAY_W, DISPLAY_H), dst=small)
+    cv.imshow(window, small)
+    return small
+
 
 def draw_form_with_id(img, form_results):
-    vis = img.copy()
+    vis = copy_to_pool("draw_form", img)
     for idx, fr in enumerate(form_results, start=1):
         color = (0, 255, 0) if fr["valid"] else (0, 0, 255)
         box = fr["bbox_points"]
@@ -114,7 +179,7 @@ def draw_form_with_id(img, form_results):
 
 
 def draw_size_with_id(img, form_results, size_results):
-    vis = img.copy()
+    vis = copy_to_pool("draw_size", img)
     for idx, (fr, sr) in enumerate(zip(form_results, size_results), start=1):
         color = (0, 255, 0) if sr["valid_size"] else (0, 0, 255)
         box = fr["bbox_points"]
@@ -127,7 +192,7 @@ def draw_size_with_id(img, form_results, size_results):
 
 
 def draw_color_with_id(img, form_results, color_results):
-    vis = img.copy()
+    vis = copy_to_pool("draw_color", img)
     for idx, (fr, cr) in enumerate(zip(form_results, color_results), start=1):
         color = (0, 255, 0) if cr["valid_color"] else (0, 0, 255)
         box = fr["bbox_points"]
@@ -140,7 +205,7 @@ def draw_color_with_id(img, form_results, color_results):
 
 
 def draw_special_with_id(img, form_results, special_results):
-    vis = img.copy()
+    vis = copy_to_pool("draw_special", img)
     for idx, (fr, sr) in enumerate(zip(form_results, special_results), start=1):
         color = (0, 255, 0) if sr["valid_special"] else (0, 0, 255)
         box = fr["bbox_points"]
@@ -153,7 +218,7 @@ def draw_special_with_id(img, form_results, special_results):
 
 
 def draw_overall_with_id(img, form_results, final_results):
-    vis = img.copy()
+    vis = copy_to_pool("draw_overall", img)
     for idx, (fr, frf) in enumerate(zip(form_results, final_results), start=1):
         color = (0, 255, 0) if frf["overall"] else (0, 0, 255)
         box = fr["bbox_points"]
@@ -166,6 +231,18 @@ def draw_overall_with_id(img, form_results, final_results):
     return vis
 
 
+def draw_pending_picks(vis, mapper, pending_xy, radius_px):
+    """
+    Markerer robottens ventende pluk (aktiv batch) med en cyan ring.
+    Emner inden for ringene kommer ikke med i næste eksport.
+    """
+    if mapper is None or not pending_xy:
+        return vis
+    for px, py in mapper.robot_to_pixels(pending_xy):
+        cv.circle(vis, (int(px), int(py)), int(radius_px), (255, 255, 0), 2)
+    return vis
+
+
 
 # ======================================================
 # CAMERA INSTANCE (device is NOT started yet)
@@ -189,6 +266,11 @@ def print_qc_help():
     - s       : print pose-resultater
     - g       : print frame shapes
     - e       : eksportér JSON
+    - l       : vis/skjul latens-overlay
+    - t       : gem latens-trace som JSON
+    - b       : print budget-niveau
+    - w       : gem hvidbalance-reference (godt lys nu)
+    - k       : re-fit homografi fra kalibreringsprikkerne (ny version i registret)
     - m       : tilbage til main menu
     - q       : afslut program
     """
@@ -201,6 +283,11 @@ def print_qc_help():
     print("s → Print pose results")
     print("g → Print frame shapes")
     print("e → Export JSON")
+    print("l → Toggle latency overlay")
+    print("t → Save latency trace (C_data/qc_trace.json)")
+    print("b → Print frame budget level")
+    print("w → Save white-balance reference (current lighting)")
+    print("k → Re-fit homography from calibration dots (publish new version)")
     print("m → Return to MAIN MENU")
     print("q → Quit program")
     print("h → Show this help menu")
@@ -247,45 +334,80 @@ def run_qc_loop():
     # Pre-create windows
     cv.namedWindow("QC-overlay", cv.WINDOW_NORMAL)
     cv.resizeWindow("QC-overlay", DISPLAY_W, DISPLAY_H)
+    show_trace = True
+    debug_open = False
 
     # MAIN QC LOOP
     while True:
-        frame = cam.get_frame()
-        if frame is None:
+        raw = cam.get_frame()
+        if raw is None:
             continue
 
-        # 1) PREPROCESS
-        mask, gray, thresh, edges, debug = QCPreprocess(frame)
+        # ny aktiv kalibrerings-version? (én stat pr. frame) – skiftes her,
+        # mellem to frames, så et frame aldrig blander to versioner
+        new_calib = calib_store.poll()
+        if new_calib is not None:
+            apply_calibration(new_calib)
+
+        # hvidbalance før segmentering (gains opdateres med lav rate nedenfor)
+        frame = qc_illum.apply(raw, frame_pool)
+
+        qc_trace.begin_frame(cam.last_latency_s)
+
+        # 1) PREPROCESS (nedskaleret på budget-niveau DOWNSCALED)
+        with qc_trace.span("preprocess"):
+            scale = qc_budget.detect_scale
+            if scale == 1.0:
+                mask, gray, thresh, edges, debug = QCPreprocess(frame, frame_pool)
+            else:
+                h, w = frame.shape[:2]
+                sw, sh = int(w * scale), int(h * scale)
+                small = cv.resize(frame, (sw, sh), dst=frame_pool.get("small", (sh, sw, 3)),
+                                  interpolation=cv.INTER_AREA)
+                mask, gray, thresh, edges, debug = QCPreprocess(small, frame_pool)
+                # resten af pipelinen arbejder i fuld opløsning (pixel-tolerancer)
+                mask = cv.resize(mask, (w, h), dst=frame_pool.get("mask_full", (h, w)),
+                                 interpolation=cv.INTER_NEAREST)
+
+        # 2) MODULES (kun nye/ændrede emner på budget-niveau CHANGED_ONLY)
+        with qc_trace.span("form"):
+            form_results = qc_form.evaluate_all(mask)
+        size_results, color_results, special_results = track_cache.evaluate(
+            form_results,
+            lambda forms: evaluate_modules(frame, mask, forms),
+            enabled=qc_budget.changed_only,
+        )
 
-        # 2) MODULES
-        form_results = qc_form.evaluate_all(mask)
-        size_results = qc_size.evaluate_all(form_results)
-        color_results = qc_color.evaluate_all(frame, form_results)
-        special_results = qc_special.evaluate_all(mask, form_results)
+        with qc_trace.span("evaluate"):
+            final_results = qc_eval.combine(
+                form_results, size_results, color_results, special_results
+            )
 
-        final_results = qc_eval.combine(
-            form_results, size_results, color_results, special_results
-        )
+        # baggrund = alt uden for emne-masken i den rå frame
+        with qc_trace.span("illumination"):
+            qc_illum.update(raw, mask)
 
         # 3) POSE
         poses = []
-        if pose_mapper is not None:
-            for idx, fr in enumerate(form_results, start=1):
-                cx, cy = fr["center"]
-                cnt = fr["contour"]
-
-                raw_angle = pca_angle(cnt)
-                corrected = (raw_angle + 151.55) % 180
-
-                Xr, Yr = pose_mapper.pixel_to_robot(cx, cy)
-
-                poses.append({
-                    "id": idx,
-                    "center_px": (cx, cy),
-                    "angle_deg": corrected,
-                    "robot_xy": (Xr, Yr),
-                    "area": fr["area"],
-                })
+        with qc_trace.span("pose"):
+            if pose_model is not None and form_results:
+                # alle emner i ét batch: homografi-position + Jacobian-vinkel
+                centers = [fr["center"] for fr in form_results]
+                robot_xy, tool_deg = pose_model.poses(
+                    centers, contour_angles([fr["contour"] for fr in form_results]))
+
+                for idx, fr in enumerate(form_results, start=1):
+                    poses.append({
+                        "id": idx,
+                        "center_px": centers[idx - 1],
+                        "angle_deg": float(tool_deg[idx - 1]),
+                        "robot_xy": (float(robot_xy[idx - 1, 0]), float(robot_xy[idx - 1, 1])),
+                        "area": fr["area"],
+                    })
+
+        # prikkerne er tunet på rå frames (før hvidbalance)
+        with qc_trace.span("calib"):
+            calib_monitor.maybe_check(raw, pose_mapper)
 
         # 4) ROBOT PAYLOAD
         robot_payload = []
@@ -300,21 +422,40 @@ def run_qc_loop():
                 })
 
         # 5) DRAW WINDOWS
-        overlay = draw_overall_with_id(frame, form_results, final_results)
-        cv.imshow("QC-overlay", cv.resize(overlay, (DISPLAY_W, DISPLAY_H)))
-
-        form_bgr = cv.cvtColor(mask, cv.COLOR_GRAY2BGR)
-        cv.imshow("QC-FORM", cv.resize(draw_form_with_id(form_bgr, form_results),
-                                       (DISPLAY_W, DISPLAY_H)))
-
-        cv.imshow("QC-Size", cv.resize(draw_size_with_id(form_bgr, form_results, size_results),
-                                       (DISPLAY_W, DISPLAY_H)))
-
-        cv.imshow("QC-color", cv.resize(draw_color_with_id(frame.copy(), form_results, color_results),
-                                        (DISPLAY_W, DISPLAY_H)))
-
-        cv.imshow("QC-special", cv.resize(draw_special_with_id(form_bgr, form_results, special_results),
-                                          (DISPLAY_W, DISPLAY_H)))
+        with qc_trace.span("draw"):
+            if qc_budget.show_display:
+                overlay = draw_overall_with_id(frame, form_results, final_results)
+                draw_pending_picks(overlay, pose_mapper, qc_export.load_pending_picks(),
+                                   qc_export.pending_radius_mm / qc_size.mm_per_pixel)
+                overlay_small = frame_pool.get("show_QC-overlay", (DISPLAY_H, DISPLAY_W, 3))
+                cv.resize(overlay, (DISPLAY_W, DISPLAY_H), dst=overlay_small)
+                if show_trace:
+                    qc_trace.draw_overlay(overlay_small)
+                cv.putText(overlay_small, qc_budget.status(), (10, DISPLAY_H - 10),
+                           cv.FONT_HERSHEY_PLAIN, 1.0, (0, 255, 255), 1)
+                cv.putText(overlay_small, calib_monitor.status(), (10, DISPLAY_H - 28),
+                           cv.FONT_HERSHEY_PLAIN, 1.0,
+                           (0, 0, 255) if calib_monitor.drifted else (0, 255, 255), 1)
+                cv.imshow("QC-overlay", overlay_small)
+
+            if qc_budget.show_debug:
+                form_bgr = cv.cvtColor(mask, cv.COLOR_GRAY2BGR,
+                                       dst=frame_pool.get("form_bgr", mask.shape + (3,)))
+                show("QC-FORM", draw_form_with_id(form_bgr, form_results))
+                show("QC-Size", draw_size_with_id(form_bgr, form_results, size_results))
+                # draw-helperne kopierer selv – frame.copy() er overflødig
+                show("QC-color", draw_color_with_id(frame, form_results, color_results))
+                show("QC-special", draw_special_with_id(form_bgr, form_results, special_results))
+                debug_open = True
+
+            elif debug_open:
+                # frosne debug-vinduer er misvisende – luk dem mens budgettet er presset
+                for name in DEBUG_WINDOWS:
+                    cv.destroyWindow(name)
+                debug_open = False
+
+        qc_trace.end_frame()
+        qc_budget.update(qc_trace.last("frame"))
 
         # 6) KEY HANDLING
         key = cv.waitKey(1) & 0xFF
@@ -343,9 +484,30 @@ def run_qc_loop():
             print_qc_help()
 
         elif key == ord('e'):
-            qc_export.payload_to_json(robot_payload)
+            with qc_trace.span("export"):
+                qc_export.payload_to_json(robot_payload)
             print("[EXPORT] JSON saved.")
 
+        elif key == ord('l'):
+            show_trace = not show_trace
+
+        elif key == ord('t'):
+            qc_trace.dump(TRACE_PATH, extra_files=[ROBOT_LATENCY_PATH])
+
+        elif key == ord('w'):
+            qc_illum.calibrate(raw, mask)
+
+        elif key == ord('k'):
+            new_mapper, rms = calib_monitor.refit()
+            if new_mapper is not None and active_calib is not None:
+                # publish flytter CURRENT – poll() skifter den ind næste frame
+                calib_store.publish(active_calib.with_changes(H=new_mapper.H),
+                                    note=f"live re-fit ({rms:.2f} mm RMS)")
+
+        elif key == ord('b'):
+            print(f"[BUDGET] {qc_budget.status()} – frame p50 "
+                  f"{qc_trace.summary().get('frame', {}).get('p50', 0.0):.1f} ms")
+
         elif key == ord('u'):
             print("\n--- FORM DEBUG ---")
             for i, r in enumerate(form_results, start=1):
@@ -383,14 +545,45 @@ def run_qc_loop():
 
 
 # ======================================================
-# HOMOGRAPHY LOAD
+# CALIBRATION LOAD (versioneret register, C_data/calibration)
 # ======================================================
-try:
-    pose_mapper = HomographyMapper.from_file()
-    print("[QC] Loaded homography.")
-except FileNotFoundError:
-    pose_mapper = None
-    print("[QC] No homography found.")
+def apply_calibration(calib):
+    """
+    Gør calib til den aktive kalibrering: homografi (pose + størrelse),
+    mm_per_pixel, vinkelmodel (Vision_pose) og HSV-settings for emner og
+    prikker. Kaldes kun mellem to frames.
+
+    Mangler en version et HSV-snapshot, bruges settings-filerne på disken.
+    """
+    global active_calib, pose_mapper, pose_model
+    active_calib = calib
+    pose_mapper = HomographyMapper(H=calib.H)
+    # gammel formel (pca + 151.55) gengives præcist i frame-centret
+    w, h = cam.resolution
+    pose_model = PoseModel.from_calibration(calib, anchor_px=(w / 2.0, h / 2.0))
+    qc_size.mm_per_pixel = calib.mm_per_pixel
+    qc_size.mapper = pose_mapper     # mm pr. emne via homografien
+    use_settings(calib.hsv.get("parts"))
+    calib_monitor.use_settings(calib.hsv.get("dots"))
+    print(f"[QC] Kalibrering {calib.version} aktiv ({calib.note})")
+
+
+calib_store = CalibrationStore()
+active_calib = None
+pose_mapper = None
+pose_model = None
+
+# første kørsel: migrér den gamle calibration_h.npz + settings til v0001
+calib_store.bootstrap_legacy(
+    CALIB_PATH,
+    hsv_files={"parts": SETTINGS_FILE, "dots": DOT_SETTINGS_FILE},
+)
+
+_calib = calib_store.poll()
+if _calib is not None:
+    apply_calibration(_calib)
+else:
+    print("[QC] No calibration found.")
 
 
 # ======================================================
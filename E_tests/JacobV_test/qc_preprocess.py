@@ -5,6 +5,7 @@
 import cv2 as cv
 import numpy as np
 import json
+import sys
 from pathlib import Path
 
 # -----------------------------
@@ -14,26 +15,57 @@ ROOT = Path(__file__).resolve().parent
 PROJECT_ROOT = ROOT.parents[0]                     # <-- vigtigt!
 SETTINGS_FILE = PROJECT_ROOT / "qc_calibration_settings.json"
 
+# A_Vision ligger i projektroden
+sys.path.append(str(ROOT.parents[1]))
+from A_Vision.Vision_buffers import take
+from A_Vision.Vision_lut import lut_from_settings
+
 
 # -----------------------------
 # LOAD SETTINGS
 # -----------------------------
+_settings_cache = {"mtime": None, "cfg": None, "pinned": None}
+
+
+def use_settings(cfg):
+    """
+    Låser preprocess til cfg – fx HSV-snapshottet fra den aktive
+    kalibrerings-version (Calibration_store), så aktivering og rollback
+    også skifter settings. None = læs SETTINGS_FILE igen.
+    """
+    _settings_cache["pinned"] = cfg
+
+
 def load_settings():
+    """
+    Aktive settings: use_settings()-snapshottet hvis sat, ellers
+    settings-filen (læses kun igen når den er ændret på disken).
+    """
+    if _settings_cache["pinned"] is not None:
+        return _settings_cache["pinned"]
+
     if not SETTINGS_FILE.exists():
         raise FileNotFoundError(f"Settings fil mangler: {SETTINGS_FILE}")
 
-    with open(SETTINGS_FILE, "r") as f:
-        cfg = json.load(f)
+    mtime = SETTINGS_FILE.stat().st_mtime_ns
+    if mtime != _settings_cache["mtime"]:
+        with open(SETTINGS_FILE, "r") as f:
+            _settings_cache["cfg"] = json.load(f)
+        _settings_cache["mtime"] = mtime
 
-    return cfg
+    return _settings_cache["cfg"]
 
 
 # -----------------------------
 # MAIN PREPROCESS FUNCTION
 # -----------------------------
-def QCPreprocess(frame):
+def QCPreprocess(frame, pool=None):
     """
     Input: RAW frame (BGR)
+           pool (valgfri BufferPool): alle mellemresultater skrives i
+           genbrugte buffere (dst=), så et stabilt 1080p-stream ikke
+           allokerer store arrays pr. frame. Output er så pool-buffere,
+           som overskrives ved næste kald.
     Output:
         mask           (HSV mask)
         gray           (Grayscale of masked frame)
@@ -44,9 +76,8 @@ def QCPreprocess(frame):
 
     cfg = load_settings()
 
-    # HSV ranges
-    lower = np.array([cfg["H_low"],  cfg["S_low"],  cfg["V_low"]], dtype=np.uint8)
-    upper = np.array([cfg["H_high"], cfg["S_high"], cfg["V_high"]], dtype=np.uint8)
+    # HSV-boksen som BGR-opslagstabel (bygges kun når grænserne ændres)
+    lut = lut_from_settings(cfg)
 
     blur_k      = int(cfg["blur_k"])
     global_thr  = int(cfg["global_thresh"])
@@ -65,43 +96,48 @@ def QCPreprocess(frame):
     if canny_high <= canny_low:
         canny_high = canny_low + 1
 
+    h, w = frame.shape[:2]
+
     # -----------------------------
     # 1. HSV Mask
     # -----------------------------
-    hsv = cv.cvtColor(frame, cv.COLOR_BGR2HSV)
-    mask = cv.inRange(hsv, lower, upper)
-    masked = cv.bitwise_and(frame, frame, mask=mask)
+    # Samme maske som cvtColor(HSV) + inRange, men ét tabelopslag pr. pixel
+    mask = lut.mask(frame, pool=pool, dst=take(pool, "pre_mask", (h, w)))
 
     # -----------------------------
     # 2. Blur + Gray
     # -----------------------------
-    gray = cv.cvtColor(masked, cv.COLOR_BGR2GRAY)
-    blur = cv.GaussianBlur(gray, (blur_k, blur_k), 0)
+    # gray(frame AND mask) == gray(frame) AND mask (masken er 0/255),
+    # så det maskerede farvebillede behøver aldrig at blive lavet
+    gray = cv.cvtColor(frame, cv.COLOR_BGR2GRAY, dst=take(pool, "pre_gray", (h, w)))
+    cv.bitwise_and(gray, mask, dst=gray)
+    blur = cv.GaussianBlur(gray, (blur_k, blur_k), 0, dst=take(pool, "pre_blur", (h, w)))
 
     # -----------------------------
     # 3. Threshold modes
     # -----------------------------
+    thresh = take(pool, "pre_thresh", (h, w))
     if thresh_mode == 0:
-        _, thresh = cv.threshold(blur, global_thr, 255, cv.THRESH_BINARY_INV)
+        cv.threshold(blur, global_thr, 255, cv.THRESH_BINARY_INV, dst=thresh)
 
     elif thresh_mode == 1:
-        thresh = cv.adaptiveThreshold(
+        cv.adaptiveThreshold(
             blur, 255,
             cv.ADAPTIVE_THRESH_MEAN_C,
             cv.THRESH_BINARY_INV,
-            block_size, C_val)
+            block_size, C_val, dst=thresh)
 
     else:
-        thresh = cv.adaptiveThreshold(
+        cv.adaptiveThreshold(
             blur, 255,
             cv.ADAPTIVE_THRESH_GAUSSIAN_C,
             cv.THRESH_BINARY_INV,
-            block_size, C_val)
+            block_size, C_val, dst=thresh)
 
     # -----------------------------
     # 4. Edges
     # -----------------------------
-    edges = cv.Canny(blur, canny_low, canny_high)
+    edges = cv.Canny(blur, canny_low, canny_high, edges=take(pool, "pre_edges", (h, w)))
 
     # -----------------------------
     # 5. Contour Overlay (debug)
@@ -109,7 +145,8 @@ def QCPreprocess(frame):
     contours, _ = cv.findContours(edges, cv.RETR_LIST, cv.CHAIN_APPROX_SIMPLE)
     big_contours = [c for c in contours if cv.contourArea(c) >= min_area]
 
-    debug_overlay = frame.copy()
+    debug_overlay = take(pool, "pre_debug", frame.shape)
+    np.copyto(debug_overlay, frame)
     cv.drawContours(debug_overlay, big_contours, -1, (0, 0, 255), 2)
 
     return mask, gray, thresh, edges, debug_overlay
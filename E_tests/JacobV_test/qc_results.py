@@ -0,0 +1,302 @@
+"""
+qc_results.py
+Kolonne-baserede resultattabeller (struct-of-arrays) mellem QC-modulerne.
+
+I stedet for en liste af dicts pr. frame holder hver tabel én NumPy-kolonne
+pr. felt. Tolerancer og det samlede AND evalueres som vektor-operationer,
+og de menneskelæsbare "reason"-tekster bygges først når de faktisk vises
+eller eksporteres.
+
+For bagudkompatibilitet giver tabel[i] en letvægts række-visning, der kan
+slås op i som den gamle dict (r["valid_size"], r["reason"], ...), så
+overlays, debug-print og testscripts virker uændret.
+
+Funktionalitet:
+- SizeTable: width_mm, height_mm, valid_width, valid_height, valid_size
+- EvalTable: overall + form/size/color/special som bool-kolonner,
+  geometri og QC-datapunkter slås op i modulernes resultater
+- FormResult / ColorResult / SpecialResult: typede records med
+  __slots__ pr. objekt. De refererer konturen fra findContours direkte
+  (ingen kopi), og bbox-punkter/reason-tekster beregnes først ved brug
+- column(results, key): én kolonne fra en tabel ELLER en liste af
+  records/rækker (bruges når TrackCache har flettet rækker fra flere frames)
+"""
+from dataclasses import dataclass, field
+
+import cv2 as cv
+import numpy as np
+
+
+def column(results, key, dtype=bool) -> np.ndarray:
+    """Returnerer feltet key for alle rækker som NumPy-array."""
+    col = getattr(results, "column", None)
+    if col is not None:
+        return col(key)
+    return np.fromiter((r[key] for r in results), dtype=dtype, count=len(results))
+
+
+class _Row:
+    """
+    Række-visning ind i en tabel (ingen kopi af data).
+    Opfører sig som en read-only dict: r[key], r.get(key), key in r, keys().
+    """
+    __slots__ = ("_t", "_i")
+
+    def __init__(self, table, idx):
+        self._t = table
+        self._i = idx
+
+    def __getitem__(self, key):
+        return self._t.value(self._i, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self._t.KEYS
+
+    def keys(self):
+        return self._t.KEYS
+
+    def to_dict(self) -> dict:
+        return {k: self[k] for k in self._t.KEYS}
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class _Table:
+    """Fælles sekvens-protokol: len(), tabel[i], iteration over rækker."""
+    __slots__ = ()
+    KEYS = ()
+
+    def __getitem__(self, idx):
+        n = len(self)
+        if not -n <= idx < n:
+            raise IndexError(idx)
+        return _Row(self, idx % n)
+
+    def __iter__(self):
+        return (_Row(self, i) for i in range(len(self)))
+
+    def rows(self) -> list[dict]:
+        """Alle rækker som almindelige dicts (fx til eksport/logning)."""
+        return [r.to_dict() for r in self]
+
+
+# ======================================================
+# RECORDS (ét pr. objekt)
+# ======================================================
+class _Record:
+    """
+    Dict-kompatibel adgang til et slotted record: r["area"], r.get(...),
+    "key" in r, r.keys(). KEYS er det eksplicitte skema som overlays og
+    eksport kan regne med.
+    """
+    __slots__ = ()
+    KEYS = ()
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.KEYS else default
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def keys(self):
+        return self.KEYS
+
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.KEYS}
+
+
+@dataclass(slots=True, eq=False)
+class FormResult(_Record):
+    """Resultat fra QCForm for ét objekt."""
+    valid: bool
+    area: float
+    center: tuple
+    width: float
+    height: float
+    angle: float
+    aspect_ratio: float
+    solidity: float
+    extent: float
+    reason: str
+    contour: np.ndarray = field(repr=False)     # reference til findContours-output
+    rect: tuple = field(repr=False)             # minAreaRect
+    _box: np.ndarray = field(default=None, repr=False)
+
+    KEYS = ("valid", "area", "center", "width", "height", "angle", "aspect_ratio",
+            "solidity", "extent", "bbox_points", "reason", "contour", "rect")
+
+    @property
+    def bbox_points(self) -> np.ndarray:
+        # boxPoints kun for objekter der faktisk tegnes / bruges som ROI
+        if self._box is None:
+            self._box = np.int32(cv.boxPoints(self.rect))
+        return self._box
+
+
+@dataclass(slots=True, eq=False)
+class ColorResult(_Record):
+    """Resultat fra QCColor for ét objekt."""
+    mean_lab: np.ndarray
+    deltaE: float                   # score: ΔE, ΔE00 eller Mahalanobis (se metric)
+    valid_color: bool
+    tolerance_dE: float = field(repr=False)
+    outlier_frac: float = 0.0       # andel outlier-pixels (kun med ColorModel)
+    max_outlier_frac: float = field(default=1.0, repr=False)
+    metric: str = field(default="ΔE", repr=False)
+
+    KEYS = ("mean_lab", "deltaE", "valid_color", "outlier_frac", "reason")
+
+    @property
+    def reason(self) -> str:
+        if self.valid_color:
+            return "OK"
+        if self.deltaE > self.tolerance_dE:
+            return f"{self.metric}={self.deltaE:.1f} > {self.tolerance_dE}"
+        return f"Outliers {self.outlier_frac:.0%} > {self.max_outlier_frac:.0%}"
+
+
+@dataclass(slots=True, eq=False)
+class SpecialResult(_Record):
+    """Resultat fra QCSpecial for ét objekt."""
+    hole_count: int
+    hole_areas: list
+    valid_special: bool
+
+    KEYS = ("hole_count", "hole_areas", "valid_special", "reason")
+
+    @property
+    def reason(self) -> str:
+        return "OK" if self.valid_special else f"Wrong number of holes ({self.hole_count} found)"
+
+
+# ======================================================
+# QC SIZE
+# ======================================================
+class SizeTable(_Table):
+    """
+    Størrelsesresultater for alle objekter i ét frame.
+
+    Kolonner:
+        width_mm, height_mm (float64)
+        valid_width, valid_height, valid_size (bool)
+    """
+    __slots__ = ("width_mm", "height_mm", "valid_width", "valid_height", "valid_size")
+    KEYS = ("width_mm", "height_mm", "valid_size", "reason")
+
+    def __init__(self, width_mm, height_mm, valid_width, valid_height):
+        self.width_mm = np.asarray(width_mm, dtype=np.float64)
+        self.height_mm = np.asarray(height_mm, dtype=np.float64)
+        self.valid_width = np.asarray(valid_width, dtype=bool)
+        self.valid_height = np.asarray(valid_height, dtype=bool)
+        self.valid_size = self.valid_width & self.valid_height
+
+    def __len__(self):
+        return len(self.width_mm)
+
+    def column(self, key):
+        if key == "reason":
+            return np.array([self.reason(i) for i in range(len(self))], dtype=object)
+        return getattr(self, key)
+
+    def reason(self, i) -> str:
+        if self.valid_size[i]:
+            return "OK"
+        if not self.valid_width[i]:
+            return f"Width out of tolerance (measured {self.width_mm[i]:.2f} mm)"
+        return f"Height out of tolerance (measured {self.height_mm[i]:.2f} mm)"
+
+    def value(self, i, key):
+        if key == "reason":
+            return self.reason(i)
+        if key in ("width_mm", "height_mm"):
+            return float(getattr(self, key)[i])
+        if key in ("valid_size", "valid_width", "valid_height"):
+            return bool(getattr(self, key)[i])
+        raise KeyError(key)
+
+
+# ======================================================
+# QC EVALUATE
+# ======================================================
+class EvalTable(_Table):
+    """
+    Samlet QC-resultat for alle objekter i ét frame.
+
+    Bool-kolonnerne (overall, form, size, color, special) ejes af tabellen.
+    Geometri og datapunkter slås op i modulernes egne resultater, så intet
+    kopieres pr. frame. "reasons" bygges først når en række læses.
+    """
+    __slots__ = ("overall", "form", "size", "color", "special",
+                 "_forms", "_sizes", "_colors", "_specials")
+
+    KEYS = ("overall", "form", "size", "color", "special", "reasons",
+            "center", "angle", "bbox", "width_mm", "height_mm",
+            "deltaE", "mean_lab", "hole_count", "hole_areas")
+
+    # nøgle → (kilde, felt i kilden)
+    _LOOKUP = {
+        "center": ("_forms", "center"),
+        "angle": ("_forms", "angle"),
+        "bbox": ("_forms", "bbox_points"),
+        "width_mm": ("_sizes", "width_mm"),
+        "height_mm": ("_sizes", "height_mm"),
+        "deltaE": ("_colors", "deltaE"),
+        "mean_lab": ("_colors", "mean_lab"),
+        "hole_count": ("_specials", "hole_count"),
+        "hole_areas": ("_specials", "hole_areas"),
+    }
+
+    def __init__(self, form, size, color, special, forms, sizes, colors, specials):
+        self.form = form
+        self.size = size
+        self.color = color
+        self.special = special
+        self.overall = form & size & color & special
+
+        self._forms = forms
+        self._sizes = sizes
+        self._colors = colors
+        self._specials = specials
+
+    def __len__(self):
+        return len(self.overall)
+
+    def column(self, key):
+        if key in ("overall", "form", "size", "color", "special"):
+            return getattr(self, key)
+        return np.array([self.value(i, key) for i in range(len(self))], dtype=object)
+
+    def reasons(self, i) -> list[str]:
+        reasons = []
+        if not self.form[i]:
+            reasons.append(f"FORM: {self._forms[i]['reason']}")
+        if not self.size[i]:
+            reasons.append(f"SIZE: {self._sizes[i]['reason']}")
+        if not self.color[i]:
+            reasons.append(f"COLOR: {self._colors[i]['reason']}")
+        if not self.special[i]:
+            reasons.append(f"SPECIAL: {self._specials[i]['reason']}")
+        return reasons
+
+    def value(self, i, key):
+        if key in ("overall", "form", "size", "color", "special"):
+            return bool(getattr(self, key)[i])
+        if key == "reasons":
+            return self.reasons(i)
+        try:
+            source, field = self._LOOKUP[key]
+        except KeyError:
+            raise KeyError(key) from None
+        return getattr(self, source)[i][field]
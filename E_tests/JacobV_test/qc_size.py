@@ -1,14 +1,26 @@
 # qc_size.py
+import cv2 as cv
 import numpy as np
 
+from qc_results import SizeTable
+
 
 class QCSize:
     """
     QC Size
     -------
-    Modulet modtager form-features fra QCForm (width/height i pixels),
-    omregner dem til millimeter via mm_per_pixel,
-    og validerer om objektets fysiske størrelse er korrekt.
+    Modulet modtager form-features fra QCForm (minAreaRect i pixels),
+    omregner dem til millimeter og validerer om objektets fysiske
+    størrelse er korrekt.
+
+    Med en HomographyMapper mappes hvert emnes fire minAreaRect-hjørner
+    gennem homografien (ét batch-kald for alle emner), og siderne måles
+    direkte i mm – den lokale skala varierer hen over bakken, så en global
+    mm_per_pixel fejlvurderer emner ude ved kanterne. Uden mapper bruges
+    mm_per_pixel som før.
+
+    Resultatet er en SizeTable (kolonner), hvor tabel[i] kan bruges som
+    den gamle dict: r["width_mm"], r["valid_size"], r["reason"].
     """
 
     def __init__(self,
@@ -16,13 +28,14 @@ class QCSize:
                  expected_width_mm: float = 100.0,
                  expected_height_mm: float = 25.0,
                  tolerance_width_mm: float = 8.5,
-                 tolerance_height_mm: float = 4.5):
+                 tolerance_height_mm: float = 4.5,
+                 mapper=None):
 
         """
         Kalibreringsparametre:
 
         mm_per_pixel:
-            Fast kalibreringsfaktor (mm pr. pixel).
+            Fast kalibreringsfaktor (mm pr. pixel) – bruges kun uden mapper.
 
         expected_width_mm / expected_height_mm:
             Objektets FAKTISKE mål i millimeter baseret på billeddata.
@@ -30,60 +43,74 @@ class QCSize:
 
         tolerance_width_mm / tolerance_height_mm:
             Tilladt afvigelse i mm.
+
+        mapper:
+            HomographyMapper (pixel → robot-mm). Kan skiftes ud mellem
+            frames (qc_main sætter den ved hver ny kalibrerings-version).
         """
         self.mm_per_pixel = mm_per_pixel
         self.expected_width_mm = expected_width_mm
         self.expected_height_mm = expected_height_mm
         self.tol_w = tolerance_width_mm
         self.tol_h = tolerance_height_mm
+        self.mapper = mapper
 
     # ------------------------------------------------------------------
     # 1) Evaluér størrelse for alle objekter
     # ------------------------------------------------------------------
-    def evaluate_all(self, form_results: list) -> list:
+    def evaluate_all(self, form_results: list) -> SizeTable:
         """
         form_results:
             Liste af dicts returneret fra QC Form.
 
         Returnerer:
-            Liste af dicts med width_mm, height_mm, valid_size, reason
+            SizeTable med width_mm, height_mm, valid_size og (lazy) reason.
+            Tolerancetjekket sker som vektor-operationer over alle objekter.
         """
-        size_results = []
-
-        for r in form_results:
-
-            # Pixelmål fra QC Form
-            w_px = r["width"]
-            h_px = r["height"]
-
-            # Konverter pixels → mm
-            w_mm = w_px * self.mm_per_pixel
-            h_mm = h_px * self.mm_per_pixel
+        n = len(form_results)
 
-            # Tolerancetjek
-            valid_width = abs(w_mm - self.expected_width_mm) <= self.tol_w
-            valid_height = abs(h_mm - self.expected_height_mm) <= self.tol_h
+        if self.mapper is not None and n:
+            w_mm, h_mm = self.measure_mm(form_results)
+        else:
+            # Pixelmål fra QC Form → mm
+            w_mm = np.fromiter((r["width"] for r in form_results), dtype=np.float64, count=n) * self.mm_per_pixel
+            h_mm = np.fromiter((r["height"] for r in form_results), dtype=np.float64, count=n) * self.mm_per_pixel
 
-            valid_size = valid_width and valid_height
+        # Tolerancetjek
+        valid_width = np.abs(w_mm - self.expected_width_mm) <= self.tol_w
+        valid_height = np.abs(h_mm - self.expected_height_mm) <= self.tol_h
 
-            if not valid_size:
-                if not valid_width:
-                    reason = f"Width out of tolerance (measured {w_mm:.2f} mm)"
-                elif not valid_height:
-                    reason = f"Height out of tolerance (measured {h_mm:.2f} mm)"
-                else:
-                    reason = "Out of tolerance"
-            else:
-                reason = "OK"
+        return SizeTable(w_mm, h_mm, valid_width, valid_height)
 
-            size_results.append({
-                "width_mm": w_mm,
-                "height_mm": h_mm,
-                "valid_size": valid_size,
-                "reason": reason
-            })
+    def measure_mm(self, form_results: list):
+        """
+        Mapper minAreaRect-hjørnerne for alle objekter gennem homografien
+        i ét kald og måler siderne i mm.
 
-        return size_results
+        Returnerer:
+            (width_mm, height_mm) – længste/korteste side som QCForm's
+            normalisering. Under perspektiv er firkanten ikke længere et
+            rektangel, så modstående sider midles.
+        """
+        n = len(form_results)
+        # dict-adgang som de andre moduler – virker også med almindelige dicts
+        rects = [r["rect"] if "rect" in r else cv.minAreaRect(r["contour"]) for r in form_results]
+        center = np.array([rc[0] for rc in rects], dtype=np.float64)
+        size = np.array([rc[1] for rc in rects], dtype=np.float64)
+        theta = np.radians([rc[2] for rc in rects])
+
+        cos, sin = np.cos(theta), np.sin(theta)
+        u = np.stack([cos, sin], axis=1) * (size[:, :1] / 2)     # langs rect-bredden
+        v = np.stack([-sin, cos], axis=1) * (size[:, 1:] / 2)    # langs rect-højden
+        corners = np.stack([center - u - v, center + u - v,
+                            center + u + v, center - u + v], axis=1)
+
+        world = self.mapper.pixels_to_robot(corners.reshape(-1, 2)).reshape(n, 4, 2)
+        sides = np.linalg.norm(np.roll(world, -1, axis=1) - world, axis=2)   # (n, 4)
+
+        side_u = 0.5 * (sides[:, 0] + sides[:, 2])
+        side_v = 0.5 * (sides[:, 1] + sides[:, 3])
+        return np.maximum(side_u, side_v), np.minimum(side_u, side_v)
 
     # ------------------------------------------------------------------
     # 2) Visualisering: separat SIZES overlay
@@ -96,10 +123,8 @@ class QCSize:
             Rød  = størrelse NOT OK
 
         form_results: liste fra QCForm (pixels)
-        size_results: liste fra QCSize (mm + valid_size)
+        size_results: SizeTable fra QCSize (mm + valid_size)
         """
-        import cv2 as cv
-
         vis = frame.copy()
 
         for fr, sr in zip(form_results, size_results):
@@ -2,6 +2,8 @@
 import cv2 as cv
 import numpy as np
 
+from qc_results import SpecialResult
+
 
 class QCSpecial:
     """
@@ -43,11 +45,11 @@ class QCSpecial:
             Liste fra QCForm med bounding boxes og contourinfo
 
         Returnerer:
-            Liste af dicts med:
+            Liste af SpecialResult med:
                 - hole_count
                 - hole_areas
                 - valid_special
-                - reason
+                - reason (bygges først ved opslag)
         """
 
         results = []
@@ -82,19 +84,11 @@ class QCSpecial:
                             hole_count += 1
 
             # 4) Validitet
-            valid_special = (hole_count == self.expected_hole_count)
-
-            if not valid_special:
-                reason = f"Wrong number of holes ({hole_count} found)"
-            else:
-                reason = "OK"
-
-            results.append({
-                "hole_count": hole_count,
-                "hole_areas": hole_areas,
-                "valid_special": valid_special,
-                "reason": reason
-            })
+            results.append(SpecialResult(
+                hole_count=hole_count,
+                hole_areas=hole_areas,
+                valid_special=(hole_count == self.expected_hole_count),
+            ))
 
         return results
 
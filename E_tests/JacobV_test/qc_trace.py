@@ -0,0 +1,157 @@
+"""
+qc_trace.py
+Letvægts-tracing af QC-pipelinen: hvor bliver tiden af pr. frame?
+
+Funktionalitet:
+- Spans pr. frame for hvert trin (camera → preprocess → form/size/color/
+  special → evaluate → pose → export → draw)
+- Rullende p50/p95/p99 over de seneste N frames pr. trin
+- Tekst-overlay med statistikken direkte i QC-vinduet
+- Dump til JSON (inkl. robot-sidens send → DONE tider fra B_Robot)
+
+Overhead er to perf_counter-kald og én deque.append pr. span.
+"""
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import cv2 as cv
+import numpy as np
+
+# Rækkefølge i overlay/dump – ukendte trin kommer bagefter
+STAGE_ORDER = (
+    "camera", "preprocess", "form", "size", "color", "special",
+    "evaluate", "pose", "export", "draw", "frame",
+)
+
+
+class QCTracer:
+    """
+    Samler tider pr. trin og frame.
+
+    Parametre:
+        window (int): Antal frames der indgår i de rullende percentiler.
+
+    Metoder:
+        - begin_frame(camera_latency_s): starter en ny frame
+        - span(name): context manager der tager tid på et trin
+        - record(name, ms): registrerer en tid manuelt
+        - end_frame(): registrerer samlet frame-tid
+        - last(name): seneste frames tid for et trin (ms)
+        - summary(): {trin: {n, mean, p50, p95, p99}}
+        - draw_overlay(img): skriver statistikken på et billede
+        - dump(path, extra_files): gemmer summary + rå samples som JSON
+    """
+
+    def __init__(self, window: int = 300):
+        self.window = window
+        self.samples: dict[str, deque] = {}
+        self.current: dict[str, float] = {}
+        self._frame_t0 = None
+
+    # ------------------------------------------------------------
+    # Registrering
+    # ------------------------------------------------------------
+    def begin_frame(self, camera_latency_s: float | None = None) -> None:
+        """
+    Starter en ny frame. camera_latency_s er tiden fra sensorens
+    eksponering til frame'en er modtaget på host (fra OakCamera).
+    """
+        self._frame_t0 = time.perf_counter()
+        self.current = {}
+        if camera_latency_s is not None:
+            self.record("camera", camera_latency_s * 1000.0)
+
+    @contextmanager
+    def span(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - t0) * 1000.0)
+
+    def record(self, name: str, ms: float) -> None:
+        self.current[name] = self.current.get(name, 0.0) + ms
+        buf = self.samples.get(name)
+        if buf is None:
+            buf = self.samples[name] = deque(maxlen=self.window)
+        buf.append(ms)
+
+    def end_frame(self) -> None:
+        if self._frame_t0 is not None:
+            self.record("frame", (time.perf_counter() - self._frame_t0) * 1000.0)
+            self._frame_t0 = None
+
+    def last(self, name: str) -> float:
+        return self.current.get(name, 0.0)
+
+    # ------------------------------------------------------------
+    # Statistik
+    # ------------------------------------------------------------
+    def _ordered(self):
+        known = [s for s in STAGE_ORDER if s in self.samples]
+        return known + sorted(s for s in self.samples if s not in STAGE_ORDER)
+
+    def summary(self) -> dict:
+        out = {}
+        for name in self._ordered():
+            arr = np.fromiter(self.samples[name], dtype=np.float64)
+            if arr.size == 0:
+                continue
+            p50, p95, p99 = np.percentile(arr, (50, 95, 99))
+            out[name] = {
+                "n": int(arr.size),
+                "mean": float(arr.mean()),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+            }
+        return out
+
+    # ------------------------------------------------------------
+    # Visning + dump
+    # ------------------------------------------------------------
+    def draw_overlay(self, img, origin=(10, 20), line_h=16):
+        """Skriver 'trin  p50 / p95 / p99 ms' linjer i øverste venstre hjørne."""
+        x, y = origin
+        for name, st in self.summary().items():
+            text = f"{name:<10} {st['p50']:6.1f} {st['p95']:6.1f} {st['p99']:6.1f} ms"
+            cv.putText(img, text, (x, y), cv.FONT_HERSHEY_PLAIN, 1.0, (0, 0, 0), 3)
+            cv.putText(img, text, (x, y), cv.FONT_HERSHEY_PLAIN, 1.0, (255, 255, 255), 1)
+            y += line_h
+        return img
+
+    def dump(self, path, extra_files=()) -> Path:
+        """
+    Gemmer statistik og rå samples som JSON.
+
+    Parametre:
+        path (str | Path): Output-fil.
+        extra_files (iterable[Path]): JSON-filer der flettes ind under
+            "external" (fx robot-lytterens 'robot_latency.json').
+
+    Returnerer:
+        Path - stien til den skrevne fil.
+    """
+        path = Path(path)
+        data = {
+            "window": self.window,
+            "time": time.time(),
+            "summary": self.summary(),
+            "samples": {k: list(v) for k, v in self.samples.items()},
+            "external": {},
+        }
+        for extra in extra_files:
+            extra = Path(extra)
+            try:
+                with open(extra, "r", encoding="utf-8") as f:
+                    data["external"][extra.stem] = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        print(f"[TRACE] Saved trace → {path}")
+        return path
@@ -30,6 +30,8 @@ class OakCamera:
         device     : dai.Device instans (initialiseres ved start())
         q_video    : OutputQueue fra kameraet
         initialized: Boolean, om kameraet er startet
+        last_latency_s: Tid fra sensor-eksponering til seneste frame blev
+                        modtaget på host (sekunder, None før første frame)
 
     Funktionalitet:
         - start(): opbygger pipeline og åbner connection til kameraet
@@ -43,6 +45,7 @@ class OakCamera:
         self.device = None
         self.q_video = None
         self.initialized = False
+        self.last_latency_s = None
 
     # --------------------------------------------------
     # Build DepthAI Pipeline
@@ -129,6 +132,9 @@ class OakCamera:
         if msg is None:
             return None
 
+        # device-tidsstempel er synkroniseret med host-uret (dai.Clock)
+        self.last_latency_s = (dai.Clock.now() - msg.getTimestamp()).total_seconds()
+
         frame = msg.getCvFrame()
 
         # 180° rotate
@@ -3,11 +3,6 @@ import threading
 import sys
 import time
 import queue
-import os
-
-# Add parent directory to path to import B_Robot
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from B_Robot.send_worker import SendWorker
 
 HOST = "192.168.137.51"  # Server (Doosan Robot) IP
 PORT = 20002  # Server Port
@@ -29,6 +24,41 @@ class Doosan_robot():
 
 
 
+    def send_worker(self, cmd_queue, s_getter, disconnect_event, stop_event):
+        """Worker: tager kommandoer fra køen og sender dem over den aktuelle socket.
+        s_getter er en callable der returnerer den aktuelle socket-objekt (eller None).
+        stop_event bruges ved program-afslutning.
+        """
+        try:
+            while not (disconnect_event.is_set() or stop_event.is_set()):
+                try:
+                    command = cmd_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                if not command:
+                    continue
+                command_up = command.upper().strip()
+                if not command_up.endswith('\r\n'):
+                    command_up += '\r\n'
+
+                try:
+                    sock = s_getter()
+                    if sock:
+                        sock.sendall(command_up.encode())
+                        print(f"✓ Sendt: {command_up.strip()}")
+                    else:
+                        # Ingen forbindelse: sæt tilbage i kø og vent
+                        cmd_queue.put(command)
+                        time.sleep(0.2)
+                except Exception as e:
+                    print(f"Fejl ved sending af kommando: {e}")
+                    disconnect_event.set()
+                    cmd_queue.put(command)
+                    return
+        except Exception as e:
+            print(f"Send worker stoppet: {e}")
+
     def receive_data(self ,s, disconnect_event):
         """Funktion til at modtage data fra serveren.
         Sætter disconnect_event hvis forbindelsen lukkes eller fejl opstår.
@@ -114,7 +144,7 @@ class Doosan_robot():
                         return s
 
                     send_stop = threading.Event()
-                    send_thread = threading.Thread(target=SendWorker.send_worker, args=(globals()['cmd_queue'], s_getter, disconnect_event, send_stop), daemon=True)
+                    send_thread = threading.Thread(target=self.send_worker, args=(globals()['cmd_queue'], s_getter, disconnect_event, send_stop), daemon=True)
                     send_thread.start()
 
                     # Vent indtil vi mister forbindelsen
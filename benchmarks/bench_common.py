@@ -0,0 +1,291 @@
+"""
+bench_common.py
+Fælles hjælpefunktioner til benchmarks – kører QC-pipelinen offline
+(uden kamera) præcis som qc_main gør det.
+
+Funktionalitet:
+- Path-setup så QC-modulerne (E_tests/JacobV_test) og A_Vision kan importeres
+- build_qc_modules(): samme QC-parametre som qc_main
+- load_frames(): frames fra C_data/Sample_images (eller en anden mappe,
+  fx syntetiske bakker fra synth_tray.py)
+- variant(frame, scale, tiles): skalerer og/eller tiler et frame, så
+  både opløsning og antal objekter kan skrues op
+- run_pipeline(frame, modules, span): ét frame gennem alle trin, hvor
+  span(name) er en context manager der måler trinnet (tid eller hukommelse)
+- StageTimer / MemoryProbe: tid og peak-hukommelse pr. trin
+"""
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import cv2 as cv
+import numpy as np
+
+# -------------------------------------------
+# PATH SETUP
+# -------------------------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+QC_DIR = PROJECT_ROOT / "E_tests" / "JacobV_test"
+SAMPLE_DIR = PROJECT_ROOT / "C_data" / "Sample_images"
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+sys.path.append(str(PROJECT_ROOT))
+sys.path.append(str(QC_DIR))
+
+from qc_preprocess import QCPreprocess, load_settings
+from qc_form import QCForm
+from qc_size import QCSize
+from qc_color import QCColor
+from qc_color_model import COLOR_MODEL_PATH, ColorModel
+from qc_special import QCSpecial
+from qc_evaluate import QCEvaluate
+from mapping import HomographyMapper
+from A_Vision.Vision_processing import generate_mask_from_settings
+from A_Vision.Vision_buffers import BufferPool
+from A_Vision.Calibration_store import LEGACY_MM_PER_PIXEL, LEGACY_ROI, Calibration, CalibrationStore
+from A_Vision.Vision_pose import PoseModel, contour_angles
+
+# qc_main's kamera er 1920×1080 – vinkelmodellens anker (se Vision_pose)
+QC_FRAME_CENTER = (960.0, 540.0)
+
+# Rækkefølge i rapporter
+STAGES = (
+    "preprocess", "vision_mask", "form", "size", "color", "special",
+    "evaluate", "pose", "frame",
+)
+
+
+# ======================================================
+# QC MODULER (samme parametre som qc_main)
+# ======================================================
+def build_qc_modules(form_backend: str = "contours") -> dict:
+    """
+    Returnerer dict med QC-instanserne og homografien.
+
+    form_backend vælger QCForm-backend ("contours" / "components").
+
+    Nøgler: form, size, color, special, eval, mapper, pose, settings, pool
+    (pool er BufferPool'en som preprocess skriver i, som i qc_main)
+    """
+    # aktiv version i kalibrerings-registret, ellers den gamle npz
+    calib = CalibrationStore().current()
+    if calib is not None:
+        mapper = HomographyMapper(H=calib.H)
+    else:
+        try:
+            mapper = HomographyMapper.from_file()
+        except FileNotFoundError:
+            mapper = None
+            print("[BENCH] Ingen homografi fundet – pose-trinnet springes over.")
+
+    return {
+        "form": QCForm(min_area=1500, min_aspect=2.0, max_aspect=7.0,
+                       min_solidity=0.88, min_extent=0.90, backend=form_backend),
+        "size": QCSize(mm_per_pixel=calib.mm_per_pixel if calib else LEGACY_MM_PER_PIXEL,
+                       expected_width_mm=100.0,
+                       expected_height_mm=25.0, tolerance_width_mm=5.0,
+                       tolerance_height_mm=3.0, mapper=mapper),
+        "color": QCColor(reference_lab=np.array([107.30, 187.07, 160.88]),
+                         tolerance_dE=25.0,
+                         model=ColorModel.load(COLOR_MODEL_PATH) if COLOR_MODEL_PATH.exists() else None),
+        "special": QCSpecial(expected_hole_count=2, min_hole_area=50),
+        "eval": QCEvaluate(),
+        "mapper": mapper,
+        # samme vinkelmodel som qc_main (gamle offsets hvis registret er tomt)
+        "pose": None if mapper is None else PoseModel.from_calibration(
+            calib or Calibration(H=mapper.H, roi=LEGACY_ROI),
+            anchor_px=QC_FRAME_CENTER),
+        "settings": load_settings(),
+        "pool": BufferPool(),
+    }
+
+
+# ======================================================
+# BILLEDER
+# ======================================================
+def load_frames(pattern: str = "frame_*.png", directory: Path = SAMPLE_DIR) -> dict:
+    """Indlæser alle frames i directory der matcher pattern → {filnavn: BGR-billede}."""
+    directory = Path(directory)
+    frames = {}
+    for path in sorted(directory.glob(pattern)):
+        img = cv.imread(str(path))
+        if img is None:
+            print(f"[BENCH] Kunne ikke læse {path.name} – springer over")
+            continue
+        frames[path.stem] = img
+    if not frames:
+        raise FileNotFoundError(f"Ingen billeder matcher {pattern} i {directory}")
+    return frames
+
+
+def variant(frame: np.ndarray, scale: float = 1.0, tiles: int = 1) -> np.ndarray:
+    """
+    Skalerer frame med scale og tiler det tiles × tiles gange.
+    Tiling giver tiles² gange så mange objekter i samme billede.
+    """
+    if scale != 1.0:
+        h, w = frame.shape[:2]
+        interp = cv.INTER_AREA if scale < 1.0 else cv.INTER_LINEAR
+        frame = cv.resize(frame, (int(w * scale), int(h * scale)), interpolation=interp)
+    if tiles > 1:
+        frame = np.ascontiguousarray(np.tile(frame, (tiles, tiles, 1)))
+    return frame
+
+
+# ======================================================
+# PIPELINE
+# ======================================================
+@contextmanager
+def _no_span(name):
+    yield
+
+
+def run_pipeline(frame: np.ndarray, modules: dict, span=_no_span, detect_scale: float = 1.0) -> dict:
+    """
+    Kører ét frame gennem hele QC-pipelinen (samme rækkefølge som qc_main).
+
+    Parametre:
+        frame (ndarray): BGR-billede.
+        modules (dict): Fra build_qc_modules().
+        span (callable): span(name) → context manager omkring hvert trin.
+        detect_scale (float): Preprocess på et nedskaleret frame og skalér
+            masken op igen – som qc_main's DOWNSCALED-niveau. Resten af
+            pipelinen kører i fuld opløsning (pixel-tolerancer, homografi).
+
+    Returnerer:
+        dict med form/size/color/special/final-resultater og poses.
+    """
+    with span("frame"):
+        with span("preprocess"):
+            pool = modules["pool"]
+            if detect_scale == 1.0:
+                mask, gray, thresh, edges, debug = QCPreprocess(frame, pool)
+            else:
+                h, w = frame.shape[:2]
+                sw, sh = int(w * detect_scale), int(h * detect_scale)
+                small = cv.resize(frame, (sw, sh), dst=pool.get("small", (sh, sw, 3)),
+                                  interpolation=cv.INTER_AREA)
+                mask, gray, thresh, edges, debug = QCPreprocess(small, pool)
+                mask = cv.resize(mask, (w, h), dst=pool.get("mask_full", (h, w)),
+                                 interpolation=cv.INTER_NEAREST)
+
+        # A_Vision-masken bruges af kalibreringsværktøjerne – måles for sig
+        with span("vision_mask"):
+            generate_mask_from_settings(frame, modules["settings"], modules["pool"])
+
+        with span("form"):
+            form_results = modules["form"].evaluate_all(mask)
+        with span("size"):
+            size_results = modules["size"].evaluate_all(form_results)
+        with span("color"):
+            color_results = modules["color"].evaluate_all(frame, form_results)
+        with span("special"):
+            special_results = modules["special"].evaluate_all(mask, form_results)
+        with span("evaluate"):
+            final_results = modules["eval"].combine(
+                form_results, size_results, color_results, special_results
+            )
+
+        poses = []
+        with span("pose"):
+            pose_model = modules["pose"]
+            if pose_model is not None and form_results:
+                centers = [fr["center"] for fr in form_results]
+                robot_xy, tool_deg = pose_model.poses(
+                    centers, contour_angles([fr["contour"] for fr in form_results]))
+                for idx, center in enumerate(centers):
+                    poses.append({
+                        "id": idx + 1,
+                        "center_px": center,
+                        "angle_deg": float(tool_deg[idx]),
+                        "robot_xy": (float(robot_xy[idx, 0]), float(robot_xy[idx, 1])),
+                    })
+
+    return {
+        "mask": mask,
+        "form": form_results,
+        "size": size_results,
+        "color": color_results,
+        "special": special_results,
+        "final": final_results,
+        "poses": poses,
+    }
+
+
+# ======================================================
+# TID + HUKOMMELSE
+# ======================================================
+class StageTimer:
+    """Samler tider (ms) pr. trin over flere kørsler."""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+
+    @contextmanager
+    def span(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.setdefault(name, []).append((time.perf_counter() - t0) * 1000.0)
+
+    def stats(self) -> dict:
+        return {name: {"p50_ms": float(np.median(v)), "min_ms": float(np.min(v))}
+                for name, v in self.samples.items()}
+
+
+class MemoryProbe:
+    """
+    Måler peak-allokering pr. trin med tracemalloc.
+
+    numpy- og OpenCV-arrays allokeres via numpy og tælles derfor med.
+    Værdien er peak over trinnets start (KB), dvs. hvad trinnet kræver
+    oven i det der allerede ligger i hukommelsen. Tracemalloc gør koden
+    langsommere, så tid og hukommelse måles i separate kørsler.
+    """
+
+    def __init__(self):
+        self.peak_kb: dict[str, float] = {}
+        self._stack = []   # [start, absolut peak] for åbne spans
+
+    @contextmanager
+    def span(self, name: str):
+        # reset_peak() i et indre trin må ikke tabe det ydre trins peak,
+        # så peak propageres op gennem stakken
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        self._stack.append([current, current])
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            start, top = self._stack.pop()
+            _, peak = tracemalloc.get_traced_memory()
+            top = max(top, peak)
+            if self._stack:
+                self._stack[-1][1] = max(self._stack[-1][1], top)
+            kb = (top - start) / 1024.0
+            self.peak_kb[name] = max(self.peak_kb.get(name, 0.0), kb)
+
+    def run(self, frame, modules) -> dict:
+        tracemalloc.start()
+        try:
+            run_pipeline(frame, modules, self.span)
+        finally:
+            tracemalloc.stop()
+        return self.peak_kb
+
+
+def save_json(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def load_json(path: Path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
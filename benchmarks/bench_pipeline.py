@@ -0,0 +1,178 @@
+"""
+bench_pipeline.py
+Offline benchmark af QC-pipelinen over C_data/Sample_images.
+
+Hvert frame køres ved flere opløsninger (scale) og objekt-antal (tiles ×
+tiles kopier af billedet). Pr. trin måles tid (median og min over
+--repeat kørsler) og peak-hukommelse (tracemalloc, én separat kørsel).
+
+Resultatet gemmes som JSON-baseline i benchmarks/baselines/, og en ny
+kørsel kan sammenlignes med en gemt baseline – så en regression viser
+sig på en laptop uden kamera.
+
+Brug (fra projektroden):
+    python benchmarks/bench_pipeline.py --save laptop
+    python benchmarks/bench_pipeline.py --compare laptop
+    python benchmarks/bench_pipeline.py --scales 0.5 1 --tiles 1 4 --repeat 10
+    python benchmarks/bench_pipeline.py --dir benchmarks/data/synthetic --pattern "tray_*.png" --tiles 1
+"""
+import argparse
+import platform
+import sys
+import time
+from pathlib import Path
+
+import cv2 as cv
+import numpy as np
+
+from bench_common import (
+    BASELINE_DIR, SAMPLE_DIR, STAGES, MemoryProbe, StageTimer, build_qc_modules,
+    load_frames, load_json, run_pipeline, save_json, variant,
+)
+
+
+def bench_variant(frame, modules, repeat: int, warmup: int = 1) -> dict:
+    """Benchmarker ét (skaleret/tilet) frame og returnerer resultat-dict."""
+    for _ in range(warmup):
+        result = run_pipeline(frame, modules)
+
+    timer = StageTimer()
+    for _ in range(repeat):
+        run_pipeline(frame, modules, timer.span)
+
+    memory = MemoryProbe().run(frame, modules)
+
+    stages = timer.stats()
+    for name, kb in memory.items():
+        stages.setdefault(name, {})["peak_kb"] = kb
+
+    return {
+        "shape": list(frame.shape[:2]),
+        "objects": len(result["form"]),
+        "ok": sum(1 for r in result["final"] if r["overall"]),
+        "stages": stages,
+    }
+
+
+def run_benchmarks(scales, tiles, repeat, pattern, directory=SAMPLE_DIR,
+                   form_backend="contours") -> dict:
+    modules = build_qc_modules(form_backend)
+    frames = load_frames(pattern, directory)
+
+    results = {}
+    for name, base in frames.items():
+        for s in scales:
+            for t in tiles:
+                key = f"{name}@s{s:g}x{t}"
+                res = bench_variant(variant(base, s, t), modules, repeat)
+                results[key] = res
+                frame_ms = res["stages"]["frame"]["p50_ms"]
+                print(f"[BENCH] {key:<32} {res['shape'][1]:>5}x{res['shape'][0]:<5} "
+                      f"objs={res['objects']:<4} frame={frame_ms:8.2f} ms")
+
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "opencv": cv.__version__,
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+            "processor": platform.processor(),
+            "images": str(directory),
+            "form_backend": form_backend,
+            "repeat": repeat,
+            "scales": list(scales),
+            "tiles": list(tiles),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float,
+            min_ms: float = 0.2, min_kb: float = 64.0) -> list[str]:
+    """
+    Sammenligner to kørsler trin for trin.
+
+    Et trin er en regression hvis det er mere end tolerance (fx 0.25 = 25 %)
+    langsommere/større end baseline OG forskellen er over støjgrænsen
+    (min_ms / min_kb).
+
+    Returnerer:
+        Liste af regressioner som tekstlinjer (tom liste = OK).
+    """
+    regressions = []
+    for key, cur in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+
+        if cur["objects"] != base["objects"]:
+            regressions.append(f"{key}: objekter {base['objects']} → {cur['objects']}")
+
+        for stage in STAGES:
+            c = cur["stages"].get(stage)
+            b = base["stages"].get(stage)
+            if c is None or b is None:
+                continue
+
+            ct, bt = c.get("p50_ms"), b.get("p50_ms")
+            if ct is not None and bt and ct > bt * (1 + tolerance) and ct - bt > min_ms:
+                regressions.append(f"{key} {stage}: {bt:.2f} → {ct:.2f} ms (+{(ct / bt - 1) * 100:.0f}%)")
+
+            cm, bm = c.get("peak_kb"), b.get("peak_kb")
+            if cm is not None and bm and cm > bm * (1 + tolerance) and cm - bm > min_kb:
+                regressions.append(f"{key} {stage}: {bm:.0f} → {cm:.0f} KB (+{(cm / bm - 1) * 100:.0f}%)")
+
+    return regressions
+
+
+def print_summary(data: dict) -> None:
+    header = f"{'variant':<32}" + "".join(f"{s[:8]:>9}" for s in STAGES)
+    print("\n" + "=" * len(header))
+    print(header)
+    print("=" * len(header))
+    for key, res in data["results"].items():
+        row = "".join(f"{res['stages'].get(s, {}).get('p50_ms', float('nan')):9.2f}" for s in STAGES)
+        print(f"{key:<32}{row}")
+    print("(median ms pr. trin)\n")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmark af QC-pipelinen")
+    parser.add_argument("--scales", type=float, nargs="+", default=[0.5, 1.0, 1.5])
+    parser.add_argument("--tiles", type=int, nargs="+", default=[1, 2, 3],
+                        help="tiles × tiles kopier af billedet (flere objekter)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pattern", default="frame_*.png")
+    parser.add_argument("--dir", type=Path, default=SAMPLE_DIR,
+                        help="billedmappe (default C_data/Sample_images)")
+    parser.add_argument("--form-backend", default="contours", choices=("contours", "components"))
+    parser.add_argument("--save", metavar="NAME", help="gem som baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="sammenlign med baselines/NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    data = run_benchmarks(args.scales, args.tiles, args.repeat, args.pattern, args.dir,
+                          args.form_backend)
+    print_summary(data)
+
+    if args.save:
+        path = BASELINE_DIR / f"{args.save}.json"
+        save_json(path, data)
+        print(f"[BENCH] Baseline gemt → {path}")
+
+    if args.compare:
+        baseline = load_json(BASELINE_DIR / f"{args.compare}.json")
+        regressions = compare(data, baseline, args.tolerance)
+        if regressions:
+            print(f"[BENCH] {len(regressions)} regression(er) mod '{args.compare}':")
+            for line in regressions:
+                print("   -", line)
+            return 1
+        print(f"[BENCH] Ingen regressioner mod '{args.compare}' (tolerance {args.tolerance:.0%}).")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
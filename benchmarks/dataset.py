@@ -0,0 +1,96 @@
+"""
+dataset.py
+Labelled datasæt til nøjagtigheds-regression af QC-pipelinen.
+
+Et datasæt er en mappe med billeder og én label-fil pr. billede:
+
+    <navn>.png
+    <navn>.json
+
+Label-filen har samme format som synth_tray.py skriver, så syntetiske
+bakker og håndlabellede kamera-frames scores ens. Kun "center_px" og
+"expected_ok" er påkrævet pr. emne – resten er valgfrit:
+
+    {
+        "version": 1,
+        "image": "frame_1764853751.png",
+        "mm_per_pixel": 0.5098,
+        "objects": [
+            {
+                "id": 1,
+                "center_px": [cx, cy],        # påkrævet
+                "expected_ok": true,          # påkrævet
+                "angle_deg": 37.2,            # [0, 180) som pca_angle – ellers ingen vinkelfejl
+                "expected": {"form": true, "size": true, "color": true, "special": true},
+                "hole_count": 2,
+                "defects": []
+            }
+        ]
+    }
+
+Funktionalitet:
+- load_labels(path): læser og validerer én label-fil
+- save_labels(path, labels): skriver en label-fil (fx efter håndlabelling)
+- iter_dataset(directory): (navn, billede, labels) for hvert labellet billede
+"""
+import json
+from pathlib import Path
+
+import cv2 as cv
+
+DATASET_VERSION = 1
+MODULES = ("form", "size", "color", "special")
+
+
+def load_labels(path) -> dict:
+    """
+    Læser en label-fil og udfylder valgfrie felter med standardværdier.
+
+    Kaster:
+        ValueError hvis versionen er ukendt eller et emne mangler
+        center_px/expected_ok.
+    """
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        labels = json.load(f)
+
+    version = labels.get("version", DATASET_VERSION)
+    if version != DATASET_VERSION:
+        raise ValueError(f"{path.name}: ukendt label-version {version}")
+
+    for idx, obj in enumerate(labels.get("objects", []), start=1):
+        missing = [k for k in ("center_px", "expected_ok") if k not in obj]
+        if missing:
+            raise ValueError(f"{path.name}: emne {idx} mangler {', '.join(missing)}")
+        obj.setdefault("id", idx)
+        obj.setdefault("angle_deg", None)
+        obj.setdefault("expected", {})
+        obj.setdefault("defects", [])
+
+    labels.setdefault("objects", [])
+    labels.setdefault("image", path.with_suffix(".png").name)
+    return labels
+
+
+def save_labels(path, labels: dict) -> None:
+    labels = dict(labels, version=DATASET_VERSION)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(labels, f, indent=2)
+
+
+def iter_dataset(directory, pattern: str = "*.json"):
+    """
+    Gennemløber et datasæt.
+
+    Yields:
+        (navn, BGR-billede, labels) for hver label-fil hvis billede findes.
+    """
+    directory = Path(directory)
+    for label_path in sorted(directory.glob(pattern)):
+        labels = load_labels(label_path)
+        img_path = directory / labels["image"]
+        img = cv.imread(str(img_path))
+        if img is None:
+            print(f"[DATASET] Mangler billede til {label_path.name} – springer over")
+            continue
+        yield label_path.stem, img, labels
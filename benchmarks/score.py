@@ -0,0 +1,277 @@
+"""
+score.py
+Nøjagtighed vs. hastighed: scorer QC-pipelinen mod et labellet datasæt.
+
+For hvert billede køres hele pipelinen (samme trin som qc_main), og hver
+detektion matches til nærmeste label-emne. Rapporten indeholder:
+
+- Detektion: fundne / labellede emner, falske detektioner
+- Verdict: precision/recall for NOK (positiv klasse = defekt emne) og
+  accuracy pr. QC-modul (form/size/color/special)
+- Pose-fejl i mm: detekteret og labellet center mappes begge gennem
+  HomographyMapper og afstanden måles i robotkoordinater
+- Vinkelfejl: billed-orienteringen som pose-trinnet bruger (contour_angles)
+  vs. labellet vinkel
+  (0°/180° er samme orientering)
+- Median-tid pr. trin
+
+Dermed kan hver optimering (nedskalering, ROI-crop, tracking) vurderes på
+både nøjagtighed og hastighed – og to rapporter kan sammenlignes direkte.
+
+Brug (fra projektroden):
+    python benchmarks/score.py benchmarks/data/synthetic --save synth_ref
+    python benchmarks/score.py benchmarks/data/synthetic --scale 0.5 --compare synth_ref
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from bench_common import (
+    BASELINE_DIR, STAGES, StageTimer, build_qc_modules, load_json,
+    run_pipeline, save_json,
+)
+from dataset import MODULES, iter_dataset
+from A_Vision.Vision_pose import contour_angles
+
+
+def match(pred_xy: np.ndarray, true_xy: np.ndarray, max_dist: float) -> list[tuple[int, int, float]]:
+    """
+    Grådig 1:1 matching af detektioner til labels (korteste afstand først).
+
+    Returnerer:
+        Liste af (pred_idx, true_idx, afstand_px).
+    """
+    if len(pred_xy) == 0 or len(true_xy) == 0:
+        return []
+
+    d = np.linalg.norm(pred_xy[:, None, :] - true_xy[None, :, :], axis=2)
+    pi, ti = np.nonzero(d <= max_dist)
+    order = np.argsort(d[pi, ti], kind="stable")
+
+    used_p, used_t, pairs = set(), set(), []
+    for k in order:
+        p, t = int(pi[k]), int(ti[k])
+        if p in used_p or t in used_t:
+            continue
+        used_p.add(p)
+        used_t.add(t)
+        pairs.append((p, t, float(d[p, t])))
+    return pairs
+
+
+def angle_error(a: float, b: float) -> float:
+    """Mindste forskel mellem to orienteringer i [0, 180)."""
+    d = abs(a - b) % 180.0
+    return min(d, 180.0 - d)
+
+
+class Scorer:
+    """
+    Akkumulerer nøjagtighed over et datasæt.
+
+    Parametre:
+        mapper (HomographyMapper | None): Til pose-fejl i mm.
+        match_radius_mm (float): Maks. afstand mellem detektion og label.
+        mm_per_pixel (float): Bruges når label-filen ikke angiver skalaen.
+    """
+
+    def __init__(self, mapper=None, match_radius_mm: float = 15.0, mm_per_pixel: float = 0.5098):
+        self.mapper = mapper
+        self.match_radius_mm = match_radius_mm
+        self.mm_per_pixel = mm_per_pixel
+
+        self.n_true = 0
+        self.n_pred = 0
+        self.n_matched = 0
+        self.tp = self.fp = self.fn = self.tn = 0
+        self.module_hits = {m: [0, 0] for m in MODULES}   # [rigtige, total]
+        self.pose_err_mm: list[float] = []
+        self.angle_err_deg: list[float] = []
+
+    def add(self, result: dict, labels: dict) -> None:
+        """Scorer pipeline-resultatet for ét billede (i label-billedets koordinater)."""
+        objects = labels["objects"]
+        mpp = labels.get("mm_per_pixel", self.mm_per_pixel)
+
+        pred_xy = np.array([fr["center"] for fr in result["form"]], dtype=float).reshape(-1, 2)
+        true_xy = np.array([o["center_px"] for o in objects], dtype=float).reshape(-1, 2)
+
+        pairs = match(pred_xy, true_xy, self.match_radius_mm / mpp)
+
+        self.n_true += len(objects)
+        self.n_pred += len(pred_xy)
+        self.n_matched += len(pairs)
+
+        if self.mapper is not None and pairs:
+            p_idx = [p for p, _, _ in pairs]
+            t_idx = [t for _, t, _ in pairs]
+            pred_mm = self.mapper.pixels_to_robot(pred_xy[p_idx])
+            true_mm = self.mapper.pixels_to_robot(true_xy[t_idx])
+            self.pose_err_mm.extend(np.linalg.norm(pred_mm - true_mm, axis=1).tolist())
+
+        for p, t, _ in pairs:
+            obj = objects[t]
+            final = result["final"][p]
+
+            # verdict – positiv klasse = NOK
+            pred_nok = not final["overall"]
+            true_nok = not obj["expected_ok"]
+            if pred_nok and true_nok:
+                self.tp += 1
+            elif pred_nok:
+                self.fp += 1
+            elif true_nok:
+                self.fn += 1
+            else:
+                self.tn += 1
+
+            for m in MODULES:
+                if m in obj["expected"]:
+                    hits = self.module_hits[m]
+                    hits[0] += int(bool(final[m]) == bool(obj["expected"][m]))
+                    hits[1] += 1
+
+            if obj["angle_deg"] is not None:
+                pred_angle = contour_angles([result["form"][p]["contour"]])[0]
+                self.angle_err_deg.append(angle_error(pred_angle, obj["angle_deg"]))
+
+        # et defekt emne der ikke blev fundet, er heller ikke sorteret fra
+        unmatched = set(range(len(objects))) - {t for _, t, _ in pairs}
+        self.fn += sum(1 for t in unmatched if not objects[t]["expected_ok"])
+
+    @staticmethod
+    def _dist(values) -> dict:
+        if not values:
+            return {"n": 0}
+        arr = np.asarray(values, dtype=float)
+        return {"n": int(arr.size), "mean": float(arr.mean()),
+                "p50": float(np.median(arr)), "p95": float(np.percentile(arr, 95)),
+                "max": float(arr.max())}
+
+    def summary(self) -> dict:
+        precision = self.tp / (self.tp + self.fp) if self.tp + self.fp else 1.0
+        recall = self.tp / (self.tp + self.fn) if self.tp + self.fn else 1.0
+        return {
+            "detection": {
+                "labelled": self.n_true,
+                "detected": self.n_pred,
+                "matched": self.n_matched,
+                "recall": self.n_matched / self.n_true if self.n_true else 1.0,
+                "false_detections": self.n_pred - self.n_matched,
+            },
+            "verdict": {
+                "tp": self.tp, "fp": self.fp, "fn": self.fn, "tn": self.tn,
+                "nok_precision": precision,
+                "nok_recall": recall,
+            },
+            "modules": {m: (h[0] / h[1] if h[1] else None) for m, h in self.module_hits.items()},
+            "pose_error_mm": self._dist(self.pose_err_mm),
+            "angle_error_deg": self._dist(self.angle_err_deg),
+        }
+
+
+def score_dataset(directory, scale: float = 1.0, repeat: int = 1, pattern: str = "*.json",
+                  form_backend: str = "contours") -> dict:
+    """
+    Kører pipelinen over datasættet og returnerer rapport (nøjagtighed + tid).
+
+    scale nedskalerer kun detektionen (preprocess) som qc_main's DOWNSCALED-
+    niveau – QC-modulerne måler på den opskalerede maske i fuld opløsning,
+    så min_area, mm_per_pixel og homografien stadig passer.
+    """
+    modules = build_qc_modules(form_backend)
+    scorer = Scorer(mapper=modules["mapper"])
+    timer = StageTimer()
+    n_images = 0
+
+    for name, img, labels in iter_dataset(directory, pattern):
+        # label-filer med "mm_per_pixel" (fx synth_tray) er lavet med én
+        # global skala – mål størrelsen som de er lavet, ikke via homografien
+        flat = "mm_per_pixel" in labels
+        modules["size"].mapper = None if flat else modules["mapper"]
+        if flat:
+            modules["size"].mm_per_pixel = labels["mm_per_pixel"]
+        for _ in range(repeat):
+            result = run_pipeline(img, modules, timer.span, detect_scale=scale)
+        scorer.add(result, labels)
+        n_images += 1
+
+    if n_images == 0:
+        raise FileNotFoundError(f"Ingen labellede billeder i {directory}")
+
+    return {
+        "dataset": str(directory),
+        "images": n_images,
+        "scale": scale,
+        "form_backend": form_backend,
+        "accuracy": scorer.summary(),
+        "timing": timer.stats(),
+    }
+
+
+def print_report(report: dict, other: dict | None = None) -> None:
+    """Udskriver rapporten – med delta mod other hvis angivet."""
+
+    def row(label, value, ref=None, fmt="{:.3f}", unit=""):
+        text = f"  {label:<22}{fmt.format(value)}{unit}"
+        if ref is not None:
+            text += f"   (ref {fmt.format(ref)}{unit}, Δ {value - ref:+.3f})"
+        print(text)
+
+    acc = report["accuracy"]
+    ref = other["accuracy"] if other else None
+
+    def get(section, key, src):
+        return None if src is None else src[section].get(key)
+
+    print(f"\n=== SCORE: {report['dataset']} (scale {report['scale']:g}, {report['images']} billeder) ===")
+    print("Detektion:")
+    row("recall", acc["detection"]["recall"], get("detection", "recall", ref))
+    row("false detections", acc["detection"]["false_detections"],
+        get("detection", "false_detections", ref), fmt="{:d}")
+    print("Verdict (positiv = NOK):")
+    row("precision", acc["verdict"]["nok_precision"], get("verdict", "nok_precision", ref))
+    row("recall", acc["verdict"]["nok_recall"], get("verdict", "nok_recall", ref))
+    print("Moduler (accuracy):")
+    for m, v in acc["modules"].items():
+        if v is not None:
+            row(m, v, get("modules", m, ref))
+    print("Pose / vinkel:")
+    for key, label, unit in (("pose_error_mm", "pose mean", " mm"), ("angle_error_deg", "angle mean", "°")):
+        if acc[key]["n"]:
+            r = ref[key].get("mean") if ref else None
+            row(label, acc[key]["mean"], r, unit=unit)
+    print("Tid (median ms):")
+    for stage in STAGES:
+        st = report["timing"].get(stage)
+        if st:
+            r = other["timing"].get(stage, {}).get("p50_ms") if other else None
+            row(stage, st["p50_ms"], r, fmt="{:.2f}", unit=" ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Scor QC-pipelinen mod et labellet datasæt")
+    parser.add_argument("dataset", type=Path, help="mappe med <navn>.png + <navn>.json")
+    parser.add_argument("--scale", type=float, default=1.0, help="preprocess på nedskaleret frame (som qc_main DOWNSCALED)")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--pattern", default="*.json")
+    parser.add_argument("--form-backend", default="contours", choices=("contours", "components"))
+    parser.add_argument("--save", metavar="NAME", help="gem rapport som baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="vis delta mod baselines/NAME.json")
+    args = parser.parse_args(argv)
+
+    report = score_dataset(args.dataset, args.scale, args.repeat, args.pattern, args.form_backend)
+    other = load_json(BASELINE_DIR / f"{args.compare}.json") if args.compare else None
+    print_report(report, other)
+
+    if args.save:
+        path = BASELINE_DIR / f"{args.save}.json"
+        save_json(path, report)
+        print(f"\n[SCORE] Rapport gemt → {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+# score_test.py
+# Kør fra projektroden: python benchmarks/score_test.py (eller pytest)
+import tempfile
+from pathlib import Path
+
+from score import score_dataset
+from synth_tray import TrayGenerator
+
+TOLERANCE = 0.10
+
+
+def test_downscaled_detection_scores_like_full_resolution():
+    """--scale 0.5 må ikke give et kunstigt nøjagtigheds-fald (kun preprocess skaleres)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        gen = TrayGenerator()
+        for i in range(3):
+            gen.write(Path(tmp), f"tray_{i:03d}", n_objects=20, seed=i)
+
+        full = score_dataset(tmp, scale=1.0)["accuracy"]
+        half = score_dataset(tmp, scale=0.5)["accuracy"]
+
+    assert abs(full["detection"]["recall"] - half["detection"]["recall"]) <= TOLERANCE
+    for m, acc in full["modules"].items():
+        if acc is not None:
+            assert abs(acc - half["modules"][m]) <= TOLERANCE, (m, acc, half["modules"][m])
+
+
+if __name__ == "__main__":
+    test_downscaled_detection_scores_like_full_resolution()
+    print("[OK] test_downscaled_detection_scores_like_full_resolution")
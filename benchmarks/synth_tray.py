@@ -0,0 +1,432 @@
+"""
+synth_tray.py
+Generator af syntetiske bakke-scener til skala- og nøjagtighedstest.
+
+Sample-billederne har kun en håndfuld emner. Generatoren tegner bakker
+med N røde emner (100 × 25 mm med to skruehuller som standard) og
+skriver ground truth ved siden af hvert billede, så QCForm/QCSpecial/
+QCColor kan presses med 50-500 emner pr. frame.
+
+Funktionalitet:
+- Konfigurerbar emnestørrelse, rotation, antal huller og farvedrift (ΔE)
+- Defekter: manglende/ekstra hul, for kort, hak i siden, forkert farve,
+  knækket emne
+- Delvis tildækning (occlusion), emner der rører hinanden og
+  lys-gradient + sensorstøj over hele bakken
+- Ground truth pr. emne: center, vinkel, mål, huller, defekter og
+  forventet verdict (samlet og pr. QC-modul)
+
+Ground truth-format (<navn>.json ved siden af <navn>.png):
+    {
+        "version": 1,
+        "image": "tray_n050_000.png",
+        "size": [W, H],
+        "mm_per_pixel": 0.5098,
+        "objects": [
+            {
+                "id": 1,
+                "center_px": [cx, cy],
+                "angle_deg": 37.2,          # [0, 180), samme konvention som pca_angle
+                "length_mm": 100.0, "width_mm": 25.0,
+                "holes_px": [[x, y], [x, y]],
+                "hole_count": 2,
+                "delta_e": 3.1,
+                "defects": [],
+                "occluded": false,
+                "touching": null,           # id på emnet det rører, ellers null
+                "expected": {"form": true, "size": true, "color": true, "special": true},
+                "expected_ok": true
+            }
+        ]
+    }
+
+Brug (fra projektroden):
+    python benchmarks/synth_tray.py --objects 50 200 500 --count 3
+    python benchmarks/bench_pipeline.py --dir benchmarks/data/synthetic --pattern "tray_*.png" --scales 1 --tiles 1
+"""
+import argparse
+import json
+import math
+from pathlib import Path
+
+import cv2 as cv
+import numpy as np
+
+OUT_DIR = Path(__file__).resolve().parent / "data" / "synthetic"
+
+# Defekt → hvilke QC-moduler skal fejle
+DEFECTS = {
+    "missing_hole": ("special",),
+    "extra_hole": ("special",),
+    "short": ("size",),
+    "notch": ("form",),
+    "color": ("color",),
+    "broken": ("form", "size", "special"),
+}
+
+_SHIFT = 4                 # sub-pixel præcision i cv.fillPoly/cv.circle
+_SCALE = 1 << _SHIFT
+
+
+def lab_to_bgr(lab) -> np.ndarray:
+    """OpenCV 8-bit LAB → BGR (float) for én farve."""
+    px = np.clip(np.array(lab, dtype=np.float32), 0, 255).astype(np.uint8).reshape(1, 1, 3)
+    return cv.cvtColor(px, cv.COLOR_LAB2BGR).reshape(3).astype(np.float64)
+
+
+class TrayGenerator:
+    """
+    Tegner syntetiske bakker med røde emner.
+
+    Parametre:
+        mm_per_pixel (float): Kamera-skala (samme som QCSize).
+        part_length_mm, part_width_mm (float): Nominelle emnemål.
+        hole_count (int): Antal skruehuller på et OK emne.
+        hole_diameter_mm (float): Hullernes diameter.
+        hole_spacing_mm (float): Afstand mellem yderste huller.
+        reference_lab (tuple): Emnets LAB-farve (samme som QCColor).
+        color_drift_dE (float): Std.afvigelse på farvedrift for OK emner (ΔE).
+        defect_rate (float): Andel emner med en defekt.
+        occlusion_rate (float): Andel emner der delvist tildækkes.
+        touching_rate (float): Andel emner der placeres op ad et andet.
+        light_gradient (float): Lysstyrke varierer ±light_gradient over bakken.
+        noise_sigma (float): Gaussisk sensorstøj (gråtoner).
+        background_bgr (tuple): Bakkens farve.
+        margin_mm (float): Mindste afstand mellem emner der ikke rører.
+
+    Metoder:
+        - generate(n_objects, size, seed): returnerer (BGR-billede, ground truth)
+        - write(out_dir, name, n_objects, seed): gemmer PNG + JSON
+    """
+
+    def __init__(self,
+                 mm_per_pixel: float = 0.5098,
+                 part_length_mm: float = 100.0,
+                 part_width_mm: float = 25.0,
+                 hole_count: int = 2,
+                 hole_diameter_mm: float = 5.0,
+                 hole_spacing_mm: float = 70.0,
+                 reference_lab=(107.30, 187.07, 160.88),
+                 color_drift_dE: float = 5.0,
+                 defect_rate: float = 0.2,
+                 occlusion_rate: float = 0.05,
+                 touching_rate: float = 0.1,
+                 light_gradient: float = 0.15,
+                 noise_sigma: float = 3.0,
+                 background_bgr=(60, 60, 60),
+                 margin_mm: float = 5.0):
+        self.mm_per_pixel = mm_per_pixel
+        self.part_length_mm = part_length_mm
+        self.part_width_mm = part_width_mm
+        self.hole_count = hole_count
+        self.hole_diameter_mm = hole_diameter_mm
+        self.hole_spacing_mm = hole_spacing_mm
+        self.reference_lab = np.array(reference_lab, dtype=np.float64)
+        self.color_drift_dE = color_drift_dE
+        self.defect_rate = defect_rate
+        self.occlusion_rate = occlusion_rate
+        self.touching_rate = touching_rate
+        self.light_gradient = light_gradient
+        self.noise_sigma = noise_sigma
+        self.background_bgr = background_bgr
+        self.margin_mm = margin_mm
+
+    # ------------------------------------------------------------
+    # Hjælpere
+    # ------------------------------------------------------------
+    def _px(self, mm: float) -> float:
+        return mm / self.mm_per_pixel
+
+    def auto_size(self, n_objects: int) -> tuple[int, int]:
+        """Kvadratisk bakke der giver plads til n emner (~1/6 fyldt), min. 1080 px."""
+        part_area = self._px(self.part_length_mm) * self._px(self.part_width_mm)
+        side = int(math.ceil(math.sqrt(n_objects * part_area * 6.0)))
+        side = max(1080, side + (-side % 8))
+        return side, side
+
+    @staticmethod
+    def _to_image(cx, cy, angle_deg, pts):
+        """Lokale (u langs emnet, v på tværs) → billedkoordinater."""
+        t = math.radians(angle_deg)
+        c, s = math.cos(t), math.sin(t)
+        pts = np.asarray(pts, dtype=np.float64)
+        x = cx + pts[:, 0] * c - pts[:, 1] * s
+        y = cy + pts[:, 0] * s + pts[:, 1] * c
+        return np.stack([x, y], axis=1)
+
+    def _outline(self, length_px, width_px, defect):
+        """Emnets omrids i lokale koordinater (evt. med hak i siden)."""
+        hl, hw = length_px / 2.0, width_px / 2.0
+        if defect != "notch":
+            return [(-hl, -hw), (hl, -hw), (hl, hw), (-hl, hw)]
+
+        # rektangulært hak i den ene langside → lavere solidity + extent
+        nl = length_px * 0.25
+        nd = width_px * 0.55
+        return [(-hl, -hw), (hl, -hw), (hl, hw),
+                (nl / 2, hw), (nl / 2, hw - nd), (-nl / 2, hw - nd), (-nl / 2, hw),
+                (-hl, hw)]
+
+    def _holes(self, defect, rng):
+        """Hullernes placering langs emnets akse (lokale u-koordinater)."""
+        if defect == "broken":
+            return [0.0]
+
+        half = self._px(self.hole_spacing_mm) / 2.0
+        us = list(np.linspace(-half, half, self.hole_count)) if self.hole_count > 1 \
+            else [0.0] * self.hole_count
+
+        if defect == "missing_hole" and us:
+            us.pop(int(rng.integers(len(us))))
+        elif defect == "extra_hole":
+            # midt mellem to huller (eller ved siden af et midterhul)
+            us.append(0.0 if self.hole_count % 2 == 0 else half / 2.0)
+        return us
+
+    def _fits(self, occ, poly, margin_px):
+        """True hvis polygonen (plus margin) ikke rammer optagede pixels."""
+        h, w = occ.shape
+        x0, y0 = np.floor(poly.min(axis=0) - margin_px).astype(int)
+        x1, y1 = np.ceil(poly.max(axis=0) + margin_px).astype(int)
+        if x0 < 0 or y0 < 0 or x1 >= w or y1 >= h:
+            return False
+
+        roi = occ[y0:y1 + 1, x0:x1 + 1]
+        probe = np.zeros_like(roi)
+        pts = np.round((poly - (x0, y0)) * _SCALE).astype(np.int32)
+        cv.fillPoly(probe, [pts], 255, cv.LINE_8, _SHIFT)
+        if margin_px > 0:
+            k = 2 * int(math.ceil(margin_px)) + 1
+            probe = cv.dilate(probe, cv.getStructuringElement(cv.MORPH_ELLIPSE, (k, k)))
+        return not np.any(roi & probe)
+
+    @staticmethod
+    def _mark(occ, poly):
+        pts = np.round(poly * _SCALE).astype(np.int32)
+        cv.fillPoly(occ, [pts], 255, cv.LINE_8, _SHIFT)
+
+    # ------------------------------------------------------------
+    # Scene
+    # ------------------------------------------------------------
+    def _sample_part(self, rng, obj_id):
+        defect = None
+        if rng.random() < self.defect_rate:
+            defect = str(rng.choice(list(DEFECTS)))
+
+        length_mm = self.part_length_mm
+        if defect == "short":
+            length_mm *= 0.8
+        elif defect == "broken":
+            length_mm *= 0.45
+
+        drift = rng.normal(0.0, self.color_drift_dE / math.sqrt(3), size=3)
+        if defect == "color":
+            direction = rng.normal(size=3)
+            drift = direction / np.linalg.norm(direction) * rng.uniform(40.0, 60.0)
+
+        return {
+            "id": obj_id,
+            "angle_deg": float(rng.uniform(0.0, 180.0)),
+            "length_mm": float(length_mm),
+            "width_mm": float(self.part_width_mm),
+            "lab": self.reference_lab + drift,
+            "delta_e": float(np.linalg.norm(drift)),
+            "defects": [defect] if defect else [],
+            "occluded": False,
+            "touching": None,
+        }
+
+    def generate(self, n_objects: int, size=None, seed=None):
+        """
+    Tegner en bakke med n_objects emner.
+
+    Parametre:
+        n_objects (int): Ønsket antal emner (færre hvis bakken er fuld).
+        size (tuple | None): (W, H) i pixels – None = auto_size(n_objects).
+        seed (int | None): Seed for reproducerbare scener.
+
+    Returnerer:
+        (img, truth) - BGR uint8 billede og ground truth-dict.
+    """
+        rng = np.random.default_rng(seed)
+        w, h = size or self.auto_size(n_objects)
+
+        occ = np.zeros((h, w), dtype=np.uint8)
+        margin_px = self._px(self.margin_mm)
+        objects = []
+
+        # 1) Placering (rejection sampling på en occupancy-maske)
+        attempts = 0
+        while len(objects) < n_objects and attempts < n_objects * 200:
+            attempts += 1
+            part = self._sample_part(rng, len(objects) + 1)
+            length_px, width_px = self._px(part["length_mm"]), self._px(part["width_mm"])
+            part["center_px"] = [float(rng.uniform(0, w)), float(rng.uniform(0, h))]
+            poly = self._to_image(*part["center_px"], part["angle_deg"],
+                                  self._outline(length_px, width_px, None))
+            if not self._fits(occ, poly, margin_px):
+                continue
+
+            placed = [(part, poly)]
+
+            # makker-emne langs langsiden, så konturerne smelter sammen
+            if len(objects) + 1 < n_objects and rng.random() < self.touching_rate:
+                mate = self._sample_part(rng, len(objects) + 2)
+                mate["angle_deg"] = part["angle_deg"]
+                t = math.radians(part["angle_deg"])
+                off = self._px(part["width_mm"] + mate["width_mm"]) / 2.0
+                mate["center_px"] = [part["center_px"][0] - off * math.sin(t),
+                                     part["center_px"][1] + off * math.cos(t)]
+                mate_poly = self._to_image(*mate["center_px"], mate["angle_deg"],
+                                           self._outline(self._px(mate["length_mm"]),
+                                                         self._px(mate["width_mm"]), None))
+                if self._fits(occ, mate_poly, margin_px):
+                    part["touching"], mate["touching"] = mate["id"], part["id"]
+                    placed.append((mate, mate_poly))
+
+            for p, pl in placed:
+                self._mark(occ, pl)
+                objects.append(p)
+
+        if len(objects) < n_objects:
+            print(f"[SYNTH] Kun plads til {len(objects)}/{n_objects} emner i {w}x{h}")
+
+        # 2) Tegning (uint8, så LINE_AA giver anti-aliasing)
+        img = np.empty((h, w, 3), dtype=np.uint8)
+        img[:] = self.background_bgr
+
+        for obj in objects:
+            defect = obj["defects"][0] if obj["defects"] else None
+            length_px, width_px = self._px(obj["length_mm"]), self._px(obj["width_mm"])
+            cx, cy = obj["center_px"]
+
+            outline = self._to_image(cx, cy, obj["angle_deg"],
+                                     self._outline(length_px, width_px, defect))
+            cv.fillPoly(img, [np.round(outline * _SCALE).astype(np.int32)],
+                        lab_to_bgr(obj["lab"]).tolist(), cv.LINE_AA, _SHIFT)
+
+            hole_us = self._holes(defect, rng)
+            holes = self._to_image(cx, cy, obj["angle_deg"], [(u, 0.0) for u in hole_us]) \
+                if hole_us else np.empty((0, 2))
+            r = self._px(self.hole_diameter_mm) / 2.0
+            for hx, hy in holes:
+                cv.circle(img, (int(round(hx * _SCALE)), int(round(hy * _SCALE))),
+                          int(round(r * _SCALE)), self.background_bgr, -1, cv.LINE_AA, _SHIFT)
+
+            obj["holes_px"] = holes.tolist()
+            obj["hole_count"] = len(holes)
+
+        # 3) Delvis tildækning (lyst, ikke-rødt objekt hen over emnet)
+        for obj in objects:
+            if rng.random() >= self.occlusion_rate:
+                continue
+            cx, cy = obj["center_px"]
+            u = self._px(obj["length_mm"]) * rng.uniform(0.1, 0.4)
+            size_px = self._px(self.part_width_mm) * 1.5
+            cover = self._to_image(cx, cy, obj["angle_deg"] + rng.uniform(-30, 30),
+                                   [(u - size_px, -size_px), (u + size_px, -size_px),
+                                    (u + size_px, size_px), (u - size_px, size_px)])
+            cv.fillPoly(img, [np.round(cover * _SCALE).astype(np.int32)],
+                        (200, 200, 200), cv.LINE_AA, _SHIFT)
+            obj["occluded"] = True
+
+        # 4) Lys-gradient + optik + støj
+        img = img.astype(np.float32)
+        if self.light_gradient > 0:
+            theta = rng.uniform(0.0, 2.0 * math.pi)
+            xs = np.linspace(-1.0, 1.0, w)[None, :]
+            ys = np.linspace(-1.0, 1.0, h)[:, None]
+            gain = 1.0 + self.light_gradient * (xs * math.cos(theta) + ys * math.sin(theta)) / math.sqrt(2)
+            img *= gain[:, :, None].astype(np.float32)
+
+        img = cv.GaussianBlur(img, (3, 3), 0)
+        if self.noise_sigma > 0:
+            img += rng.normal(0.0, self.noise_sigma, size=img.shape).astype(np.float32)
+        img = np.clip(img, 0, 255).astype(np.uint8)
+
+        truth = {
+            "version": 1,
+            "size": [w, h],
+            "mm_per_pixel": self.mm_per_pixel,
+            "seed": seed,
+            "objects": [self._truth(obj) for obj in objects],
+        }
+        return img, truth
+
+    @staticmethod
+    def _truth(obj) -> dict:
+        failing = set()
+        for d in obj["defects"]:
+            failing.update(DEFECTS[d])
+        expected = {m: m not in failing for m in ("form", "size", "color", "special")}
+
+        # et tildækket emne kan ikke verificeres → skal sorteres fra
+        expected_ok = all(expected.values()) and not obj["occluded"]
+
+        return {
+            "id": obj["id"],
+            "center_px": [round(v, 2) for v in obj["center_px"]],
+            "angle_deg": round(obj["angle_deg"], 3),
+            "length_mm": obj["length_mm"],
+            "width_mm": obj["width_mm"],
+            "holes_px": [[round(x, 2), round(y, 2)] for x, y in obj["holes_px"]],
+            "hole_count": obj["hole_count"],
+            "delta_e": round(obj["delta_e"], 2),
+            "defects": obj["defects"],
+            "occluded": obj["occluded"],
+            "touching": obj["touching"],
+            "expected": expected,
+            "expected_ok": expected_ok,
+        }
+
+    def write(self, out_dir: Path, name: str, n_objects: int, seed=None, size=None) -> Path:
+        """Genererer én scene og gemmer <name>.png + <name>.json i out_dir."""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        img, truth = self.generate(n_objects, size=size, seed=seed)
+        img_path = out_dir / f"{name}.png"
+        truth["image"] = img_path.name
+
+        cv.imwrite(str(img_path), img)
+        with open(out_dir / f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump(truth, f, indent=2)
+
+        n_ok = sum(o["expected_ok"] for o in truth["objects"])
+        print(f"[SYNTH] {img_path.name}: {truth['size'][0]}x{truth['size'][1]}, "
+              f"{len(truth['objects'])} emner ({n_ok} OK)")
+        return img_path
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Syntetiske bakke-scener med ground truth")
+    parser.add_argument("--objects", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--count", type=int, default=1, help="scener pr. objekt-antal")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=int, nargs=2, metavar=("W", "H"), default=None)
+    parser.add_argument("--out", type=Path, default=OUT_DIR)
+    parser.add_argument("--defect-rate", type=float, default=0.2)
+    parser.add_argument("--occlusion-rate", type=float, default=0.05)
+    parser.add_argument("--touching-rate", type=float, default=0.1)
+    parser.add_argument("--color-drift", type=float, default=5.0)
+    parser.add_argument("--light-gradient", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    gen = TrayGenerator(
+        defect_rate=args.defect_rate,
+        occlusion_rate=args.occlusion_rate,
+        touching_rate=args.touching_rate,
+        color_drift_dE=args.color_drift,
+        light_gradient=args.light_gradient,
+    )
+
+    seed = args.seed
+    for n in args.objects:
+        for k in range(args.count):
+            gen.write(args.out, f"tray_n{n:03d}_{k:03d}", n, seed=seed,
+                      size=tuple(args.size) if args.size else None)
+            seed += 1
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,9 @@ ROOT = Path(__file__).resolve().parent
 sys.path.append(str(ROOT))
 
 from A_Vision.Vision_camera import OakCamera
+from A_Vision.Vision_segment import SegmentPipeline
+from A_Vision.Calibration_store import LEGACY_ROI, Calibration, CalibrationStore
+from A_Vision.Vision_pose import PoseModel, contour_angles, rect_legacy_offset
 
 CONFIG_PATH = ROOT / "C_data" / "object_settings.json"
 H_PATH      = ROOT / "C_data" / "calibration_h.npz"
@@ -21,21 +24,20 @@ H_PATH      = ROOT / "C_data" / "calibration_h.npz"
 with open(CONFIG_PATH, "r") as f:
     cfg = json.load(f)
 
-lower    = np.array([cfg["H_low"],  cfg["S_low"],  cfg["V_low"]], dtype=np.uint8)
-upper    = np.array([cfg["H_high"], cfg["S_high"], cfg["V_high"]], dtype=np.uint8)
 min_area = cfg["min_area"]
-blur_k   = cfg["blur_k"]
 
 # ---------------------------------------------
-# LOAD HOMOGRAPHY MATRIX (H)
+# LOAD CALIBRATION (H, ROI, ANGLE MODEL)
+# aktiv version i C_data/calibration – ellers den gamle npz
 # ---------------------------------------------
-H = np.load(H_PATH)["H"]
+calib = CalibrationStore().current()
+if calib is not None:
+    print(f"[CALIB] Bruger kalibrering {calib.version}")
+else:
+    calib = Calibration(H=np.load(H_PATH)["H"], roi=LEGACY_ROI)
 
-# ---------------------------------------------
-# ROI USED DURING CALIBRATION
-# ---------------------------------------------
-x1, x2 = 120, 528
-y1, y2 = 60, 472
+H = calib.H
+x1, y1, x2, y2 = calib.roi or LEGACY_ROI
 
 # ---------------------------------------------
 # CAMERA INIT
@@ -45,6 +47,25 @@ cam = OakCamera(resolution=(640, 400))
 FRAME_W = 640
 FRAME_H = 400
 
+# samme vinkelmodel som qc_main (Vision_pose) – erstatter 26.76 / 63.24 + 90°.
+# Ankret i ROI-centret i det spejlede pixelrum som tool_angles kaldes med
+# nedenfor, så den gamle regel gengives præcist dér.
+pose = PoseModel.from_calibration(
+    calib,
+    anchor_px=(FRAME_W - (x1 + x2) / 2.0, FRAME_H - (y1 + y2) / 2.0),
+    legacy_offset_deg=rect_legacy_offset(calib.angles),
+)
+
+# ---------------------------------------------
+# SEGMENTATION (referencekæden indtil CALIB_FRAMES frames med objekter er
+# set – så valideres og vælges den hurtigste ækvivalente kæde)
+# ---------------------------------------------
+segment = SegmentPipeline.from_settings(cfg, roi=(x1, y1, x2, y2))
+segment_ready = False
+CALIB_FRAMES = 5
+calib_frames = []
+SHOW_HSV = False   # fuld-frame HSV koster en ekstra cvtColor pr. frame
+
 latest_detections = []   # (cx, cy, angle)
 
 # ---------------------------------------------
@@ -55,22 +76,20 @@ while True:
     if frame is None:
         continue
 
-    hsv = cv.cvtColor(frame, cv.COLOR_BGR2HSV)
-    cv.imshow("hsv", hsv)
-    # Extract ROI like in calibration
-    roi = hsv[y1:y2, x1:x2]
-    roi_blur = cv.GaussianBlur(roi, (blur_k, blur_k), 0)
-
-    mask = cv.inRange(roi_blur, lower, upper)
+    if SHOW_HSV:
+        cv.imshow("hsv", cv.cvtColor(frame, cv.COLOR_BGR2HSV))
 
-    # Morphology
-    kernel = np.ones((5,5), np.uint8)
-    mask = cv.morphologyEx(mask, cv.MORPH_OPEN, kernel, iterations=2)
-    mask = cv.morphologyEx(mask, cv.MORPH_CLOSE, kernel, iterations=2)
-    mask = cv.GaussianBlur(mask, (5,5), 0)
+    # ROI → HSV → inRange → OPEN ×2 → CLOSE ×2 → blur → Canny → dilate
+    # (se Vision_segment.py – valideret mod den oprindelige kæde)
+    mask_edges = segment(frame)
 
-    mask_edges = cv.Canny(mask, 40, 120)
-    mask_edges = cv.dilate(mask_edges, kernel, iterations=1)
+    # tomme masker beviser intet – kun frames med objekter bruges til valg
+    if not segment_ready and np.count_nonzero(mask_edges):
+        calib_frames.append(frame.copy())   # før der tegnes på framen
+        if len(calib_frames) >= CALIB_FRAMES:
+            segment.calibrate(calib_frames, min_frames=CALIB_FRAMES)
+            segment_ready = True
+            calib_frames = []
 
     # Contours
     cnts, _ = cv.findContours(mask_edges, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
@@ -89,33 +108,17 @@ while True:
         rot_rect = cv.minAreaRect(cnt_smooth)
         (center_local, (w, h), angle) = rot_rect
 
-        angle = angle % 180
-
-        # -----------------------------------------
-        # FORCE LONG SIDE USING THRESHOLD
-        # -----------------------------------------
-        THRESHOLD = 40  # between ~22 and ~77
-
-        if w > THRESHOLD:
-            w, h = h, w
-            angle = (angle + 90) % 180
-            rot_rect = (center_local, (w, h), angle)
-
-        # -----------------------------------------
-        # ROBOT ANGLE CALIBRATION
-        # -----------------------------------------
-        if h > w:
-            object_angle = (angle - 26.76) % 180
-        else:
-            object_angle = (angle + 63.24) % 180
-
-        # Extra 90° tool offset
-        object_angle = (object_angle + 90) % 180
-
         # Global pixel coords
         cx = int(center_local[0]) + x1
         cy = int(center_local[1]) + y1
 
+        # -----------------------------------------
+        # ROBOT ANGLE: lang akse → homografiens Jacobian → værktøjsvinkel
+        # (evalueret i samme spejlede pixel som snapshot-mappingen nedenfor)
+        # -----------------------------------------
+        object_angle = float(pose.tool_angles([(FRAME_W - cx, FRAME_H - cy)],
+                                              contour_angles([cnt_smooth]))[0])
+
         # store detection
         latest_detections.append((cx, cy, object_angle))
 